@@ -1,9 +1,33 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify
+from flask import Flask, render_template, request, redirect, url_for, jsonify, g, Response, send_file
+from flask.json.provider import DefaultJSONProvider
 import os
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 import calendar
+import gzip
+import io
 import json
+import math
 from collections import Counter
+from fleet_stats import FleetStats
+from ont_index import SortedOntIndex, DEFAULT_PAGE_SIZE
+from inventory import InventoryRepository, DuplicateKeyError, RecordNotFoundError, record_version
+import ont_import
+import ont_bulk
+import inventory_integrity
+import ping_cluster
+import topology
+import discovery
+import scheduler
+import metrics
+import request_log
+import profiler
+import store_lock
+import notification_archive
+import notification_coalescer
+import hotspot_sessions
+import hotspot_bandwidth
+import routers
 # RouterOS dependency: provide fallback mock if not installed or MOCK_ROUTEROS is enabled
 try:
     import routeros_api  # type: ignore
@@ -21,30 +45,70 @@ except Exception:
             pass
     routeros_api = type('routeros_api', (), { 'RouterOsApiPool': _MockRouterOsApiPool })()
 
+
+
+class _TimedJSONProvider(DefaultJSONProvider):
+    """Waktu serialisasi jsonify dicatat sebagai fase 'serialize' di request log."""
+
+    def dumps(self, obj, **kwargs):
+        with request_log.phase('serialize'):
+            return super().dumps(obj, **kwargs)
+
+
 app = Flask(__name__)
+app.json = _TimedJSONProvider(app)
 
 DATA_FILE = 'onts.json'
 NOTIFICATIONS_FILE = 'notifications.json'
 NOTIFICATIONS_BAK_FILE = f"{NOTIFICATIONS_FILE}.bak"
+# Notifikasi lebih tua dari masa retensi (atau di luar batas jumlah) dipindah ke arsip bulanan
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', notification_archive.RETENTION_DAYS))
+NOTIFICATION_HOT_MAX = int(os.environ.get('NOTIFICATION_HOT_MAX', notification_archive.HOT_MAX))
 OUTAGES_FILE = 'outages.json'
 BACKUP_DIR = 'backups'
 HISTORY_FILE = 'history.json'
-MIKROTIK_IP = '111.92.166.184'
-MIKROTIK_PORT = 8728
-MIKROTIK_USER = 'monitor'
-MIKROTIK_PASS = 's0t0kudus'
+# Router hotspot dari routers.json; tanpa file itu, satu router dari MIKROTIK_* di environment
+ROUTERS_FILE = routers.ROUTERS_FILE
+# Snapshot user aktif format lama; hanya dibaca sekali untuk diimpor ke hotspot_sessions/
 USER_LOG_FILE = 'user_log.json'
 
 
+# Inventaris ONT: indeks id/id_pelanggan/ip di memori, perubahan admin ditulis ke journal.
+# Statistik armada dan indeks admin ikut diperbarui lewat listener repository.
+inventory = InventoryRepository(DATA_FILE, backup_dir=BACKUP_DIR)
+_fleet_stats = FleetStats()
+_ont_index = SortedOntIndex()
+inventory.add_listener(_fleet_stats)
+inventory.add_listener(_ont_index)
+
+LOAD_DATA_SECONDS = metrics.histogram('app_load_data_seconds', 'Durasi load_data (snapshot inventaris)')
+JSON_WRITE_SECONDS = metrics.histogram('app_json_write_seconds', 'Durasi _atomic_write_json', ('file',))
+JSON_WRITE_BYTES = metrics.histogram('app_json_write_bytes', 'Ukuran file yang ditulis _atomic_write_json',
+                                     ('file',), buckets=metrics.SIZE_BUCKETS)
+HTTP_SECONDS = metrics.histogram('http_request_duration_seconds', 'Durasi request HTTP',
+                                 ('method', 'endpoint', 'status'))
+HTTP_RESPONSE_BYTES = metrics.histogram('http_response_bytes', 'Ukuran body response HTTP',
+                                        ('endpoint',), buckets=metrics.SIZE_BUCKETS)
+metrics.gauge('ont_inventory_records', 'Jumlah ONT di inventaris').set_function(lambda: len(_ont_index))
+
+# Satu baris JSON per request (route, status, bytes, waktu total/store/serialize) untuk /admin/perf
+_request_logger = request_log.RequestLogger.from_env()
+_notification_archive = notification_archive.NotificationArchive()
+# Sesi hotspot dari selisih snapshot user aktif (join/leave), bukan snapshot utuh
+_hotspot_sessions = hotspot_sessions.SessionStore(hotspot_sessions.SESSION_DIR, legacy_file=USER_LOG_FILE)
+# Throughput per user dan top talker dihitung sekali per snapshot yang di-ingest
+_hotspot_bandwidth = hotspot_bandwidth.BandwidthTracker(hotspot_sessions.SESSION_DIR)
+_hotspot_sessions.add_listener(_hotspot_bandwidth)
+_router_collector = routers.RouterCollector(routers.load_routers(ROUTERS_FILE), api_module=routeros_api)
+
+@request_log.timed_phase('store')
 def load_data():
-    try:
-        with open(DATA_FILE, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+    with metrics.timer(LOAD_DATA_SECONDS):
+        return inventory.all()
 
 # --- SEMUA FUNGSI LAMA ANDA TETAP DI SINI (TIDAK ADA YANG DIHAPUS) ---
 
+@request_log.timed_phase('store')
 def load_notifications():
     """Load notifications from primary file; fall back to backup on decode error."""
     try:
@@ -86,26 +150,35 @@ def _recover_notifications_from_backup():
         print(f"Failed to recover notifications from backup: {e}")
         return []
 
-def _atomic_write_json(file_path, data):
+@request_log.timed_phase('store')
+def _atomic_write_json(file_path, data, backup=True):
+    # Lock antar-worker (serve.py); reentrant, jadi aman di dalam read-modify-write yang sudah terkunci
+    with store_lock.shared_lock(file_path), metrics.timer(JSON_WRITE_SECONDS, file=os.path.basename(file_path)):
+        _write_json_file(file_path, data, backup)
+
+def _write_json_file(file_path, data, backup=True):
     dir_name = os.path.dirname(file_path) or '.'
-    temp_path = os.path.join(dir_name, f".tmp-{os.path.basename(file_path)}")
+    temp_path = os.path.join(dir_name, f".tmp-{os.getpid()}-{os.path.basename(file_path)}")
     with open(temp_path, 'w') as tf:
         json.dump(data, tf, indent=2)
         tf.flush()
+        JSON_WRITE_BYTES.observe(tf.tell(), file=os.path.basename(file_path))
         try:
             os.fsync(tf.fileno())
         except Exception:
             pass
-    try:
-        with open(f"{file_path}.bak", 'w') as bf:
-            json.dump(data, bf, indent=2)
-    except Exception:
-        pass
+    if backup:
+        try:
+            with open(f"{file_path}.bak", 'w') as bf:
+                json.dump(data, bf, indent=2)
+        except Exception:
+            pass
     os.replace(temp_path, file_path)
 
 def save_notifications(notifications):
     _atomic_write_json(NOTIFICATIONS_FILE, notifications)
 
+@request_log.timed_phase('store')
 def load_outages():
     try:
         with open(OUTAGES_FILE, 'r') as f:
@@ -119,34 +192,65 @@ def save_outages(outages):
 def _record_outage_transition(ont_id, ont_name, old_status, new_status, event_time_iso):
     if old_status == new_status:
         return
-    outages = load_outages()
-    if old_status == 'ON' and new_status != 'ON':
-        outages.append({
-            "ont_id": ont_id, "ont_name": ont_name,
-            "start_time": event_time_iso, "end_time": None
-        })
-        save_outages(outages)
-        return
-    if old_status != 'ON' and new_status == 'ON':
-        for rec in reversed(outages):
-            if rec.get('ont_id') == ont_id and rec.get('end_time') is None:
-                rec['end_time'] = event_time_iso
-                break
-        save_outages(outages)
+    with store_lock.shared_lock(OUTAGES_FILE):
+        outages = load_outages()
+        if old_status == 'ON' and new_status != 'ON':
+            outages.append({
+                "ont_id": ont_id, "ont_name": ont_name,
+                "start_time": event_time_iso, "end_time": None
+            })
+            save_outages(outages)
+            return
+        if old_status != 'ON' and new_status == 'ON':
+            for rec in reversed(outages):
+                if rec.get('ont_id') == ont_id and rec.get('end_time') is None:
+                    rec['end_time'] = event_time_iso
+                    break
+            save_outages(outages)
 
 def add_notification(message, notification_type="info", ont_id=None, ont_name=None, timestamp=None):
-    notifications = load_notifications()
-    next_id = (max((n.get('id', 0) for n in notifications), default=0) + 1)
-    new_notification = {
-        "id": next_id, "message": message, "type": notification_type,
-        "timestamp": (timestamp or datetime.now().isoformat()),
-        "ont_id": ont_id, "ont_name": ont_name, "read": False
-    }
-    notifications.append(new_notification)
-    _backup_notifications(notifications)
-    save_notifications(notifications)
+    with store_lock.shared_lock(NOTIFICATIONS_FILE):
+        notifications = load_notifications()
+        next_id = _next_notification_id(notifications)
+        new_notification = {
+            "id": next_id, "message": message, "type": notification_type,
+            "timestamp": (timestamp or datetime.now().isoformat()),
+            "ont_id": ont_id, "ont_name": ont_name, "read": False
+        }
+        notifications.append(new_notification)
+        _backup_notifications(notifications)
+        save_notifications(notifications)
     return new_notification
 
+def _next_notification_id(notifications):
+    # ID arsip ikut dihitung agar notifikasi baru tidak memakai ulang ID yang sudah diarsipkan
+    return max(max((n.get('id', 0) for n in notifications), default=0), _notification_archive.max_id()) + 1
+
+def _write_notification_batch(items, window):
+    """Menulis antrean coalescer: satu load/backup/save untuk seluruh batch."""
+    with store_lock.shared_lock(NOTIFICATIONS_FILE):
+        notifications = load_notifications()
+        notification_coalescer.merge_batch(notifications, items, window, _next_notification_id(notifications))
+        _backup_notifications(notifications)
+        save_notifications(notifications)
+
+# Event notifikasi dari luar (status ONT) lewat coalescer: digabung per ONT/type dan dibatasi rate-nya
+_notifier = notification_coalescer.NotificationCoalescer.from_env(_write_notification_batch)
+
+def compact_notifications(now=None):
+    """Memindahkan notifikasi lewat masa retensi ke arsip bulanan; mengembalikan jumlah yang diarsipkan."""
+    with store_lock.shared_lock(NOTIFICATIONS_FILE):
+        notifications = load_notifications()
+        hot, expired = notification_archive.split_expired(
+            notifications, now or datetime.now(), NOTIFICATION_RETENTION_DAYS, NOTIFICATION_HOT_MAX)
+        if not expired:
+            return 0
+        # Arsip ditulis lebih dulu: jika proses mati di tengah, notifikasi tidak hilang (paling buruk ganda)
+        _notification_archive.append(expired)
+        save_notifications(hot)
+    print(f"[notifikasi] {len(expired)} notifikasi diarsipkan, {len(hot)} tetap di {NOTIFICATIONS_FILE}")
+    return len(expired)
+
 def _backup_notifications(notifications):
     try:
         timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
@@ -171,14 +275,68 @@ def _cleanup_old_backups(pattern, keep_count):
     except Exception as e:
         print(f"Warning: Failed to cleanup old backups: {e}")
 
-def save_and_backup(onts):
-    with open(DATA_FILE, 'w') as f:
-        json.dump(onts, f, indent=2)
-    os.makedirs(BACKUP_DIR, exist_ok=True)
-    timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
-    backup_path = f'{BACKUP_DIR}/onts-{timestamp}.json'
-    with open(backup_path, 'w') as f:
-        json.dump(onts, f, indent=2)
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+    g.profile = profiler.PROFILER.start()
+    request_log.begin()
+
+@app.after_request
+def _observe_request(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_SECONDS.observe(elapsed, method=request.method,
+                             endpoint=endpoint, status=response.status_code)
+        length = response.calculate_content_length()
+        if length is not None:
+            HTTP_RESPONSE_BYTES.observe(length, endpoint=endpoint)
+        _request_logger.record(request_log.make_entry(request.method, endpoint, request.path,
+                                                      response.status_code, length, elapsed,
+                                                      request_log.end()))
+        profiler.PROFILER.finish(g.pop('profile', None), 'request', f'{request.method} {endpoint}',
+                                 profiler.PROFILER.settings['request_threshold_ms'])
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Metrik proses web dalam format teks Prometheus."""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/admin/perf')
+def admin_perf():
+    """Ringkasan request log: p50/p95/p99 per route dan request paling lambat (?format=json)."""
+    report = request_log.build_report(_request_logger.log_files(), top=request.args.get('top', 25, type=int))
+    report['log_file'] = _request_logger.path
+    report['sample_rate'] = _request_logger.sample_rate
+    report['dropped'] = _request_logger.dropped
+    if request.args.get('format') == 'json':
+        return jsonify(report)
+    return render_template('perf.html', report=report)
+
+@app.route('/admin/profiles', methods=['GET', 'POST'])
+def admin_profiles():
+    """Daftar capture profiling (top-N fungsi kumulatif); POST JSON mengubah pengaturan profiling."""
+    if request.method == 'POST':
+        try:
+            settings = profiler.PROFILER.update_settings(request.get_json(silent=True) or {})
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+        return jsonify({"success": True, "settings": settings})
+    profiler.PROFILER.refresh()
+    top = request.args.get('top', 10, type=int)
+    report = {'settings': profiler.PROFILER.settings, 'profiles': profiler.PROFILER.list_profiles(top=top)}
+    if request.args.get('format') == 'json':
+        return jsonify(report)
+    return render_template('profiles.html', report=report)
+
+@app.route('/admin/profiles/<name>.pstats')
+def admin_profile_download(name):
+    path = profiler.PROFILER.pstats_path(name)
+    if path is None:
+        return jsonify({"success": False, "message": "Profil tidak ditemukan"}), 404
+    return send_file(os.path.abspath(path), as_attachment=True, download_name=f'{name}.pstats')
 
 @app.route('/')
 def map_view():
@@ -195,20 +353,102 @@ def analytics_page():
 
 @app.route('/healthz')
 def healthz():
-    """Endpoint sederhana untuk cek kesehatan service."""
-    return jsonify({"status": "ok"})
+    """Endpoint sederhana untuk cek kesehatan service (pid dan generation inventaris worker ini)."""
+    return jsonify({"status": "ok", "pid": os.getpid(), "inventory_generation": inventory.generation})
 
 @app.route('/api/onts')
 def api_onts():
     return jsonify(load_data())
 
+@app.route('/api/stats')
+def api_stats():
+    """Statistik armada (per status, Icon, area, down terlama, perubahan terbaru)."""
+    limit = request.args.get('limit', 10, type=int)
+    inventory.refresh()
+    return jsonify(_fleet_stats.snapshot(max(1, min(limit, 100))))
+
+@app.route('/api/pinger/workers')
+def api_pinger_workers():
+    """Worker pinger ter-shard yang terdaftar (lihat ping_cluster.py) beserta status lease."""
+    leases = ping_cluster.read_leases(ping_cluster.LEASE_DIR)
+    return jsonify({
+        'live': sum(1 for l in leases if l['alive']),
+        'workers': leases,
+    })
+
+@app.route('/api/upstreams')
+def api_upstreams():
+    """Node upstream dengan status probe terakhir dan jumlah ONT langsung di bawahnya."""
+    nodes = topology.load_upstreams()
+    statuses = topology.load_statuses()
+    children = Counter(str(o.get('parent')) for o in load_data() if o.get('parent'))
+    result = []
+    for node_id in topology.probe_order(nodes):
+        state = statuses.get(node_id, {})
+        result.append(dict(nodes[node_id], status=state.get('status'), root_cause=state.get('root_cause'),
+                           checked_at=state.get('checked_at'), ont_count=children.get(node_id, 0)))
+    return jsonify(result)
+
+_discovery_job = discovery.DiscoveryJob()
+
+@app.route('/api/discovery', methods=['GET', 'POST'])
+def api_discovery():
+    """GET: status dan laporan discovery terakhir. POST: mulai sweep baru di background.
+
+    Body POST (opsional): {"ranges": ["10.239.0.0/24"], "pps": 500, "timeout": 1.5}.
+    Rentang harus berada di dalam discovery.ALLOWED_RANGES (DISCOVERY_ALLOWED_RANGES)
+    dan pps dibatasi discovery.MAX_PPS (DISCOVERY_MAX_PPS).
+    """
+    if request.method == 'GET':
+        return jsonify(_discovery_job.status())
+    data = request.get_json(silent=True) or {}
+    try:
+        ranges = discovery.check_allowed(data.get('ranges') or discovery.DEFAULT_RANGES)
+        timeout = float(data.get('timeout', discovery.probe_engine.DEFAULT_TIMEOUT))
+        if not (math.isfinite(timeout) and 0 < timeout <= discovery.MAX_TIMEOUT):
+            raise ValueError(f"timeout harus lebih dari 0 dan paling besar {discovery.MAX_TIMEOUT:g} detik")
+        options = {
+            'pps': max(1, min(int(data.get('pps', discovery.MAX_PPS)), discovery.MAX_PPS)),
+            'timeout': timeout,
+        }
+        started = _discovery_job.start(ranges, load_data, **options)
+    except (TypeError, ValueError) as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    if not started:
+        return jsonify({"success": False, "message": "Discovery lain masih berjalan", "running": _discovery_job.running}), 409
+    return jsonify({"success": True, "message": "Discovery dimulai", "running": _discovery_job.running}), 202
+
 @app.route('/admin')
 def admin():
-    onts = load_data()
-    return render_template('list.html', onts=onts)
+    # Baris tabel dimuat bertahap oleh list.html lewat /api/admin/onts
+    return render_template('list.html')
+
+@app.route('/api/admin/onts')
+def api_admin_onts():
+    """Daftar ONT untuk halaman admin: sort, filter dan keyset pagination di server.
+
+    Query param: sort (id|name|status|last_on), order (asc|desc), status (all|on|off),
+    q (teks pencarian), cursor (dari next_cursor sebelumnya), limit.
+    """
+    inventory.refresh()
+    try:
+        page = _ont_index.page(
+            sort=request.args.get('sort', 'id'),
+            order=request.args.get('order', 'asc'),
+            group=request.args.get('status', 'all'),
+            cursor=request.args.get('cursor') or None,
+            limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+            query=request.args.get('q', ''),
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    for item in page['items']:
+        item['version'] = record_version(item)
+    return jsonify(page)
 
 @app.route('/notifications')
 def notifications():
+    _notifier.flush()  # event yang baru masuk ke worker ini langsung terlihat
     notifications_list = load_notifications()
     notifications_list.sort(key=lambda x: x['timestamp'], reverse=True)
     return render_template('notifications.html', notifications=notifications_list)
@@ -217,29 +457,52 @@ def notifications():
 def api_notifications():
     if request.method == 'POST':
         data = request.get_json()
-        add_notification(data.get('message', ''), data.get('type', 'info'), None, None, timestamp=data.get('timestamp'))
-        return jsonify({"success": True})
+        result = _notifier.submit(data.get('message', ''), data.get('type', 'info'), data.get('ont_id'),
+                                  data.get('ont_name'), timestamp=data.get('timestamp'))
+        return jsonify({"success": True, "result": result})
+    _notifier.flush()
     notifications_list = load_notifications()
-    notifications_list.sort(key=lambda x: x['timestamp'], reverse=True)
-    return jsonify(notifications_list)
+    if not any(request.args.get(k) for k in ('from', 'to', 'q')):
+        notifications_list.sort(key=lambda x: x['timestamp'], reverse=True)
+        return jsonify(notifications_list)
+    # Pencarian (?from=2026-09-01&to=2026-09-30&q=LOS&limit=200) mencakup notifikasi yang sudah diarsipkan
+    try:
+        start = notification_archive.parse_bound(request.args.get('from'))
+        end = notification_archive.parse_bound(request.args.get('to'), end=True)
+        limit = max(1, int(request.args.get('limit', notification_archive.SEARCH_LIMIT)))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    query = (request.args.get('q') or '').lower()
+    matches = [n for n in notifications_list if notification_archive.matches(n, start, end, query)]
+    matches.extend(_notification_archive.search(start, end, query, limit))
+    matches.sort(key=lambda x: notification_archive.parse_timestamp(x['timestamp']), reverse=True)
+    return jsonify(matches[:limit])
+
+@app.route('/api/notifications/archive')
+def api_notification_archive():
+    """Index arsip notifikasi: jumlah, rentang waktu dan ukuran file per bulan."""
+    index = _notification_archive.load_index()
+    return jsonify(dict(index, retention_days=NOTIFICATION_RETENTION_DAYS, hot_max=NOTIFICATION_HOT_MAX))
 
 @app.route('/api/notifications/mark-read/<int:notification_id>', methods=['POST'])
 def mark_notification_read(notification_id):
-    notifications_list = load_notifications()
-    for notification in notifications_list:
-        if notification['id'] == notification_id:
-            notification['read'] = True
-            break
-    save_notifications(notifications_list)
+    with store_lock.shared_lock(NOTIFICATIONS_FILE):
+        notifications_list = load_notifications()
+        for notification in notifications_list:
+            if notification['id'] == notification_id:
+                notification['read'] = True
+                break
+        save_notifications(notifications_list)
     return jsonify({"success": True})
 
 @app.route('/api/notifications/clear-all', methods=['POST'])
 def clear_all_notifications():
     try:
-        current_notifications = load_notifications()
-        if current_notifications:
-            _backup_notifications(current_notifications)
-        save_notifications([])
+        with store_lock.shared_lock(NOTIFICATIONS_FILE):
+            current_notifications = load_notifications()
+            if current_notifications:
+                _backup_notifications(current_notifications)
+            save_notifications([])
         return jsonify({"success": True, "message": "Semua notifikasi berhasil dihapus."})
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
@@ -258,96 +521,260 @@ def restore_notifications_from_backup():
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
 
+def _ont_form_fields():
+    return {
+        "id_pelanggan": request.form['id_pelanggan'], "name": request.form['name'],
+        "lokasi": request.form['lokasi'], "ip": request.form['ip'],
+        "latitude": float(request.form['latitude']), "longitude": float(request.form['longitude']),
+        "parent": request.form.get('parent', '').strip(),
+    }
+
+def _render_ont_form(ont, error=None, status=200):
+    return render_template('form.html', ont=ont, error=error,
+                           upstreams=sorted(topology.load_upstreams().values(), key=lambda n: str(n['id']))), status
+
 @app.route('/add', methods=['GET', 'POST'])
 def add_ont():
     if request.method == 'POST':
-        onts = load_data()
-        new_id = max([o['id'] for o in onts], default=0) + 1
-        new_ont = {
-            "id": new_id,
-            "id_pelanggan": request.form['id_pelanggan'], "name": request.form['name'],
-            "lokasi": request.form['lokasi'], "ip": request.form['ip'],
-            "latitude": float(request.form['latitude']), "longitude": float(request.form['longitude']),
-            "status": "OFF", "rto_count": 0
-        }
-        onts.append(new_ont)
-        save_and_backup(onts)
+        fields = _ont_form_fields()
+        if not fields['parent']:
+            del fields['parent']
+        try:
+            new_ont = inventory.insert(dict(fields, status="OFF", rto_count=0))
+        except DuplicateKeyError as e:
+            return _render_ont_form(fields, str(e), 409)
         add_notification(f"ONT baru ditambahkan: {new_ont['name']} ({new_ont['id_pelanggan']})", "success", new_ont['id'], new_ont['name'])
         return redirect(url_for('admin'))
-    return render_template('form.html', ont={})
+    return _render_ont_form({})
 
 @app.route('/edit/<int:id>', methods=['GET', 'POST'])
 def edit_ont(id):
-    onts = load_data()
-    ont = next((o for o in onts if o['id'] == id), None)
+    ont = inventory.get(id)
     if not ont:
         return "ONT not found", 404
     if request.method == 'POST':
         old_name = ont['name']
         old_id_pelanggan = ont['id_pelanggan']
-        ont['id_pelanggan'] = request.form['id_pelanggan']
-        ont['name'] = request.form['name']
-        ont['lokasi'] = request.form['lokasi']
-        ont['ip'] = request.form['ip']
-        ont['latitude'] = float(request.form['latitude'])
-        ont['longitude'] = float(request.form['longitude'])
+        changes = _ont_form_fields()
+        if not changes['parent'] and 'parent' not in ont:
+            del changes['parent']
         if 'rto_count' not in ont:
-            ont['rto_count'] = 0
-        save_and_backup(onts)
+            changes['rto_count'] = 0
+        try:
+            ont = inventory.update(id, changes)
+        except DuplicateKeyError as e:
+            return _render_ont_form(dict(ont, **changes), str(e), 409)
+        except RecordNotFoundError:
+            return "ONT not found", 404
         add_notification(f"ONT diperbarui: {old_name} ({old_id_pelanggan}) → {ont['name']} ({ont['id_pelanggan']})", "info", ont['id'], ont['name'])
         return redirect(url_for('admin'))
-    return render_template('form.html', ont=ont)
+    return _render_ont_form(ont)
 
 @app.route('/delete/<int:id>')
 def delete_ont(id):
-    onts = load_data()
-    ont_to_delete = next((o for o in onts if o['id'] == id), None)
+    try:
+        ont_to_delete = inventory.delete(id)
+    except RecordNotFoundError:
+        ont_to_delete = None
     if ont_to_delete:
         add_notification(f"ONT dihapus: {ont_to_delete['name']} ({ont_to_delete['id_pelanggan']})", "warning", ont_to_delete['id'], ont_to_delete['name'])
-    onts = [o for o in onts if o['id'] != id]
-    save_and_backup(onts)
     return redirect(url_for('admin'))
 
+@app.route('/api/inventory/integrity')
+def api_inventory_integrity():
+    """Laporan integritas inventaris (duplikat, near-duplicate, IP/koordinat invalid).
+
+    Query param: radius (meter, default 20), save=1 untuk menyimpan laporan ke reports/integrity/.
+    """
+    radius = request.args.get('radius', inventory_integrity.DEFAULT_RADIUS_M, type=float)
+    if not math.isfinite(radius) or not 0 < radius <= inventory_integrity.MAX_RADIUS_M:
+        return jsonify({"success": False,
+                        "message": f"radius harus lebih dari 0 dan paling besar {inventory_integrity.MAX_RADIUS_M:g} meter"}), 400
+    report = inventory_integrity.scan(load_data(), radius_m=radius)
+    if request.args.get('save', '').lower() in ('1', 'true', 'yes'):
+        report['report_path'] = inventory_integrity.write_report(report)
+    return jsonify(report)
+
+@app.route('/api/onts/import', methods=['POST'])
+def api_import_onts():
+    """Import/merge ONT dari CSV atau JSON (upload field `file` atau body mentah).
+
+    Query param: dry_run=1, mode=merge|replace, skip_invalid=1, format=csv|json.
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        stream, filename, content_type = upload.stream, upload.filename, upload.mimetype
+    else:
+        stream, filename, content_type = request.stream, '', request.mimetype
+    fmt = request.args.get('format') or ont_import.detect_format(filename, content_type)
+    dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    skip_invalid = request.args.get('skip_invalid', '').lower() in ('1', 'true', 'yes')
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        report = ont_import.run_import(
+            ont_import.iter_rows(text_stream, fmt), inventory,
+            mode=request.args.get('mode', 'merge'), dry_run=dry_run, skip_invalid=skip_invalid,
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    finally:
+        text_stream.detach()
+    if report['applied']:
+        add_notification(ont_import.summarize(report), "info")
+    status = 200 if report['applied'] or dry_run or not report['error_count'] else 422
+    return jsonify(dict(report, success=status == 200, message=ont_import.summarize(report))), status
+
+@app.route('/api/onts/bulk', methods=['POST'])
+def api_bulk_onts():
+    """Create/update/delete banyak ONT sekaligus secara all-or-nothing.
+
+    Update/delete boleh membawa `version` dari /api/admin/onts; jika record sudah
+    berubah sejak itu, seluruh batch ditolak dengan 409.
+    """
+    payload = request.get_json(silent=True)
+    try:
+        report = ont_bulk.apply_bulk(payload, inventory)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    if not report['applied']:
+        conflict = any(r.get('conflict') for r in report['results'])
+        message = f"Batch dibatalkan: {report['failed']} operasi gagal"
+        return jsonify(dict(report, success=False, message=message)), 409 if conflict else 422
+    add_notification(ont_bulk.summarize(report), "info")
+    return jsonify(dict(report, success=True, message=ont_bulk.summarize(report)))
+
 @app.route('/api/history', methods=['GET'])
 def get_history():
     """API untuk mengambil semua data riwayat dari history.json."""
     try:
-        with open(HISTORY_FILE, 'r') as f:
+        with request_log.phase('store'), open(HISTORY_FILE, 'r') as f:
             history = json.load(f)
         return jsonify(history)
     except (FileNotFoundError, json.JSONDecodeError):
         return jsonify([])
 
-@app.route('/api/record-history', methods=['POST'])
-def record_history():
-    data = request.get_json()
-    user_count = data.get('users')
+MAX_HISTORY = 100
+MAX_INGEST_BYTES = 32 * 1024 * 1024
 
-    if user_count is None:
-        return jsonify({"success": False, "message": "User count not provided"}), 400
+@request_log.timed_phase('store')
+def _append_samples(file_path, entries, max_entries):
+    """Menambah entri ke file log JSON, melewati idempotency key yang sudah ada.
+
+    Key disimpan di entri itu sendiri, jadi deduplikasi tetap berlaku setelah
+    restart. Entri diurutkan menurut timestamp sampel agar kiriman ulang yang
+    terlambat masuk ke posisi yang benar. Mengembalikan (diterima, duplikat).
+    """
+    with store_lock.shared_lock(file_path):
+        try:
+            with open(file_path, 'r') as f:
+                existing = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            existing = []
+        seen = {e.get('key') for e in existing if e.get('key')}
+        accepted = duplicates = 0
+        for entry in entries:
+            key = entry.get('key')
+            if key and key in seen:
+                duplicates += 1
+                continue
+            if key:
+                seen.add(key)
+            existing.append(entry)
+            accepted += 1
+        if accepted:
+            existing.sort(key=lambda e: e.get('timestamp') or '')
+            if len(existing) > max_entries:
+                existing = existing[-max_entries:]
+            # Ditulis atomik: worker lain yang sedang membaca tidak pernah melihat file setengah jadi
+            _atomic_write_json(file_path, existing, backup=False)
+    return accepted, duplicates
 
-    new_record = {
+def _history_entry(data, key=None, timestamp=None):
+    user_count = data.get('users') if isinstance(data, dict) else None
+    if user_count is None:
+        raise ValueError("User count not provided")
+    entry = {
         # PERUBAHAN: Simpan timestamp lengkap, bukan hanya waktu
-        "timestamp": datetime.now().isoformat(), 
+        "timestamp": timestamp or data.get('timestamp') or datetime.now().isoformat(),
         "users": user_count
     }
-    
+    # Rincian per router dari kolektor multi-router: {"gw-1": 120, ...}
+    if isinstance(data.get('routers'), dict):
+        entry['routers'] = data['routers']
+    if data.get('failed_routers'):
+        entry['failed_routers'] = data['failed_routers']
+    if key:
+        entry['key'] = key
+    return entry
+
+def _user_log_entry(data, key=None, timestamp=None):
+    # Body boleh list user (format lama) atau {"timestamp": ..., "router": ..., "users": [...]}
+    router = None
+    if isinstance(data, dict):
+        timestamp = timestamp or data.get('timestamp')
+        router = data.get('router')
+        data = data.get('users')
+    if not isinstance(data, list):
+        raise ValueError("Invalid data format")
+    entry = {"timestamp": timestamp or datetime.now().isoformat(), "users": data}
+    if router:
+        entry['router'] = str(router)
+    if key:
+        entry['key'] = key
+    return entry
+
+@app.route('/api/record-history', methods=['POST'])
+def record_history():
+    """Mencatat jumlah user; header Idempotency-Key membuat kiriman ulang diabaikan."""
     try:
-        with open(HISTORY_FILE, 'r') as f:
-            history = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        history = []
-    
-    history.append(new_record)
+        new_record = _history_entry(request.get_json(silent=True), request.headers.get('Idempotency-Key'))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    accepted, _ = _append_samples(HISTORY_FILE, [new_record], MAX_HISTORY)
+    return jsonify({"success": True, "recorded": new_record, "duplicate": not accepted})
 
-    MAX_HISTORY = 100
-    if len(history) > MAX_HISTORY:
-        history = history[-MAX_HISTORY:]
+@app.route('/api/ingest', methods=['POST'])
+def api_ingest():
+    """Batch sampel dari uploader ping_check (body JSON, boleh gzip).
 
-    with open(HISTORY_FILE, 'w') as f:
-        json.dump(history, f, indent=2)
+    Body: {"items": [{"key", "kind": "history"|"active_users", "timestamp", "payload"}]}.
+    Setiap file hanya ditulis sekali per batch; key yang sudah pernah diterima dilewati.
+    """
+    raw = request.get_data(cache=False)
+    if request.headers.get('Content-Encoding', '').lower() == 'gzip':
+        try:
+            with gzip.GzipFile(fileobj=io.BytesIO(raw)) as gz:
+                raw = gz.read(MAX_INGEST_BYTES + 1)
+        except (OSError, EOFError) as e:
+            return jsonify({"success": False, "message": f"Body gzip tidak valid: {e}"}), 400
+    if len(raw) > MAX_INGEST_BYTES:
+        return jsonify({"success": False, "message": "Batch terlalu besar"}), 413
+    try:
+        items = json.loads(raw).get('items')
+    except (ValueError, AttributeError):
+        items = None
+    if not isinstance(items, list):
+        return jsonify({"success": False, "message": "Body harus berupa {\"items\": [...]}"}), 400
 
-    return jsonify({"success": True, "recorded": new_record})
+    builders = {'history': _history_entry, 'active_users': _user_log_entry}
+    grouped = {'history': [], 'active_users': []}
+    rejected = []
+    for item in items:
+        try:
+            kind = item.get('kind')
+            if kind not in builders:
+                raise ValueError(f"kind tidak dikenal: {kind!r}")
+            grouped[kind].append(builders[kind](item.get('payload'), item.get('key'), item.get('timestamp')))
+        except (ValueError, AttributeError) as e:
+            rejected.append({"key": item.get('key') if isinstance(item, dict) else None, "message": str(e)})
+    accepted = duplicates = 0
+    if grouped['history']:
+        accepted, duplicates = _append_samples(HISTORY_FILE, grouped['history'], MAX_HISTORY)
+    if grouped['active_users']:
+        a, d = _hotspot_sessions.apply_snapshots(grouped['active_users'])
+        accepted += a
+        duplicates += d
+    return jsonify({"success": True, "accepted": accepted, "duplicates": duplicates, "rejected": rejected})
 
 # --- FUNGSI-FUNGSI OUTAGES DI BAWAH INI JUGA TETAP SAMA ---
 @app.route('/api/outages', methods=['GET'])
@@ -392,99 +819,86 @@ def clear_all_outages():
     
 @app.route('/api/hotspot/active-users')
 def get_active_users():
-    """Menghubungkan ke MikroTik dan mengambil daftar user aktif saat ini."""
+    """Mengambil daftar user aktif saat ini dari semua router (di-poll paralel)."""
+    results = _router_collector.collect()
+    if all(users is None for users in results.values()):
+        return jsonify({"error": "Tidak ada router yang bisa dihubungi"}), 500
+    # Memilih hanya data yang kita perlukan (ip, mac address dan router)
+    cleaned_users = [{'ip': u['ip'], 'mac': u['mac'], 'router': u['router']}
+                     for users in results.values() if users for u in users]
+    return jsonify(cleaned_users)
+
+@app.route('/api/routers')
+def api_routers():
+    """Registry router hotspot (tanpa password) beserta user aktif dan snapshot terakhir per router."""
+    status = _hotspot_sessions.status()['routers']
+    configured = []
+    for router in _router_collector.routers:
+        entry = router.public()
+        entry.update(status.get(router.id, {'active': 0, 'last_poll': None}))
+        configured.append(entry)
+    return jsonify(configured)
+
+@app.route('/api/hotspot/online')
+def api_hotspot_online():
+    """User hotspot yang online pada waktu tertentu: ?at=ISO (default sekarang)."""
+    at = request.args.get('at', '').strip()
+    when = hotspot_sessions.parse_timestamp(at) if at else datetime.now()
+    if when is None:
+        return jsonify({"success": False, "message": f"Format waktu tidak valid: {at}"}), 400
+    users = _hotspot_sessions.online_at(when)
+    return jsonify({"at": when.isoformat(timespec='seconds'), "count": len(users), "users": users})
+
+@app.route('/api/hotspot/sessions')
+def api_hotspot_sessions():
+    """Sesi hotspot terbaru (aktif dan selesai); ?mac= untuk satu perangkat, ?limit= (maks 1000)."""
     try:
-        connection = routeros_api.RouterOsApiPool(
-            MIKROTIK_IP,
-            username=MIKROTIK_USER,
-            password=MIKROTIK_PASS,
-            port=MIKROTIK_PORT,
-            plaintext_login=True
-        )
-        api = connection.get_api()
-        
-        # Mengambil seluruh daftar user aktif
-        active_users_list = api.get_resource('/ip/hotspot/active').get()
-        connection.disconnect()
-        
-        # Memilih hanya data yang kita perlukan (ip dan mac address)
-        cleaned_users = []
-        for user in active_users_list:
-            cleaned_users.append({
-                'ip': user.get('address', '-'),
-                'mac': user.get('mac-address', '-')
-            })
-            
-        return jsonify(cleaned_users)
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+    except ValueError:
+        return jsonify({"success": False, "message": "limit harus berupa angka"}), 400
+    return jsonify(_hotspot_sessions.sessions(mac=request.args.get('mac') or None, limit=limit))
 
-    except Exception as e:
-        # Jika gagal, kirim pesan error
-        return jsonify({"error": str(e)}), 500
-    
 @app.route('/api/log-active-users', methods=['POST'])
 def log_active_users():
-    """Menerima data DETAIL user dari skrip monitoring dan menyimpannya ke user_log.json."""
-    users_detail = request.get_json()
-    
-    if not isinstance(users_detail, list):
-        return jsonify({"success": False, "message": "Invalid data format"}), 400
-
-    new_log_entry = {
-        "timestamp": datetime.now().isoformat(),
-        "users": users_detail
-    }
+    """Menerima data DETAIL user dari skrip monitoring; hanya selisihnya (join/leave) yang disimpan."""
     try:
-        with open(USER_LOG_FILE, 'r') as f:
-            log_data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        log_data = []
-    
-    log_data.append(new_log_entry)
-
-    # Batasi agar file log tidak terlalu besar (misal, simpan 2000 data terakhir)WWWWWWW
-    MAX_LOG_ENTRIES = 2000
-    if len(log_data) > MAX_LOG_ENTRIES:
-        log_data = log_data[-MAX_LOG_ENTRIES:]
-
-    with open(USER_LOG_FILE, 'w') as f:
-        json.dump(log_data, f, indent=2)
-
-    return jsonify({"success": True, "message": f"Logged {len(users_detail)} users."})
+        new_log_entry = _user_log_entry(request.get_json(silent=True), request.headers.get('Idempotency-Key'))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    accepted, _ = _hotspot_sessions.apply_snapshots([new_log_entry])
+    return jsonify({"success": True, "message": f"Logged {len(new_log_entry['users'])} users.", "duplicate": not accepted})
 
 
 @app.route('/api/analytics-data')
 def get_analytics_data():
-    """Membaca user_log.json, memprosesnya, dan mengirimkan data untuk halaman analitik.
+    """Mengolah jumlah user per snapshot dan sesi hotspot untuk halaman analitik.
 
     Query param opsional:
       - month: 'MM' (01-12) atau 'YYYY-MM' untuk mem-filter data harian pada bulan tertentu.
     """
     month_filter = request.args.get('month', '').strip()
-    try:
-        with open(USER_LOG_FILE, 'r') as f:
-            log_data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return jsonify({"error": "Belum ada data analitik."}), 404
-    if not log_data:
+    with request_log.phase('store'):
+        poll_counts = _hotspot_sessions.poll_counts()
+        status = _hotspot_sessions.status()
+    if not poll_counts:
         return jsonify({"error": "Belum ada data analitik."}), 404
     # --- PERUBAHAN UTAMA: MENGELOMPOKKAN DATA PER HARI DAN PER BULAN, SERTA MENAMBAHKAN DATA REALTIME ---
     daily_data = {}
     monthly_data = {}
     user_counts = []
-    all_macs = set()
-
-    for entry in log_data:
-        # Parse timestamp (expects ISO format)
-        try:
-            dt = datetime.fromisoformat(entry['timestamp'])
-        except Exception:
-            # If parsing fails, skip this entry
-            continue
 
-        day = dt.strftime('%Y-%m-%d')
-        month = dt.strftime('%Y-%m')
+    # Snapshot semua router dalam satu siklus kolektor memakai timestamp yang sama:
+    # jumlahnya digabung menjadi total per waktu, rinciannya disimpan per router
+    totals = {}
+    router_counts = {}
+    for timestamp, count, router in poll_counts:
+        totals[timestamp] = totals.get(timestamp, 0) + count
+        router_counts.setdefault(router, []).append(count)
 
-        count = len(entry.get('users', []))
+    for timestamp, count in sorted(totals.items()):
+        # Timestamp ISO: 10 karakter pertama = hari, 7 = bulan
+        day = timestamp[:10]
+        month = timestamp[:7]
         user_counts.append(count)
 
         # accumulate daily
@@ -492,12 +906,6 @@ def get_analytics_data():
         # accumulate monthly
         monthly_data.setdefault(month, []).append(count)
 
-        # collect mac addresses
-        for user in entry.get('users', []):
-            mac = user.get('mac')
-            if mac:
-                all_macs.add(mac)
-
     # Build summaries (tanpa filter terlebih dahulu)
     daily_summary_all = []
     for day, counts in daily_data.items():
@@ -575,35 +983,112 @@ def get_analytics_data():
             # Jika parsing gagal, tetap gunakan hasil filter apa adanya
             no_data_for_month = len(daily_summary) == 0
 
-    # Realtime: use last log entry as current snapshot (if exists)
-    realtime = {}
-    try:
-        last = log_data[-1]
-        realtime_users = last.get('users', []) if isinstance(last, dict) else []
-        realtime = {
-            'timestamp': last.get('timestamp'),
-            'count': len(realtime_users),
-            'unique_macs': len({u.get('mac') for u in realtime_users if u.get('mac')})
+    # Realtime: set user aktif dari snapshot terakhir
+    realtime = {
+        'timestamp': status['last_poll'],
+        'count': status['active'],
+        'unique_macs': status['active_macs']
+    }
+
+    routers_summary = {}
+    for router, counts in sorted(router_counts.items()):
+        router_status = status['routers'].get(router, {})
+        routers_summary[router] = {
+            "peak": max(counts),
+            "trough": min(counts),
+            "average": round(sum(counts) / len(counts), 2),
+            "active": router_status.get('active', 0),
+            "last_poll": router_status.get('last_poll')
         }
-    except Exception:
-        realtime = {'timestamp': None, 'count': 0, 'unique_macs': 0}
+
+    # Satu entri per sesi terbaru (format lama raw_logs: {timestamp, users: [...]})
+    raw_logs = []
+    for session in _hotspot_sessions.sessions(limit=100):
+        raw_logs.append({
+            'timestamp': session['end'] or session['last_seen'],
+            'start': session['start'],
+            'active': bool(session.get('active')),
+            'users': [{'ip': session['ip'], 'mac': session['mac'], 'uptime': hotspot_sessions.format_duration(session['duration_s']),
+                       'bytes_in': session['bytes_in'], 'bytes_out': session['bytes_out'], 'router': session['router']}]
+        })
 
     analytics_payload = {
         "summary": {
             "peak_users": max(user_counts) if user_counts else 0,
             "trough_users": min(user_counts) if user_counts else 0,
             "average_users": round(sum(user_counts) / len(user_counts), 2) if user_counts else 0,
-            "unique_devices": len(all_macs)
+            "unique_devices": status['unique_devices']
         },
         "daily_summary": daily_summary,
         "monthly_summary": monthly_summary,
         "realtime": realtime,
-        "raw_logs": log_data[-100:],
+        "routers": routers_summary,
+        "raw_logs": raw_logs,
         "month_filter": normalized_filter,
         "no_data_for_month": no_data_for_month
     }
 
     return jsonify(analytics_payload)
 
+@app.route('/api/analytics/bandwidth')
+def api_analytics_bandwidth():
+    """Throughput hotspot yang sudah dihitung saat ingest.
+
+    Query param: from/to (default 24 jam terakhir), top (jumlah talker per
+    jendela, default 10), mac (riwayat per jendela untuk satu perangkat).
+    """
+    try:
+        start = notification_archive.parse_bound(request.args.get('from'))
+        end = notification_archive.parse_bound(request.args.get('to'), end=True)
+        top = min(max(int(request.args.get('top', hotspot_bandwidth.TOP_N)), 1), hotspot_bandwidth.TOP_N)
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    if start is None and end is None:
+        start = datetime.now() - timedelta(days=1)
+    with request_log.phase('store'):
+        _hotspot_sessions.status()  # impor user_log.json lama jika belum pernah
+        payload = {
+            "from": start.isoformat(timespec='seconds') if start else None,
+            "to": end.isoformat(timespec='seconds') if end else None,
+            "series": _hotspot_bandwidth.series(start, end),
+            "windows": _hotspot_bandwidth.windows(start, end, limit=top),
+            "current": _hotspot_bandwidth.current(),
+        }
+        mac = (request.args.get('mac') or '').strip()
+        if mac:
+            payload["mac"] = {"mac": mac.upper(), "history": _hotspot_bandwidth.mac_history(mac, start, end)}
+    payload["current"]["top"] = payload["current"]["top"][:top]
+    return jsonify(payload)
+
+_jobs = scheduler.Scheduler('web')
+
+def start_background_jobs(stats_file=None):
+    """Mendaftarkan dan menjalankan job periodik proses web (sekali per proses).
+
+    Dengan beberapa worker (serve.py) hanya satu worker yang menjalankan job;
+    `stats_file` membuat statistiknya terbaca dari /api/jobs di worker lain.
+    """
+    if _jobs.snapshot()['jobs']:
+        return _jobs
+    _jobs.stats_file = stats_file
+    _jobs.add_job('inventory-compact', inventory.compact_pending, 600, jitter=30, initial_delay=60)
+    _jobs.add_job('notification-archive', compact_notifications, 3600, jitter=60, initial_delay=90)
+    _jobs.add_job('backup-cleanup', _cleanup_old_backups, 3600, jitter=60, initial_delay=120,
+                  args=('notifications-*.json', 10))
+    return _jobs.start()
+
+@app.route('/api/jobs')
+def api_jobs():
+    """Statistik job terjadwal: scheduler proses ini dan scheduler proses lain (mis. pinger)."""
+    own = _jobs.snapshot()
+    schedulers = [s for s in scheduler.load_stats(scheduler.STATS_DIR) if s.get('pid') != own['pid']]
+    # Dengan serve.py job web berjalan di satu worker; worker lain memakai salinan file-nya
+    if own['jobs'] or not any(s.get('scheduler') == own['scheduler'] for s in schedulers):
+        schedulers.insert(0, own)
+    return jsonify({'schedulers': schedulers})
+
 if __name__ == '__main__':
+    # Dengan debug reloader, job hanya dijalankan di proses anak yang melayani request
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_jobs()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Benchmark endpoint web dan siklus ping dengan armada sintetis.
+
+Untuk setiap skala (default 1k/10k/100k ONT) dibuat dataset sintetis
+(onts.json, notifications.json, outages.json, history.json, user_log.json) di
+folder sementara. Setiap kasus lalu dijalankan di proses anak tersendiri agar
+peak RSS dan byte yang ditulis tidak tercampur antar kasus:
+  - endpoint lewat Flask test client (tanpa jaringan)
+  - satu siklus penuh `ping_check.update_ont_statuses` dengan probe simulasi
+
+Hasil (persentil latensi, peak RSS, byte yang ditulis) disimpan sebagai JSON
+dan bisa dibandingkan dengan baseline; regresi membuat exit code 1.
+
+Penggunaan:
+    python benchmark.py run --scales 1000,10000 --baseline reports/benchmarks/baseline.json
+    python benchmark.py compare reports/benchmarks/bench-20250101-120000.json baseline.json
+    python benchmark.py generate --scale 10000 --dir /tmp/fleet
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join('reports', 'benchmarks')
+DEFAULT_SCALES = (1000, 10000, 100000)
+# Jumlah iterasi per skala (endpoint, siklus ping); iterasi pemanasan tidak dihitung
+DEFAULT_ITERATIONS = {1000: (30, 3), 10000: (10, 2), 100000: (3, 1)}
+
+ENDPOINT_CASES = {
+    'GET /api/onts': '/api/onts',
+    'GET /api/notifications': '/api/notifications',
+    'GET /api/outages/summary': '/api/outages/summary',
+    'GET /api/analytics-data': '/api/analytics-data',
+    'GET /admin': '/admin',
+    'GET /api/admin/onts': '/api/admin/onts',
+}
+CYCLE_CASE = 'ping_cycle'
+
+# Metrik yang dibandingkan dengan baseline dan batas noise absolutnya
+COMPARE_METRICS = {
+    'p50_ms': 2.0,
+    'p95_ms': 2.0,
+    'peak_rss_kb': 10 * 1024,
+    'bytes_written': 64 * 1024,
+}
+DEFAULT_TOLERANCE = 0.2
+
+USER_LOG_ENTRIES = 500
+HISTORY_ENTRIES = 100
+STATUSES = ('ON',) * 18 + ('OFF(RTO)', 'OFF')
+
+
+# --- dataset sintetis -------------------------------------------------------
+
+def dataset_shape(scale):
+    """Ukuran setiap file untuk satu skala ONT."""
+    return {
+        'onts': scale,
+        'notifications': scale,
+        'outages': scale // 2,
+        'history': HISTORY_ENTRIES,
+        'user_log_entries': USER_LOG_ENTRIES,
+        'users_per_entry': max(10, scale // 100),
+    }
+
+
+def _synthetic_ip(i):
+    return f"10.{200 + (i >> 16)}.{(i >> 8) & 255}.{i & 255}"
+
+
+def generate_dataset(directory, scale, seed=1):
+    """Menulis dataset sintetis ke `directory`; mengembalikan bentuk dan ukuran file-nya."""
+    rng = random.Random(seed)
+    shape = dataset_shape(scale)
+    now = datetime.now().replace(microsecond=0)
+    os.makedirs(directory, exist_ok=True)
+
+    onts = []
+    for i in range(1, scale + 1):
+        status = rng.choice(STATUSES)
+        onts.append({
+            'id': i,
+            'id_pelanggan': f"JP{i:06d}",
+            'ip': _synthetic_ip(i),
+            'name': f"ONT Sintetis {i}",
+            'lokasi': f"Lokasi {i % 500}",
+            'latitude': round(-7.79 + rng.uniform(-0.1, 0.1), 6),
+            'longitude': round(110.39 + rng.uniform(-0.1, 0.1), 6),
+            'status': status,
+            'rto_count': 0 if status == 'ON' else rng.randint(2, 10),
+            'Icon': 119,  # kategori APBD, satu-satunya yang ditampilkan peta dan statistik
+            'last_on': (now - timedelta(minutes=rng.randint(0, 10000))).isoformat(),
+        })
+
+    notifications = []
+    for i in range(1, shape['notifications'] + 1):
+        ont = onts[rng.randrange(scale)]
+        kind = rng.choice(('info', 'success', 'warning', 'error'))
+        notifications.append({
+            'id': i,
+            'message': f"{ont['name']} ({ont['lokasi']})Status: {'ON' if kind == 'success' else 'OFF'}",
+            'type': kind,
+            'timestamp': (now - timedelta(seconds=(shape['notifications'] - i) * 60)).isoformat(),
+            'ont_id': ont['id'],
+            'ont_name': ont['name'],
+            'read': rng.random() < 0.7,
+        })
+
+    outages = []
+    for _ in range(shape['outages']):
+        ont = onts[rng.randrange(scale)]
+        start = now - timedelta(minutes=rng.randint(10, 60 * 24 * 30))
+        ongoing = rng.random() < 0.1
+        outages.append({
+            'ont_id': ont['id'], 'ont_name': ont['name'],
+            'start_time': start.isoformat(),
+            'end_time': None if ongoing else (start + timedelta(minutes=rng.randint(1, 600))).isoformat(),
+        })
+
+    history = [{'timestamp': (now - timedelta(minutes=5 * (HISTORY_ENTRIES - i))).isoformat(),
+                'users': rng.randint(200, 400)} for i in range(HISTORY_ENTRIES)]
+
+    macs = [f"02:00:{(i >> 16) & 255:02X}:{(i >> 8) & 255:02X}:{i & 255:02X}:01"
+            for i in range(shape['users_per_entry'] * 2)]
+    user_log = []
+    for i in range(USER_LOG_ENTRIES):
+        users = [{'ip': f"172.16.{j >> 8 & 255}.{j & 255}", 'mac': mac, 'uptime': f"{rng.randint(1, 600)}m",
+                  'bytes_in': rng.randint(0, 10 ** 9), 'bytes_out': rng.randint(0, 10 ** 8)}
+                 for j, mac in enumerate(rng.sample(macs, shape['users_per_entry']))]
+        user_log.append({'timestamp': (now - timedelta(minutes=5 * (USER_LOG_ENTRIES - i))).isoformat(),
+                         'users': users})
+
+    files = {'onts.json': onts, 'notifications.json': notifications, 'outages.json': outages,
+             'history.json': history, 'user_log.json': user_log}
+    sizes = {}
+    for name, data in files.items():
+        path = os.path.join(directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        sizes[name] = os.path.getsize(path)
+    return dict(shape, file_bytes=sizes)
+
+
+# --- pengukuran (proses anak) -----------------------------------------------
+
+class SimulatedProbe:
+    """Backend probe (`ping_check.set_probe_backend`) tanpa jaringan: hasil deterministik per IP.
+
+    Sebagian kecil IP (`flap_ratio`) berganti status setiap siklus agar
+    transisi status dan penulisan journal ikut teruji.
+    """
+
+    def __init__(self, online_ratio=0.9, flap_ratio=0.02, seed=1):
+        self.online_ratio = online_ratio
+        self.flap_ratio = flap_ratio
+        self.seed = seed
+        self.cycle = 0
+        self.calls = 0
+
+    def __call__(self, ip):
+        self.calls += 1
+        bucket = zlib.crc32(f"{self.seed}:{ip}".encode()) % 10000 / 10000
+        if bucket < self.flap_ratio:
+            return self.cycle % 2 == 0
+        return bucket < self.online_ratio
+
+    def next_cycle(self):
+        self.cycle += 1
+
+
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak  # macOS: byte, Linux: KB
+
+
+def _bytes_written():
+    """Total byte yang ditulis proses ini (Linux /proc); None jika tidak tersedia."""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            for line in f:
+                if line.startswith('wchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _percentile(sorted_values, pct):
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def _summarize(durations, written_before, extra):
+    times = sorted(d * 1000 for d in durations)
+    written_after = _bytes_written()
+    result = {
+        'iterations': len(times),
+        'mean_ms': round(sum(times) / len(times), 3),
+        'p50_ms': round(_percentile(times, 50), 3),
+        'p95_ms': round(_percentile(times, 95), 3),
+        'p99_ms': round(_percentile(times, 99), 3),
+        'max_ms': round(times[-1], 3),
+        'peak_rss_kb': _peak_rss_kb(),
+        'bytes_written': None if written_before is None or written_after is None
+        else (written_after - written_before) // len(times),
+    }
+    result.update(extra)
+    return result
+
+
+def measure_case(workdir, case, iterations, online_ratio=0.9, seed=1):
+    """Dijalankan di proses anak dengan cwd = folder dataset."""
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_DIR)
+    # Request log dan job background tidak ikut diukur
+    os.environ['REQUEST_LOG_FILE'] = ''
+    quiet = io.StringIO()
+
+    if case == CYCLE_CASE:
+        with redirect_stdout(quiet):
+            import ping_check
+        probe = SimulatedProbe(online_ratio=online_ratio, seed=seed)
+        ping_check.set_probe_backend(probe)
+        durations = []
+        with redirect_stdout(quiet):
+            ping_check.update_ont_statuses()  # pemanasan
+            written = _bytes_written()
+            for _ in range(iterations):
+                probe.next_cycle()
+                started = time.perf_counter()
+                ping_check.update_ont_statuses()
+                durations.append(time.perf_counter() - started)
+        if 'Error saat memperbarui status ONT' in quiet.getvalue():
+            raise RuntimeError(quiet.getvalue().strip().splitlines()[-1])
+        return _summarize(durations, written, {'probes_per_cycle': probe.calls // (iterations + 1)})
+
+    path = ENDPOINT_CASES[case]
+    with redirect_stdout(quiet):
+        import app
+        client = app.app.test_client()
+        client.get(path)  # pemanasan: muat inventaris dan template
+        written = _bytes_written()
+        durations, errors, size = [], 0, 0
+        for _ in range(iterations):
+            started = time.perf_counter()
+            response = client.get(path)
+            size = len(response.get_data())
+            durations.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+    return _summarize(durations, written, {'response_bytes': size, 'errors': errors})
+
+
+def _run_case_subprocess(workdir, case, iterations, online_ratio, seed):
+    fd, out = tempfile.mkstemp(prefix='bench-case-', suffix='.json')
+    os.close(fd)
+    try:
+        command = [sys.executable, os.path.abspath(__file__), '_case', '--dir', workdir, '--case', case,
+                   '--iterations', str(iterations), '--online-ratio', str(online_ratio),
+                   '--seed', str(seed), '--out', out]
+        proc = subprocess.run(command, capture_output=True, text=True)
+        if proc.returncode != 0:
+            lines = (proc.stderr or proc.stdout).strip().splitlines()
+            return {'error': lines[-1] if lines else f"exit code {proc.returncode}"}
+        with open(out, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.remove(out)
+
+
+# --- orkestrasi dan perbandingan --------------------------------------------
+
+def _git_commit():
+    try:
+        proc = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return proc.stdout.strip() or None
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, cases=None, iterations=None, cycle_iterations=None,
+                   online_ratio=0.9, seed=1, keep_data=False):
+    cases = list(cases or list(ENDPOINT_CASES) + [CYCLE_CASE])
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': seed,
+        'scales': {},
+    }
+    for scale in scales:
+        default_iter, default_cycle = DEFAULT_ITERATIONS.get(scale, (5, 1))
+        workdir = tempfile.mkdtemp(prefix=f'bench-{scale}-')
+        try:
+            print(f"=== Skala {scale} ONT: membuat dataset di {workdir} ===")
+            dataset = generate_dataset(workdir, scale, seed)
+            scale_result = {'dataset': dataset, 'cases': {}}
+            # Siklus ping mengubah onts.json, jadi dijalankan paling akhir
+            for case in sorted(cases, key=lambda c: c == CYCLE_CASE):
+                count = (cycle_iterations or default_cycle) if case == CYCLE_CASE else (iterations or default_iter)
+                result = _run_case_subprocess(workdir, case, count, online_ratio, seed)
+                scale_result['cases'][case] = result
+                if 'error' in result:
+                    print(f"   {case:<28} GAGAL: {result['error']}")
+                else:
+                    print(f"   {case:<28} p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+                          f"RSS {result['peak_rss_kb'] or 0:>8} KB  tulis {result['bytes_written'] or 0} B")
+            results['scales'][str(scale)] = scale_result
+        finally:
+            if keep_data:
+                print(f"   Dataset disimpan di {workdir}")
+            else:
+                shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare_results(current, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Membandingkan dua hasil run; regresi = naik > `tolerance` dan melewati batas noise."""
+    rows, regressions = [], []
+    for scale, scale_result in current.get('scales', {}).items():
+        base_cases = baseline.get('scales', {}).get(scale, {}).get('cases', {})
+        for case, result in scale_result.get('cases', {}).items():
+            base = base_cases.get(case)
+            if not base or 'error' in base or 'error' in result:
+                continue
+            for metric, noise_floor in COMPARE_METRICS.items():
+                now_value, base_value = result.get(metric), base.get(metric)
+                if now_value is None or base_value is None:
+                    continue
+                delta = now_value - base_value
+                ratio = delta / base_value if base_value else 0.0
+                row = {'scale': int(scale), 'case': case, 'metric': metric, 'baseline': base_value,
+                       'current': now_value, 'change_pct': round(ratio * 100, 1),
+                       'regression': delta > noise_floor and ratio > tolerance}
+                rows.append(row)
+                if row['regression']:
+                    regressions.append(row)
+    return {'tolerance': tolerance, 'rows': rows, 'regressions': regressions}
+
+
+def print_comparison(comparison):
+    for row in comparison['rows']:
+        flag = 'REGRESI' if row['regression'] else ''
+        print(f"{row['scale']:>7} {row['case']:<28} {row['metric']:<14} {row['baseline']:>12} -> "
+              f"{row['current']:>12} ({row['change_pct']:+.1f}%) {flag}")
+    count = len(comparison['regressions'])
+    print(f"\n{count} regresi (toleransi {comparison['tolerance'] * 100:.0f}%)." if count
+          else "\nTidak ada regresi.")
+
+
+def _load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark endpoint dan siklus ping dengan armada sintetis.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Menjalankan benchmark dan menyimpan hasilnya")
+    run.add_argument('--scales', default=','.join(str(s) for s in DEFAULT_SCALES),
+                     help="Daftar jumlah ONT, dipisah koma")
+    run.add_argument('--cases', help=f"Subset kasus, dipisah koma (tersedia: {', '.join(ENDPOINT_CASES)}, "
+                                     f"{CYCLE_CASE})")
+    run.add_argument('--iterations', type=int, help="Iterasi per endpoint (default bergantung skala)")
+    run.add_argument('--cycle-iterations', type=int, help="Iterasi siklus ping")
+    run.add_argument('--online-ratio', type=float, default=0.9, help="Rasio ONT yang membalas probe simulasi")
+    run.add_argument('--seed', type=int, default=1)
+    run.add_argument('--output', help="File hasil (default reports/benchmarks/bench-<waktu>.json)")
+    run.add_argument('--baseline', help="Bandingkan dengan hasil ini setelah selesai")
+    run.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    run.add_argument('--keep-data', action='store_true', help="Jangan hapus folder dataset sintetis")
+
+    cmp = commands.add_parser('compare', help="Membandingkan hasil dengan baseline")
+    cmp.add_argument('current')
+    cmp.add_argument('baseline')
+    cmp.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+
+    gen = commands.add_parser('generate', help="Hanya membuat dataset sintetis")
+    gen.add_argument('--scale', type=int, required=True)
+    gen.add_argument('--dir', required=True)
+    gen.add_argument('--seed', type=int, default=1)
+
+    case = commands.add_parser('_case', help=argparse.SUPPRESS)
+    case.add_argument('--dir', required=True)
+    case.add_argument('--case', required=True)
+    case.add_argument('--iterations', type=int, required=True)
+    case.add_argument('--online-ratio', type=float, default=0.9)
+    case.add_argument('--seed', type=int, default=1)
+    case.add_argument('--out', required=True)
+
+    args = parser.parse_args(argv)
+
+    if args.command == '_case':
+        result = measure_case(args.dir, args.case, args.iterations, args.online_ratio, args.seed)
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        return 0
+
+    if args.command == 'generate':
+        shape = generate_dataset(args.dir, args.scale, args.seed)
+        print(json.dumps(shape, indent=2))
+        return 0
+
+    if args.command == 'compare':
+        comparison = compare_results(_load_json(args.current), _load_json(args.baseline), args.tolerance)
+        print_comparison(comparison)
+        return 1 if comparison['regressions'] else 0
+
+    scales = [int(s) for s in args.scales.split(',') if s.strip()]
+    cases = [c.strip() for c in args.cases.split(',')] if args.cases else None
+    unknown = [c for c in cases or [] if c not in ENDPOINT_CASES and c != CYCLE_CASE]
+    if unknown:
+        parser.error(f"Kasus tidak dikenal: {', '.join(unknown)}")
+    results = run_benchmarks(scales, cases, args.iterations, args.cycle_iterations,
+                             args.online_ratio, args.seed, args.keep_data)
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nHasil disimpan ke {output}")
+    if args.baseline:
+        comparison = compare_results(results, _load_json(args.baseline), args.tolerance)
+        print_comparison(comparison)
+        return 1 if comparison['regressions'] else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
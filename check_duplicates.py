@@ -3,20 +3,16 @@
 Script untuk memeriksa data duplikat di file onts.json
 """
 
-import json
 from collections import defaultdict
 
+from inventory import InventoryRepository
+
 def load_onts_data():
-    """Memuat data dari onts.json"""
-    try:
-        with open('onts.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print("File onts.json tidak ditemukan")
-        return []
-    except json.JSONDecodeError as e:
-        print(f"Error parsing JSON: {e}")
-        return []
+    """Memuat data dari onts.json beserta perubahan admin yang masih di journal"""
+    onts = InventoryRepository('onts.json').all()
+    if not onts:
+        print("File onts.json tidak ditemukan atau kosong")
+    return onts
 
 def check_duplicates(data):
     """Memeriksa data duplikat berdasarkan berbagai kriteria"""
@@ -7,6 +7,8 @@ Menggantikan data sebelumnya dengan data dari CSV
 import json
 from datetime import datetime
 
+from inventory import InventoryRepository
+
 def load_csv_data():
     """Memuat data dari csvjson.json"""
     try:
@@ -166,6 +168,9 @@ def main():
     
     # 1. Backup data existing
     print("1. Membuat backup data existing...")
+    # Perubahan admin yang masih di journal dilipat ke onts.json dulu: ikut ter-backup
+    # dan tidak diputar ulang di atas data baru
+    InventoryRepository('onts.json').compact_pending()
     existing_count = backup_existing_data()
     
     # 2. Load data CSV
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Discovery ONT: menyapu rentang CIDR manajemen lalu membandingkan IP yang
+membalas dengan inventaris.
+
+Hasil:
+  - alive_unregistered: IP membalas tetapi tidak ada di onts.json
+  - registered_never_seen: ONT terdaftar di rentang yang disapu tetapi tidak membalas
+
+Penggunaan:
+    python discovery.py --range 10.239.0.0/16 --pps 2000
+"""
+
+import argparse
+import ipaddress
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import probe_engine
+import store_lock
+
+DEFAULT_RANGES = ['10.239.0.0/16']
+REPORT_FILE = 'discovery_report.json'
+MAX_ADDRESSES = 1 << 20
+MAX_TIMEOUT = 10.0
+# Batas sweep yang diminta lewat API web (CLI tidak dibatasi): rentang harus berada
+# di dalam allow-list dan pps tidak melebihi MAX_PPS
+ALLOWED_RANGES = [r.strip() for r in os.environ.get('DISCOVERY_ALLOWED_RANGES', ','.join(DEFAULT_RANGES)).split(',')
+                  if r.strip()]
+MAX_PPS = int(os.environ.get('DISCOVERY_MAX_PPS', probe_engine.DEFAULT_PPS))
+
+
+def expand_ranges(ranges):
+    """Daftar IP host unik dari beberapa CIDR (tanpa network/broadcast)."""
+    networks = [ipaddress.ip_network(r.strip(), strict=False) for r in ranges if str(r).strip()]
+    if not networks:
+        raise ValueError("Rentang CIDR kosong")
+    total = sum(n.num_addresses for n in networks)
+    if total > MAX_ADDRESSES:
+        raise ValueError(f"Rentang terlalu besar: {total} alamat (maks {MAX_ADDRESSES})")
+    seen, ips = set(), []
+    for network in networks:
+        if network.version != 4:
+            raise ValueError(f"Hanya IPv4 yang didukung: {network}")
+        for ip in (network.hosts() if network.num_addresses > 2 else network):
+            text = str(ip)
+            if text not in seen:
+                seen.add(text)
+                ips.append(text)
+    return networks, ips
+
+
+def check_allowed(ranges, allowed=None):
+    """Memastikan setiap CIDR berada di dalam salah satu rentang allow-list; ValueError jika tidak."""
+    if not isinstance(ranges, list) or not all(isinstance(r, str) for r in ranges):
+        raise ValueError("ranges harus berupa list CIDR")
+    allowed_networks = [ipaddress.ip_network(r, strict=False) for r in (allowed or ALLOWED_RANGES)]
+    for text in ranges:
+        network = ipaddress.ip_network(text.strip(), strict=False)
+        if not any(network.version == a.version and network.subnet_of(a) for a in allowed_networks):
+            raise ValueError(f"Rentang {network} di luar rentang yang diizinkan "
+                             f"({', '.join(str(a) for a in allowed_networks)})")
+    return ranges
+
+
+def diff_inventory(networks, responders, onts):
+    """Membandingkan responder dengan indeks IP inventaris di rentang yang disapu."""
+    by_ip = {}
+    for ont in onts:
+        ip = str(ont.get('ip') or '').strip()
+        if ip:
+            by_ip.setdefault(ip, ont)
+    in_range = {}
+    for ip, ont in by_ip.items():
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            continue
+        if any(address in n for n in networks):
+            in_range[ip] = ont
+    alive_unregistered = sorted((ip for ip in responders if ip not in by_ip), key=ipaddress.ip_address)
+    never_seen = [
+        {'id': ont.get('id'), 'id_pelanggan': ont.get('id_pelanggan'), 'name': ont.get('name'),
+         'ip': ip, 'status': ont.get('status'), 'last_on': ont.get('last_on')}
+        for ip, ont in sorted(in_range.items(), key=lambda kv: ipaddress.ip_address(kv[0]))
+        if ip not in responders
+    ]
+    return alive_unregistered, never_seen, len(in_range)
+
+
+def run_discovery(ranges, onts, pps=probe_engine.DEFAULT_PPS, timeout=probe_engine.DEFAULT_TIMEOUT,
+                  workers=probe_engine.DEFAULT_WORKERS):
+    """Menyapu rentang lalu mengembalikan laporan discovery (dict).
+
+    `onts` boleh berupa callable; inventaris kemudian baru dibaca setelah sweep
+    selesai, sehingga ONT yang ditambahkan selama sweep ikut dihitung.
+    """
+    networks, ips = expand_ranges(ranges)
+    started = time.time()
+    responders, method = probe_engine.sweep(ips, pps=pps, timeout=timeout, workers=workers)
+    if callable(onts):
+        onts = onts()
+    alive_unregistered, never_seen, registered = diff_inventory(networks, responders, onts)
+    return {
+        'started_at': datetime.fromtimestamp(started).isoformat(timespec='seconds'),
+        'duration_s': round(time.time() - started, 2),
+        'ranges': [str(n) for n in networks],
+        'method': method,
+        'pps': pps,
+        'probed': len(ips),
+        'responders': len(responders),
+        'registered_in_range': registered,
+        'alive_unregistered': alive_unregistered,
+        'registered_never_seen': never_seen,
+    }
+
+
+def save_report(report, path=REPORT_FILE):
+    folder = os.path.dirname(path) or '.'
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix='.discovery-', suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def load_report(path=REPORT_FILE):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    if os.name == 'nt':
+        return pid == os.getpid()  # serve.py multi-worker hanya di POSIX
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class DiscoveryJob:
+    """Satu sweep discovery di background thread; hanya satu yang boleh berjalan.
+
+    Status sweep disimpan di file state (bukan di memori) agar semua worker web
+    (serve.py) melihat sweep yang sama dan tidak memulai sweep kedua.
+    """
+
+    def __init__(self, report_file=REPORT_FILE, state_file=None):
+        self.report_file = report_file
+        self.state_file = state_file or f"{os.path.splitext(report_file)[0]}.state.json"
+
+    @property
+    def running(self):
+        return self._load_state().get('running')
+
+    @property
+    def last_error(self):
+        return self._load_state().get('last_error')
+
+    def start(self, ranges, load_onts, **options):
+        """Memulai sweep; False jika sweep lain masih berjalan. Rentang divalidasi lebih dulu."""
+        networks, ips = expand_ranges(ranges)
+        with store_lock.shared_lock(self.state_file):
+            state = self._load_state()
+            if state.get('running'):
+                return False
+            running = {'ranges': [str(n) for n in networks], 'probed': len(ips),
+                       'started_at': datetime.now().isoformat(timespec='seconds'), 'pid': os.getpid()}
+            self._save_state({'running': running, 'last_error': state.get('last_error')})
+        threading.Thread(target=self._run, args=(ranges, load_onts, options), daemon=True).start()
+        return True
+
+    def _run(self, ranges, load_onts, options):
+        error = None
+        try:
+            save_report(run_discovery(ranges, load_onts, **options), self.report_file)
+        except Exception as e:
+            print(f"Discovery gagal: {e}")
+            error = str(e)
+        finally:
+            with store_lock.shared_lock(self.state_file):
+                self._save_state({'running': None, 'last_error': error})
+
+    def status(self):
+        state = self._load_state()
+        return {'running': state.get('running'), 'last_error': state.get('last_error'),
+                'report': load_report(self.report_file)}
+
+    def _load_state(self):
+        state = load_report(self.state_file) or {}
+        running = state.get('running')
+        if running and not _pid_alive(running.get('pid')):
+            state['running'] = None  # proses yang menjalankan sweep sudah berhenti
+        return state
+
+    def _save_state(self, state):
+        save_report(state, self.state_file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Discovery ONT di rentang CIDR manajemen.")
+    parser.add_argument('--range', action='append', dest='ranges', help="CIDR (boleh berulang)")
+    parser.add_argument('--pps', type=int, default=probe_engine.DEFAULT_PPS, help="Paket per detik")
+    parser.add_argument('--timeout', type=float, default=probe_engine.DEFAULT_TIMEOUT)
+    parser.add_argument('--workers', type=int, default=probe_engine.DEFAULT_WORKERS,
+                        help="Thread paralel untuk mode cadangan `ping`")
+    parser.add_argument('--data', default='onts.json')
+    parser.add_argument('--output', default=REPORT_FILE)
+    args = parser.parse_args(argv)
+
+    from inventory import InventoryRepository
+    report = run_discovery(args.ranges or DEFAULT_RANGES, InventoryRepository(args.data).all(),
+                           pps=args.pps, timeout=args.timeout, workers=args.workers)
+    save_report(report, args.output)
+    print(f"=== Discovery {', '.join(report['ranges'])} ({report['method']}, {report['duration_s']}s) ===")
+    print(f"   Diprobe: {report['probed']}, membalas: {report['responders']}")
+    print(f"   Hidup tapi belum terdaftar: {len(report['alive_unregistered'])}")
+    print(f"   Terdaftar tapi tidak terlihat: {len(report['registered_never_seen'])}")
+    print(f"Laporan disimpan ke {args.output}")
+
+
+if __name__ == "__main__":
+    main()
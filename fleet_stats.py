@@ -0,0 +1,165 @@
+"""
+Statistik armada ONT yang dipelihara secara inkremental.
+
+Counter per status / Icon / area dan heap "down terlama" diperbarui setiap kali
+ada transisi status atau perubahan inventaris, sehingga /api/stats tidak perlu
+mengiterasi seluruh onts.json pada setiap polling browser.
+"""
+
+import heapq
+import threading
+from collections import Counter, deque
+from datetime import datetime
+
+RECENT_CHANGES_LIMIT = 50
+DOWN_LONGEST_LIMIT = 10
+
+
+def ont_area(ont):
+    """Area = kelurahan, diambil dari kata pertama nama ONT ('Baciro RW 20' -> 'Baciro')."""
+    name = (ont.get('name') or '').strip()
+    return name.split()[0] if name else '-'
+
+
+def is_online(status):
+    """Semua status yang diawali 'ON' dianggap online (sama seperti map.html)."""
+    return (status or '').startswith('ON')
+
+
+class FleetStats:
+    """Counter dan heap untuk statistik armada; setiap operasi O(log n) atau lebih kecil."""
+
+    def __init__(self, recent_limit=RECENT_CHANGES_LIMIT):
+        self._lock = threading.Lock()
+        # ont_id -> (status, icon, area, last_on, name)
+        self._entries = {}
+        self._versions = {}
+        self._by_status = Counter()
+        self._by_icon = {}
+        self._by_area = {}
+        # Heap (last_on, version, ont_id) untuk ONT offline; entri basi dibuang secara lazy
+        self._down_heap = []
+        self._recent = deque(maxlen=recent_limit)
+        self._cached = None
+
+    # --- mutasi -------------------------------------------------------------
+
+    def apply(self, ont, event_time=None):
+        """Upsert satu ONT; mencatat transisi jika statusnya berubah."""
+        ont_id = ont.get('id')
+        if ont_id is None:
+            return
+        entry = (
+            ont.get('status') or 'OFF',
+            ont.get('Icon'),
+            ont_area(ont),
+            ont.get('last_on'),
+            ont.get('name') or '',
+        )
+        with self._lock:
+            old = self._entries.get(ont_id)
+            if old == entry:
+                return
+            if old is not None:
+                self._count(old, -1)
+                if old[0] != entry[0]:
+                    self._recent.appendleft({
+                        'ont_id': ont_id,
+                        'ont_name': entry[4],
+                        'from': old[0],
+                        'to': entry[0],
+                        'time': event_time or datetime.now().isoformat(timespec='seconds'),
+                    })
+            self._entries[ont_id] = entry
+            self._count(entry, +1)
+            version = self._versions.get(ont_id, 0) + 1
+            self._versions[ont_id] = version
+            if not is_online(entry[0]):
+                heapq.heappush(self._down_heap, (entry[3] or '', version, ont_id))
+                self._maybe_compact_heap()
+            self._cached = None
+
+    def remove(self, ont_id):
+        """Menghapus ONT dari semua counter (entri heap-nya menjadi basi)."""
+        with self._lock:
+            old = self._entries.pop(ont_id, None)
+            if old is None:
+                return
+            self._count(old, -1)
+            self._versions.pop(ont_id, None)
+            self._cached = None
+
+    def sync(self, onts):
+        """Menyamakan state dengan daftar ONT lengkap; hanya record yang berubah yang diproses."""
+        seen = set()
+        for ont in onts:
+            self.apply(ont)
+            seen.add(ont.get('id'))
+        for ont_id in [i for i in self._entries if i not in seen]:
+            self.remove(ont_id)
+
+    # --- query --------------------------------------------------------------
+
+    def snapshot(self, limit=DOWN_LONGEST_LIMIT):
+        """Mengembalikan statistik terkini; hasil di-cache sampai ada mutasi berikutnya."""
+        with self._lock:
+            if self._cached is not None and self._cached[0] == limit:
+                return self._cached[1]
+            total = len(self._entries)
+            online = sum(c for s, c in self._by_status.items() if is_online(s))
+            payload = {
+                'total': total,
+                'online': online,
+                'offline': total - online,
+                'by_status': dict(self._by_status),
+                'by_icon': {str(k): dict(v) for k, v in self._by_icon.items()},
+                'by_area': {k: dict(v) for k, v in sorted(self._by_area.items())},
+                'down_longest': self._down_longest(limit),
+                'recently_changed': list(self._recent)[:limit],
+            }
+            self._cached = (limit, payload)
+            return payload
+
+    # --- internal -----------------------------------------------------------
+
+    def _count(self, entry, delta):
+        status, icon, area = entry[0], entry[1], entry[2]
+        key = 'online' if is_online(status) else 'offline'
+        self._by_status[status] += delta
+        if self._by_status[status] <= 0:
+            del self._by_status[status]
+        for bucket, name in ((self._by_icon, icon), (self._by_area, area)):
+            counts = bucket.setdefault(name, Counter())
+            counts['total'] += delta
+            counts[key] += delta
+            if counts['total'] <= 0:
+                del bucket[name]
+
+    def _is_live(self, item):
+        _, version, ont_id = item
+        entry = self._entries.get(ont_id)
+        return entry is not None and self._versions.get(ont_id) == version and not is_online(entry[0])
+
+    def _down_longest(self, limit):
+        picked = []
+        while self._down_heap and len(picked) < limit:
+            item = heapq.heappop(self._down_heap)
+            if self._is_live(item):
+                picked.append(item)
+        for item in picked:
+            heapq.heappush(self._down_heap, item)
+        result = []
+        for last_on, _, ont_id in picked:
+            entry = self._entries[ont_id]
+            result.append({
+                'ont_id': ont_id,
+                'ont_name': entry[4],
+                'status': entry[0],
+                'last_on': last_on or None,
+            })
+        return result
+
+    def _maybe_compact_heap(self):
+        if len(self._down_heap) > 2 * len(self._entries) + 64:
+            self._down_heap = [item for item in self._down_heap if self._is_live(item)]
+            heapq.heapify(self._down_heap)
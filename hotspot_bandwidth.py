@@ -0,0 +1,339 @@
+"""
+Throughput per user hotspot dan top talker dari counter bytes_in/bytes_out.
+
+Setiap snapshot user aktif yang diterima SessionStore diteruskan ke
+BandwidthTracker (listener). Snapshot diubah menjadi kolom (kunci, bytes_in,
+bytes_out, uptime) lalu dibandingkan dengan kolom snapshot sebelumnya dari
+router yang sama dalam satu lintasan batch:
+
+  - user yang sama:        selisih counter / selisih waktu snapshot
+  - login ulang / reset:   uptime atau counter turun -> counter sekarang adalah
+                           byte sejak login, dibagi uptime (maks. selisih waktu)
+  - user baru:             dihitung hanya jika login setelah snapshot sebelumnya
+                           (uptime <= selisih waktu); selain itu jadi baseline
+
+Semua hasil dihitung saat ingest dan ditulis ke hotspot_sessions/:
+
+    bandwidth-2026-10.jsonl   agregat per snapshot router {t, router, users, in_bps, out_bps}
+    top-2026-10.jsonl         top talker per jendela (default 1 jam)
+    usage-2026-10.jsonl       byte per MAC per jendela (riwayat per MAC)
+    bandwidth.jsonl           journal: kolom counter satu snapshot per baris (kunci hanya jika berubah)
+    bandwidth.json            checkpoint kolom terakhir per router + akumulator jendela berjalan
+
+Seperti SessionStore, checkpoint hanya ditulis ulang setiap `checkpoint_every`
+snapshot; di antaranya kolom snapshot cukup di-append ke journal, jadi biaya
+ingest sebanding dengan user router yang di-poll, bukan seluruh populasi.
+Worker lain memutar ulang ekor journal (journal_store.Journal, di bawah file
+lock) untuk mendapatkan kolom sebelumnya dan akumulator yang sama.
+
+Request /api/analytics/bandwidth hanya membaca hasil tersebut. Catatan arah:
+bytes_in RouterOS adalah data dari klien (upload), bytes_out ke klien
+(download). Laju dalam bit per detik.
+
+Penggunaan:
+    tracker = BandwidthTracker('hotspot_sessions')
+    store.add_listener(tracker)
+    tracker.series(start, end); tracker.windows(start, end); tracker.mac_history('02:AA:...')
+"""
+
+import os
+import re
+from array import array
+from datetime import datetime
+from operator import sub
+
+import hotspot_sessions
+import journal_store
+import routers
+import store_lock
+
+WINDOW_SECONDS = 3600
+TOP_N = 10
+
+
+def columns(users, router=routers.DEFAULT_ROUTER_ID):
+    """Snapshot (list user) -> (kunci, bytes_in, bytes_out, uptime); uptime -1 jika tidak diketahui."""
+    keys, bytes_in, bytes_out, uptime = [], array('q'), array('q'), array('q')
+    seen = set()
+    for user in users:
+        key = hotspot_sessions.user_key(user, router) if isinstance(user, dict) else None
+        if key is None or key in seen:
+            continue
+        seen.add(key)
+        keys.append(key)
+        bytes_in.append(hotspot_sessions.counter_value(user.get('bytes_in')))
+        bytes_out.append(hotspot_sessions.counter_value(user.get('bytes_out')))
+        up = hotspot_sessions.parse_uptime(user.get('uptime'))
+        uptime.append(-1 if up is None else up)
+    return keys, bytes_in, bytes_out, uptime
+
+
+def throughput(previous, current, elapsed):
+    """Byte dan detik per user antara dua snapshot berkolom.
+
+    `previous`/`current`: (kunci, bytes_in, bytes_out, uptime); `elapsed`: detik
+    antar-snapshot. Mengembalikan (delta_in, delta_out, detik) sejajar dengan
+    kolom `current`; detik 0 berarti belum ada laju (baseline).
+    """
+    keys, cur_in, cur_out, cur_up = current
+    prev_keys, prev_in, prev_out, prev_up = previous
+    where = {k: i for i, k in enumerate(prev_keys)}
+    pos = [where.get(k, -1) for k in keys]
+    known = [i >= 0 for i in pos]
+    base_in = array('q', [prev_in[i] if i >= 0 else 0 for i in pos])
+    base_out = array('q', [prev_out[i] if i >= 0 else 0 for i in pos])
+    base_up = array('q', [prev_up[i] if i >= 0 else -1 for i in pos])
+    delta_in = array('q', map(sub, cur_in, base_in))
+    delta_out = array('q', map(sub, cur_out, base_out))
+    # Login ulang: uptime turun (dengan toleransi pembulatan) atau salah satu counter turun
+    restarted = [k and ((u >= 0 and b >= 0 and u + hotspot_sessions.UPTIME_TOLERANCE < b) or di < 0 or do < 0)
+                 for k, u, b, di, do in zip(known, cur_up, base_up, delta_in, delta_out)]
+    # Sesi yang dimulai setelah snapshot sebelumnya: seluruh counter adalah byte baru
+    fresh = [(not k and 0 <= u <= elapsed) or r for k, u, r in zip(known, cur_up, restarted)]
+    seconds = array('d', [
+        (min(u, elapsed) if 0 <= u else elapsed) if f else (elapsed if k else 0)
+        for k, f, u in zip(known, fresh, cur_up)
+    ])
+    delta_in = array('q', [c if f else (d if k else 0) for c, d, f, k in zip(cur_in, delta_in, fresh, known)])
+    delta_out = array('q', [c if f else (d if k else 0) for c, d, f, k in zip(cur_out, delta_out, fresh, known)])
+    return delta_in, delta_out, seconds
+
+
+def rates(delta, seconds):
+    """Laju bit per detik per user (0 untuk baseline)."""
+    return array('d', [d * 8 / s if s > 0 else 0.0 for d, s in zip(delta, seconds)])
+
+
+def _window_start(ts, window):
+    return int(ts // window * window)
+
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch).isoformat(timespec='seconds')
+
+
+def split_key(key):
+    """Kunci user -> (id router, MAC/IP); lihat hotspot_sessions.user_key."""
+    router, _, mac = key.rpartition('/')
+    return router or routers.DEFAULT_ROUTER_ID, mac
+
+
+class BandwidthTracker:
+    """Laju per user dan top talker, dihitung sekali per snapshot yang di-ingest."""
+
+    def __init__(self, directory=hotspot_sessions.SESSION_DIR, window=WINDOW_SECONDS, top_n=TOP_N,
+                 checkpoint_every=hotspot_sessions.CHECKPOINT_EVERY):
+        self.directory = directory
+        self.state_file = os.path.join(directory, 'bandwidth.json')
+        self.journal_file = os.path.join(directory, 'bandwidth.jsonl')
+        self.window = window
+        self.top_n = top_n
+        self.checkpoint_every = checkpoint_every
+        self._state = None
+        self._journal = journal_store.Journal(self.state_file, self.journal_file)
+        self._series_cache = {}    # path -> (signature, [record])
+
+    # --- ingest (dipanggil SessionStore di bawah lock-nya) ------------------
+
+    def ingest(self, snapshots):
+        with self._locked():
+            state = self._refresh()
+            lines, series, windows, usage = [], [], [], []
+            for when, router, users in snapshots:
+                keys, bytes_in, bytes_out, uptime = columns(users, router)
+                line = {'seq': self._journal.seq + 1, 't': when.timestamp(), 'r': router, 'i': bytes_in.tolist(),
+                        'o': bytes_out.tolist(), 'u': uptime.tolist()}
+                previous = state['routers'].get(router)
+                if previous is None or previous['keys'] != keys:
+                    line['k'] = keys
+                closed, delta = self._apply(state, line)
+                lines.append(line)
+                if closed is not None:
+                    windows.append(closed[0])
+                    usage.append(closed[1])
+                if delta is not None:
+                    series.append(self._point(when, router, *delta))
+            for prefix, records, field in (('bandwidth-', series, 't'), ('top-', windows, 'start'),
+                                           ('usage-', usage, 'start')):
+                by_month = {}
+                for record in records:
+                    by_month.setdefault(record[field][:7], []).append(record)
+                for month, items in by_month.items():
+                    journal_store.append_lines(os.path.join(self.directory, f"{prefix}{month}.jsonl"), items)
+            if lines:
+                self._journal.append(lines)
+                if self._journal.pending >= self.checkpoint_every:
+                    self._journal.checkpoint(state)
+
+    def _apply(self, state, line):
+        """Menerapkan satu baris journal ke state (ingest dan replay).
+
+        Mengembalikan (jendela yang ditutup atau None, (delta_in, delta_out, detik)
+        atau None jika snapshot ini baseline).
+        """
+        ts, router = line['t'], line['r']
+        self._journal.seq = max(self._journal.seq, line['seq'])
+        closed = None
+        window = _window_start(ts, self.window)
+        if state['window'] is not None and window > state['window']:
+            closed = self._close_window(state)
+            state['window'] = window
+        elif state['window'] is None:
+            state['window'] = window
+        # Kolom snapshot sebelumnya disimpan per router
+        previous = state['routers'].get(router)
+        keys = line['k'] if 'k' in line else (previous['keys'] if previous else [])
+        delta = None
+        if previous is not None and ts > previous['t']:
+            delta = throughput(
+                (previous['keys'], array('q', previous['bytes_in']), array('q', previous['bytes_out']),
+                 array('q', previous['uptime'])),
+                (keys, array('q', line['i']), array('q', line['o']), array('q', line['u'])), ts - previous['t'])
+            acc = state['acc']
+            for key, d_in, d_out in zip(keys, delta[0], delta[1]):
+                if d_in or d_out:
+                    total = acc.setdefault(key, [0, 0])
+                    total[0] += d_in
+                    total[1] += d_out
+        state['routers'][router] = {'t': ts, 'keys': keys, 'bytes_in': line['i'],
+                                    'bytes_out': line['o'], 'uptime': line['u']}
+        return closed, delta
+
+    @staticmethod
+    def _point(when, router, delta_in, delta_out, seconds):
+        rate_in, rate_out = rates(delta_in, seconds), rates(delta_out, seconds)
+        return {'t': when.isoformat(timespec='seconds'), 'router': router, 'users': sum(1 for s in seconds if s > 0),
+                'in_bps': round(sum(rate_in)), 'out_bps': round(sum(rate_out))}
+
+    def _close_window(self, state):
+        start = state['window']
+        start_iso, end_iso = _iso(start), _iso(start + self.window)
+        top = {'start': start_iso, 'end': end_iso, 'top': self._top(state['acc'], self.window)}
+        usage = {'start': start_iso, 'macs': state['acc']}
+        state['acc'] = {}
+        return top, usage
+
+    def _top(self, acc, seconds):
+        ranked = sorted(acc.items(), key=lambda item: item[1][0] + item[1][1], reverse=True)[:self.top_n]
+        top = []
+        for key, (b_in, b_out) in ranked:
+            router, mac = split_key(key)
+            top.append({'mac': mac, 'router': router, 'bytes_in': b_in, 'bytes_out': b_out,
+                        'in_bps': round(b_in * 8 / seconds), 'out_bps': round(b_out * 8 / seconds)})
+        return top
+
+    # --- baca (request) ---------------------------------------------------
+
+    def current(self):
+        """Jendela yang sedang berjalan: {start, top}."""
+        with self._locked():
+            state = self._refresh()
+            if state['window'] is None or not state['routers']:
+                return {'start': None, 'top': []}
+            latest = max(r['t'] for r in state['routers'].values())
+            return {'start': _iso(state['window']),
+                    'top': self._top(state['acc'], min(latest - state['window'], self.window) or 1)}
+
+    def series(self, start=None, end=None):
+        """Throughput total per waktu snapshot dalam rentang [start, end], beserta rincian per router."""
+        points = {}
+        for record in self._read_range('bandwidth-', 't', start, end):
+            point = points.get(record['t'])
+            if point is None:
+                point = points[record['t']] = {'t': record['t'], 'users': 0, 'in_bps': 0, 'out_bps': 0, 'routers': {}}
+            router = record.get('router') or routers.DEFAULT_ROUTER_ID
+            point['routers'][router] = {k: record[k] for k in ('users', 'in_bps', 'out_bps')}
+            for k in ('users', 'in_bps', 'out_bps'):
+                point[k] += record[k]
+        return list(points.values())
+
+    def windows(self, start=None, end=None, limit=None):
+        """Top talker per jendela yang sudah selesai, opsional dipotong ke `limit` user."""
+        records = self._read_range('top-', 'start', start, end)
+        if limit:
+            records = [dict(r, top=r['top'][:limit]) for r in records]
+        return records
+
+    def mac_history(self, mac, start=None, end=None):
+        """Byte dan laju rata-rata satu MAC per jendela (per router), dari file usage bulanan."""
+        key = hotspot_sessions.user_key({'mac': mac})
+        if key is None:
+            return []
+        # Hanya angka milik MAC ini yang diambil; baris usage tidak perlu di-parse utuh
+        window_start = re.compile(r'^\{"start":"([^"]+)"')
+        entry = re.compile(r'"(?:([^"/]+)/)?' + re.escape(key) + r'":\[(\d+),(\d+)\]')
+        history = []
+        for path in self._month_files('usage-', start, end):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if key not in line:
+                        continue
+                    head = window_start.match(line)
+                    if not head:
+                        continue
+                    when = datetime.fromisoformat(head.group(1))
+                    if (start and when < start) or (end and when > end):
+                        continue
+                    for match in entry.finditer(line):
+                        b_in, b_out = int(match.group(2)), int(match.group(3))
+                        history.append({'start': head.group(1), 'router': match.group(1) or routers.DEFAULT_ROUTER_ID,
+                                        'bytes_in': b_in, 'bytes_out': b_out, 'in_bps': round(b_in * 8 / self.window),
+                                        'out_bps': round(b_out * 8 / self.window)})
+        return history
+
+    # --- file -------------------------------------------------------------
+
+    def _locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        return store_lock.shared_lock(self.journal_file)
+
+    def _refresh(self):
+        """Memuat checkpoint/journal hanya jika berubah sejak pembacaan terakhir (di bawah lock)."""
+        change = self._journal.poll()
+        if self._state is None or change == 'checkpoint':
+            self._load_checkpoint()
+        elif change == 'tail':
+            self._journal.replay(self._replay_line)
+        return self._state
+
+    def _load_checkpoint(self):
+        state = self._journal.load_checkpoint({})
+        if 'keys' in state:
+            # Format sebelum registry router: satu set kolom untuk router "default"
+            state['routers'] = {routers.DEFAULT_ROUTER_ID: {f: state.pop(f) for f in
+                                                            ('t', 'keys', 'bytes_in', 'bytes_out', 'uptime')}}
+        state.pop('top', None)  # format lama; top jendela berjalan kini dihitung saat dibaca
+        state.pop('seq', None)
+        state.setdefault('routers', {})
+        state.setdefault('window', None)
+        state.setdefault('acc', {})
+        self._state = state
+        self._journal.replay(self._replay_line)
+
+    def _replay_line(self, line):
+        self._apply(self._state, line)
+
+    def _month_files(self, prefix, start, end):
+        try:
+            names = sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            return []
+        first = start.strftime('%Y-%m') if start else ''
+        last = end.strftime('%Y-%m') if end else '9999-99'
+        return [os.path.join(self.directory, n) for n in names if n.startswith(prefix) and n.endswith('.jsonl')
+                and first <= n[len(prefix):-len('.jsonl')] <= last]
+
+    def _read_range(self, prefix, field, start, end):
+        records = []
+        for path in self._month_files(prefix, start, end):
+            signature = journal_store.file_signature(path)
+            cached = self._series_cache.get(path)
+            if cached is None or cached[0] != signature:
+                cached = (signature, [r for _, r in journal_store.read_jsonl(path)])
+                self._series_cache[path] = cached
+            for record in cached[1]:
+                when = datetime.fromisoformat(record[field])
+                if (start is None or when >= start) and (end is None or when <= end):
+                    records.append(record)
+        records.sort(key=lambda r: r[field])
+        return records
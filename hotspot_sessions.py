@@ -0,0 +1,496 @@
+"""
+Pelacakan sesi user hotspot dari selisih snapshot user aktif.
+
+Setiap poll MikroTik mengirim daftar lengkap user aktif, padahal sebagian besar
+user sama dengan poll sebelumnya. Alih-alih menyimpan snapshot utuh, setiap
+snapshot dibandingkan dengan set user aktif sebelumnya (kunci MAC, cadangan IP)
+dan hanya perubahannya yang dicatat:
+
+    hotspot_sessions/events.jsonl          journal: satu baris per snapshot (join/leave/ganti IP/counter)
+    hotspot_sessions/active.json           checkpoint set user aktif + posisi journal
+    hotspot_sessions/sessions-2026-10.jsonl  sesi yang sudah selesai (bulan waktu selesai)
+    hotspot_sessions/polls-2026-10.jsonl     jumlah user per snapshot (untuk analitik)
+
+Sesi dimulai pada `timestamp snapshot - uptime` RouterOS dan berakhir pada
+snapshot terakhir user masih terlihat; uptime atau counter byte yang turun
+berarti user login ulang (sesi lama ditutup, sesi baru dibuka). Counter byte
+semua user hanya ditulis ke journal sekali setiap `checkpoint_every` snapshot
+per router (field `u`), jadi tulis file per snapshot rata-rata sebanding dengan
+churn ditambah populasi / checkpoint_every, bukan jumlah user.
+
+Snapshot membawa id router (routers.py); user aktif dipartisi per router
+sehingga snapshot satu gateway tidak menutup sesi user di gateway lain, dan
+router yang gagal di-poll tidak dianggap kehilangan semua user-nya.
+
+Seperti inventory.py (keduanya lewat journal_store.Journal), setiap proses
+(worker serve.py) memutar ulang ekor journal di bawah file lock sebelum
+membandingkan snapshot, sehingga semua worker memakai set user aktif yang
+sama. Counter byte di antara dua baris `u` hanya ada di memori worker yang
+memproses snapshot itu; sesi yang ditutup worker lain mencatat byte yang bisa
+tertinggal paling banyak `checkpoint_every` poll routernya.
+
+Penggunaan:
+    store = SessionStore('hotspot_sessions', legacy_file='user_log.json')
+    store.apply_snapshots([{'timestamp': '2026-10-19T08:00:00', 'users': [...], 'key': '...'}])
+    store.online_at(datetime(2026, 10, 19, 7, 30))
+"""
+
+import json
+import os
+import re
+from collections import deque
+from datetime import datetime, timedelta
+
+import journal_store
+import metrics
+import request_log
+import routers
+import store_lock
+from journal_store import append_lines, file_signature, read_jsonl
+from notification_archive import parse_timestamp
+
+SESSION_DIR = 'hotspot_sessions'
+CHECKPOINT_EVERY = 12
+RECENT_SESSIONS = 100
+RECENT_KEYS = 5000
+# Uptime boleh "mundur" sedikit karena pembulatan RouterOS tanpa dianggap login ulang
+UPTIME_TOLERANCE = 5
+
+EVENTS = metrics.counter('hotspot_session_events_total', 'Event sesi hotspot dari selisih snapshot', ('event',))
+
+_UPTIME_PART = re.compile(r'(\d+)([wdhms])')
+_UPTIME_UNITS = {'w': 604800, 'd': 86400, 'h': 3600, 'm': 60, 's': 1}
+
+
+def parse_uptime(text):
+    """Uptime RouterOS ("1w2d3h4m5s", "1d02:03:04", "02:03:04") -> detik; None jika tidak dikenal."""
+    text = str(text or '').strip()
+    if not text:
+        return None
+    seconds = 0
+    clock = re.search(r'(\d+):(\d{2}):(\d{2})$', text)
+    if clock:
+        seconds = int(clock.group(1)) * 3600 + int(clock.group(2)) * 60 + int(clock.group(3))
+        text = text[:clock.start()]
+    parts = _UPTIME_PART.findall(text)
+    if ''.join(n + u for n, u in parts) != text:
+        return None
+    return seconds + sum(int(n) * _UPTIME_UNITS[u] for n, u in parts)
+
+
+def format_duration(seconds):
+    """Detik -> durasi gaya RouterOS (1d2h3m4s)."""
+    seconds = int(seconds or 0)
+    if seconds <= 0:
+        return '0s'
+    parts = []
+    for unit, size in (('w', 604800), ('d', 86400), ('h', 3600), ('m', 60), ('s', 1)):
+        if seconds >= size:
+            parts.append(f"{seconds // size}{unit}")
+            seconds %= size
+    return ''.join(parts)
+
+
+def user_key(user, router=routers.DEFAULT_ROUTER_ID):
+    """Kunci user: MAC (huruf besar), atau IP jika MAC tidak tersedia.
+
+    Untuk router selain "default" kunci diawali id router, karena IP privat
+    (dan perangkat yang pindah gateway) bisa muncul di beberapa router.
+    """
+    mac = str(user.get('mac') or '').strip().upper()
+    ip = str(user.get('ip') or '').strip()
+    if mac and mac != '-':
+        key = mac
+    elif ip and ip != '-':
+        key = f"ip:{ip}"
+    else:
+        return None
+    return key if router == routers.DEFAULT_ROUTER_ID else f"{router}/{key}"
+
+
+def snapshot_router(snapshot):
+    return str(snapshot.get('router') or routers.DEFAULT_ROUTER_ID)
+
+
+def counter_value(value):
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _iso(dt):
+    return dt.isoformat(timespec='seconds')
+
+
+class SessionStore:
+    """Set user hotspot aktif di memori + journal perubahan + arsip sesi bulanan."""
+
+    def __init__(self, directory=SESSION_DIR, legacy_file=None, checkpoint_every=CHECKPOINT_EVERY):
+        self.directory = directory
+        self.journal_file = os.path.join(directory, 'events.jsonl')
+        self.checkpoint_file = os.path.join(directory, 'active.json')
+        self.legacy_file = legacy_file
+        self.checkpoint_every = checkpoint_every
+        self._loaded = False
+        self._listeners = []
+        self._journal = journal_store.Journal(self.checkpoint_file, self.journal_file)
+        self._reset()
+        self._session_index = {}   # path sessions bulanan -> (signature, {hari: [(start, end, offset)]})
+        self._poll_cache = {}      # path polls bulanan -> (signature, [(timestamp, count)])
+
+    def _reset(self):
+        self.active = {}           # kunci -> {mac, ip, start, uptime, bytes_in, bytes_out}
+        self.devices = set()
+        self.last_poll = None
+        self.router_polls = {}     # id router -> timestamp snapshot terakhir
+        self.counters_due = {}     # id router -> snapshot sejak baris `u` terakhir
+        self.recent = deque(maxlen=RECENT_SESSIONS)
+        self._keys = deque(maxlen=RECENT_KEYS)
+        self._key_set = set()
+
+    # --- API publik -------------------------------------------------------
+
+    def add_listener(self, listener):
+        """Listener (mis. hotspot_bandwidth.BandwidthTracker) menerima snapshot baru lewat ingest().
+
+        Dipanggil di bawah lock store dengan [(datetime, id router, users)] yang
+        diterima dan tidak terlambat, sekali per batch.
+        """
+        self._listeners.append(listener)
+
+    def apply_snapshots(self, snapshots):
+        """Memproses snapshot {timestamp, users, key, router} berurutan waktu.
+
+        Setiap snapshot hanya dibandingkan dengan user aktif router yang sama.
+        Snapshot dengan key yang sudah pernah diterima dilewati; snapshot yang
+        lebih tua dari snapshot terakhir routernya hanya dicatat jumlah user-nya.
+        Mengembalikan (diterima, duplikat).
+        """
+        ordered = sorted(snapshots, key=lambda s: s.get('timestamp') or '')
+        with request_log.phase('store'), self._locked():
+            self._refresh()
+            lines, polls, closed, fresh = [], [], [], []
+            accepted = duplicates = 0
+            for snapshot in ordered:
+                key = snapshot.get('key')
+                if key and key in self._key_set:
+                    duplicates += 1
+                    continue
+                ts = parse_timestamp(snapshot.get('timestamp')) or datetime.now()
+                users = snapshot.get('users') or []
+                router = snapshot_router(snapshot)
+                line = self._diff(ts, router, users, key)
+                self._apply_line(line)
+                lines.append(line)
+                polls.append({'t': _iso(ts), 'n': len(users), 'r': router})
+                closed.extend(line.get('leave', ()))
+                if not line.get('late'):
+                    fresh.append((ts, router, users))
+                accepted += 1
+            if lines:
+                self._write(lines, polls, closed)
+            if fresh:
+                for listener in self._listeners:
+                    listener.ingest(fresh)
+        return accepted, duplicates
+
+    def online_at(self, when):
+        """User yang online pada waktu `when` (datetime): sesi selesai + sesi yang masih aktif."""
+        target = when.timestamp()
+        day = when.strftime('%Y-%m-%d')
+        month = when.strftime('%Y-%m')
+        results = []
+        for path in self._session_files(since=month):
+            index = self._load_index(path)
+            offsets = [o for start, end, o in index.get(day, ()) if start <= target <= end]
+            results.extend(self._read_at(path, offsets))
+        with self._locked():
+            self._refresh()
+            for session in self.active.values():
+                last_poll = self._router_poll(session)
+                start = parse_timestamp(session['start'])
+                if last_poll is not None and start is not None and start <= when <= last_poll:
+                    results.append(self._open_record(session, last_poll))
+        results.sort(key=lambda s: s['start'])
+        return results
+
+    def sessions(self, mac=None, limit=RECENT_SESSIONS):
+        """Sesi terbaru menurut waktu mulai (aktif dan yang sudah selesai), opsional untuk satu MAC."""
+        with self._locked():
+            self._refresh()
+            active = [self._open_record(s, self._router_poll(s)) for s in self.active.values()]
+            recent = list(self.recent)
+        wanted = mac.strip().upper() if mac else None
+        sessions = [s for s in active + recent if not wanted or s['mac'] == wanted]
+        if wanted and len(sessions) < limit:
+            # Sesi lama satu MAC: pindai file bulanan dari yang terbaru
+            seen = {s['start'] for s in sessions}
+            for path in reversed(self._session_files()):
+                sessions.extend(s for _, s in read_jsonl(path) if s.get('mac') == wanted and s['start'] not in seen)
+                if len(sessions) >= limit:
+                    break
+        sessions.sort(key=lambda s: s['start'], reverse=True)
+        return sessions[:limit]
+
+    def poll_counts(self):
+        """[(timestamp ISO, jumlah user, id router)] untuk semua snapshot yang pernah diterima, urut waktu."""
+        with self._locked():
+            self._refresh()
+        counts = []
+        for path in self._monthly_files('polls-'):
+            signature = file_signature(path)
+            cached = self._poll_cache.get(path)
+            if cached is None or cached[0] != signature:
+                cached = (signature, [(p['t'], p['n'], p.get('r') or routers.DEFAULT_ROUTER_ID)
+                                      for _, p in read_jsonl(path)])
+                self._poll_cache[path] = cached
+            counts.extend(cached[1])
+        counts.sort(key=lambda item: item[0])
+        return counts
+
+    def status(self):
+        with self._locked():
+            self._refresh()
+            per_router = {r: {'active': 0, 'last_poll': t} for r, t in self.router_polls.items()}
+            for session in self.active.values():
+                per_router.setdefault(self._router(session), {'active': 0, 'last_poll': None})['active'] += 1
+            return {'active': len(self.active), 'active_macs': sum(1 for s in self.active.values() if s.get('mac')),
+                    'unique_devices': len(self.devices), 'last_poll': self.last_poll, 'routers': per_router,
+                    'journal_entries': self._journal.pending}
+
+    # --- diff ---------------------------------------------------------------
+
+    def _diff(self, ts, router, users, key):
+        line = {'seq': self._journal.seq + 1, 't': _iso(ts), 'n': len(users)}
+        if key:
+            line['k'] = key
+        if router != routers.DEFAULT_ROUTER_ID:
+            line['r'] = router
+        last_poll = parse_timestamp(self.router_polls.get(router))
+        if last_poll is not None and ts <= last_poll:
+            line['late'] = True
+            EVENTS.inc(event='late')
+            return line
+        current = {}
+        for user in users:
+            k = user_key(user, router) if isinstance(user, dict) else None
+            if k is not None:
+                current[k] = user
+        joins, leaves, moves, counters = [], [], {}, {}
+        for k, user in current.items():
+            uptime = parse_uptime(user.get('uptime'))
+            bytes_in, bytes_out = counter_value(user.get('bytes_in')), counter_value(user.get('bytes_out'))
+            previous = self.active.get(k)
+            if previous is not None and self._restarted(previous, uptime, bytes_in, bytes_out):
+                leaves.append(self._close(k, previous, last_poll))
+                EVENTS.inc(event='restart')
+                previous = None
+            if previous is None:
+                start = ts - timedelta(seconds=uptime) if uptime is not None else ts
+                if last_poll is not None and uptime is None:
+                    start = max(start, last_poll)
+                mac = user_key(user)
+                joins.append({'key': k, 'mac': None if mac.startswith('ip:') else mac, 'ip': user.get('ip'),
+                              'router': router, 'start': _iso(start), 'uptime': uptime,
+                              'bytes_in': bytes_in, 'bytes_out': bytes_out})
+                continue
+            if user.get('ip') and user.get('ip') != previous.get('ip'):
+                moves[k] = user.get('ip')
+            previous.update(uptime=uptime, bytes_in=bytes_in, bytes_out=bytes_out)
+            counters[k] = [uptime, bytes_in, bytes_out]
+        for k, session in self.active.items():
+            if k not in current and self._router(session) == router:
+                leaves.append(self._close(k, session, last_poll))
+        if joins:
+            line['join'] = joins
+        if leaves:
+            line['leave'] = leaves
+        if moves:
+            line['ip'] = moves
+        if self.counters_due.get(router, 0) + 1 >= self.checkpoint_every:
+            # Counter semua user router ini, agar worker lain ikut memegang nilai terbaru
+            line['u'] = counters
+        EVENTS.inc(len(joins), event='join')
+        EVENTS.inc(len(leaves), event='leave')
+        EVENTS.inc(len(moves), event='update')
+        return line
+
+    @staticmethod
+    def _restarted(previous, uptime, bytes_in, bytes_out):
+        if uptime is not None and previous.get('uptime') is not None and uptime + UPTIME_TOLERANCE < previous['uptime']:
+            return True
+        return bytes_in < previous.get('bytes_in', 0) or bytes_out < previous.get('bytes_out', 0)
+
+    @staticmethod
+    def _close(k, session, end):
+        """Record sesi selesai; `end` adalah snapshot terakhir user masih terlihat."""
+        start = parse_timestamp(session['start'])
+        end = max(end or start, start)
+        return {'key': k, 'mac': session.get('mac'), 'ip': session.get('ip'),
+                'router': session.get('router') or routers.DEFAULT_ROUTER_ID, 'start': session['start'], 'end': _iso(end), 'duration_s': int((end - start).total_seconds()),
+                'bytes_in': session.get('bytes_in', 0), 'bytes_out': session.get('bytes_out', 0)}
+
+    @staticmethod
+    def _open_record(session, last_poll):
+        start = parse_timestamp(session['start'])
+        end = max(last_poll or start, start)
+        return {'mac': session.get('mac'), 'ip': session.get('ip'),
+                'router': session.get('router') or routers.DEFAULT_ROUTER_ID, 'start': session['start'], 'end': None,
+                'last_seen': _iso(end), 'duration_s': int((end - start).total_seconds()),
+                'bytes_in': session.get('bytes_in', 0), 'bytes_out': session.get('bytes_out', 0),
+                'active': True}
+
+    def _apply_line(self, line):
+        self._journal.seq = max(self._journal.seq, line.get('seq', self._journal.seq + 1))
+        key = line.get('k')
+        if key and key not in self._key_set:
+            if len(self._keys) == self._keys.maxlen:
+                self._key_set.discard(self._keys[0])
+            self._keys.append(key)
+            self._key_set.add(key)
+        if line.get('late'):
+            return
+        router = line.get('r') or routers.DEFAULT_ROUTER_ID
+        self.router_polls[router] = line['t']
+        self.last_poll = max(self.last_poll or '', line['t'])
+        for session in line.get('leave', ()):
+            self.active.pop(session['key'], None)
+            self.recent.append({k: v for k, v in session.items() if k != 'key'})
+        for join in line.get('join', ()):
+            session = {k: v for k, v in join.items() if k != 'key'}
+            self.active[join['key']] = session
+            if session.get('mac'):
+                self.devices.add(session['mac'])
+        for k, ip in line.get('ip', {}).items():
+            if k in self.active:
+                self.active[k]['ip'] = ip
+        if 'u' in line:
+            for k, (uptime, bytes_in, bytes_out) in line['u'].items():
+                if k in self.active:
+                    self.active[k].update(uptime=uptime, bytes_in=bytes_in, bytes_out=bytes_out)
+            self.counters_due[router] = 0
+        else:
+            self.counters_due[router] = self.counters_due.get(router, 0) + 1
+
+    @staticmethod
+    def _router(session):
+        return session.get('router') or routers.DEFAULT_ROUTER_ID
+
+    def _router_poll(self, session):
+        return parse_timestamp(self.router_polls.get(self._router(session)))
+
+    # --- file -------------------------------------------------------------
+
+    def _locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        return store_lock.shared_lock(self.journal_file)
+
+    def _refresh(self):
+        """Memuat checkpoint/journal hanya jika berubah sejak pembacaan terakhir (di bawah lock)."""
+        if not self._loaded:
+            self._loaded = True
+            if self._import_legacy():
+                return
+        change = self._journal.poll()
+        if change == 'checkpoint':
+            self._load_checkpoint()
+        elif change == 'tail':
+            self._journal.replay(self._apply_line)
+
+    def _load_checkpoint(self):
+        state = self._journal.load_checkpoint({})
+        self._reset()
+        self.active = state.get('active', {})
+        self.devices = set(state.get('devices', []))
+        self.last_poll = state.get('last_poll')
+        # Checkpoint sebelum ada registry router hanya punya satu router
+        self.router_polls = state.get('routers') or (
+            {routers.DEFAULT_ROUTER_ID: self.last_poll} if self.last_poll else {})
+        self.counters_due = state.get('counters_due', {})
+        self.recent.extend(state.get('recent', []))
+        for key in state.get('keys', []):
+            self._keys.append(key)
+        self._key_set = set(self._keys)
+        self._journal.replay(self._apply_line)
+
+    def _write(self, lines, polls, closed):
+        self._journal.append(lines)
+        by_month = {}
+        for poll in polls:
+            by_month.setdefault(('polls-', poll['t'][:7]), []).append(poll)
+        for session in closed:
+            record = {k: v for k, v in session.items() if k != 'key'}
+            by_month.setdefault(('sessions-', session['end'][:7]), []).append(record)
+        for (prefix, month), records in by_month.items():
+            append_lines(os.path.join(self.directory, f"{prefix}{month}.jsonl"), records)
+        if self._journal.pending >= self.checkpoint_every:
+            self._write_checkpoint()
+
+    def _write_checkpoint(self):
+        self._journal.checkpoint({'last_poll': self.last_poll, 'routers': self.router_polls,
+                                  'counters_due': self.counters_due, 'active': self.active,
+                                  'devices': sorted(self.devices), 'recent': list(self.recent),
+                                  'keys': list(self._keys)})
+
+    def _import_legacy(self):
+        """Sekali saja: memutar ulang snapshot user_log.json lama jika store masih kosong."""
+        if not self.legacy_file or not os.path.exists(self.legacy_file) or \
+                os.path.exists(self.checkpoint_file) or os.path.exists(self.journal_file):
+            return False
+        try:
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                snapshots = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        snapshots = [s for s in snapshots if isinstance(s, dict) and isinstance(s.get('users'), list)]
+        print(f"Mengimpor {len(snapshots)} snapshot dari {self.legacy_file} ke {self.directory}/")
+        self._reset()
+        self.apply_snapshots(snapshots)
+        self._write_checkpoint()
+        return True
+
+    def _monthly_files(self, prefix):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.directory, n) for n in sorted(names)
+                if n.startswith(prefix) and n.endswith('.jsonl')]
+
+    def _session_files(self, since=None):
+        files = self._monthly_files('sessions-')
+        if since:
+            # Sesi disimpan di bulan waktu selesainya: yang overlap `since` ada di bulan itu atau sesudahnya
+            files = [p for p in files if os.path.basename(p)[len('sessions-'):-len('.jsonl')] >= since]
+        return files
+
+    def _load_index(self, path):
+        """Indeks per hari {YYYY-MM-DD: [(start, end, offset)]} untuk satu file sesi bulanan."""
+        signature = file_signature(path)
+        cached = self._session_index.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        index = {}
+        for offset, session in read_jsonl(path):
+            start, end = parse_timestamp(session.get('start')), parse_timestamp(session.get('end'))
+            if start is None or end is None:
+                continue
+            entry = (start.timestamp(), end.timestamp(), offset)
+            day = start.date()
+            while day <= end.date():
+                index.setdefault(day.isoformat(), []).append(entry)
+                day += timedelta(days=1)
+        self._session_index[path] = (signature, index)
+        return index
+
+    @staticmethod
+    def _read_at(path, offsets):
+        if not offsets:
+            return []
+        sessions = []
+        with open(path, 'rb') as f:
+            for offset in offsets:
+                f.seek(offset)
+                sessions.append(json.loads(f.readline()))
+        return sessions
@@ -0,0 +1,441 @@
+"""
+Repository inventaris ONT dengan indeks dan journal.
+
+onts.json tetap menjadi snapshot utama (list ONT biasa, dibaca juga oleh skrip
+lain). Perubahan satu record dari route admin ditulis sebagai satu baris di
+journal (onts.journal.jsonl) alih-alih menulis ulang seluruh file; journal
+dilipat kembali ke snapshot (compaction) setelah melewati ambang tertentu atau
+saat ping_check.py menulis status terbaru. Offset, baris terpotong dan muat
+ulang journal dikelola journal_store.Journal, sama seperti store sesi hotspot.
+
+Indeks yang dipelihara:
+  - primer: id -> record
+  - sekunder: id_pelanggan -> {id}, ip -> {id} (unik untuk setiap penulisan baru)
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+import journal_store
+import metrics
+import request_log
+from store_lock import FileLock, lock_path
+
+UNIQUE_FIELDS = ('id_pelanggan', 'ip')
+# Field yang diisi ping_check; tidak ikut dihitung dalam versi record
+DYNAMIC_FIELDS = ('status', 'rto_count', 'last_on', 'rx_power')
+COMPACT_THRESHOLD = 500
+# Transaksi sebesar ini langsung ditulis sebagai snapshot, bukan satu baris journal raksasa
+LARGE_TRANSACTION_OPS = 1000
+KEEP_BACKUPS = 20
+
+IO_SECONDS = metrics.histogram('ont_inventory_io_seconds', 'Durasi baca/tulis file inventaris ONT', ('operation',))
+SNAPSHOT_BYTES = metrics.histogram('ont_inventory_snapshot_bytes', 'Ukuran onts.json yang ditulis',
+                                   buckets=metrics.SIZE_BUCKETS)
+
+
+def _timed(operation):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                with request_log.phase('store'):
+                    return func(*args, **kwargs)
+            finally:
+                IO_SECONDS.observe(time.perf_counter() - started, operation=operation)
+        return wrapper
+    return decorator
+
+
+class DuplicateKeyError(ValueError):
+    """Nilai id_pelanggan/ip sudah dipakai ONT lain."""
+
+    def __init__(self, field, value, owner_id):
+        super().__init__(f"{field} '{value}' sudah dipakai ONT id {owner_id}")
+        self.field = field
+        self.value = value
+        self.owner_id = owner_id
+
+
+class RecordNotFoundError(KeyError):
+    """ONT dengan id tersebut tidak ada."""
+
+    def __init__(self, ont_id):
+        super().__init__(ont_id)
+        self.ont_id = ont_id
+
+    def __str__(self):
+        return f"ONT id {self.ont_id} tidak ditemukan"
+
+
+def record_version(record):
+    """Versi optimistic-concurrency: hash isi record tanpa field status dinamis.
+
+    Perubahan status dari ping_check tidak mengubah versi, jadi edit admin hanya
+    konflik dengan edit admin lain.
+    """
+    editable = {k: v for k, v in record.items() if k not in DYNAMIC_FIELDS}
+    digest = hashlib.sha1(json.dumps(editable, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+class Transaction:
+    """Sekumpulan perubahan yang di-stage lalu ditulis sekaligus (semua atau tidak sama sekali)."""
+
+    def __init__(self, repo):
+        self._repo = repo
+        self._staged = {}          # id -> record, atau None untuk delete
+        self._staged_keys = {f: {} for f in UNIQUE_FIELDS}  # value -> set(id) dari record yang di-stage
+        self._next_id = repo._next_id
+        self.aborted = False
+
+    def abort(self):
+        """Batalkan transaksi: tidak ada perubahan yang ditulis (dipakai untuk dry-run)."""
+        self.aborted = True
+
+    def get(self, ont_id):
+        if ont_id in self._staged:
+            record = self._staged[ont_id]
+        else:
+            record = self._repo._records.get(ont_id)
+        return dict(record) if record is not None else None
+
+    def insert(self, record):
+        record = dict(record)
+        record['id'] = self._next_id
+        self._next_id += 1
+        self._stage(record['id'], record)
+        return dict(record)
+
+    def update(self, ont_id, changes):
+        current = self.get(ont_id)
+        if current is None:
+            raise RecordNotFoundError(ont_id)
+        current.update(changes)
+        current['id'] = ont_id
+        self._stage(ont_id, current)
+        return dict(current)
+
+    def delete(self, ont_id):
+        current = self.get(ont_id)
+        if current is None:
+            raise RecordNotFoundError(ont_id)
+        self._stage(ont_id, None)
+        return current
+
+    def find_ids(self, field, value):
+        """Id ONT (termasuk perubahan yang di-stage) dengan nilai id_pelanggan/ip tertentu."""
+        return sorted(self._owners(field, str(value or '').strip()))
+
+    def ids(self):
+        """Semua id yang hidup setelah perubahan yang di-stage."""
+        live = [i for i in self._repo._records if self._staged.get(i, True) is not None]
+        live.extend(i for i, r in self._staged.items() if r is not None and i not in self._repo._records)
+        return live
+
+    @property
+    def changes(self):
+        return dict(self._staged)
+
+    def _owners(self, field, value):
+        committed = self._repo._secondary[field].get(value, ())
+        owners = {i for i in committed if i not in self._staged}
+        owners.update(self._staged_keys[field].get(value, ()))
+        return owners
+
+    def _stage(self, ont_id, record):
+        previous = self.get(ont_id)
+        if record is not None:
+            for field in UNIQUE_FIELDS:
+                value = _key_value(record, field)
+                if not value or value == _key_value(previous or {}, field):
+                    continue
+                clash = self._owners(field, value) - {ont_id}
+                if clash:
+                    raise DuplicateKeyError(field, value, min(clash))
+        old_staged = self._staged.get(ont_id)
+        if old_staged is not None:
+            for field in UNIQUE_FIELDS:
+                value = _key_value(old_staged, field)
+                if value:
+                    self._staged_keys[field].get(value, set()).discard(ont_id)
+        self._staged[ont_id] = record
+        if record is not None:
+            for field in UNIQUE_FIELDS:
+                value = _key_value(record, field)
+                if value:
+                    self._staged_keys[field].setdefault(value, set()).add(ont_id)
+
+
+def _key_value(record, field):
+    return str(record.get(field) or '').strip()
+
+
+class InventoryRepository:
+    """Inventaris ONT di memori + snapshot onts.json + journal perubahan."""
+
+    def __init__(self, data_file='onts.json', journal_file=None, meta_file=None,
+                 backup_dir='backups', compact_threshold=COMPACT_THRESHOLD):
+        self.data_file = data_file
+        base, _ = os.path.splitext(data_file)
+        self.journal_file = journal_file or f"{base}.journal.jsonl"
+        self.meta_file = meta_file or f"{base}.meta.json"
+        self.backup_dir = backup_dir
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(lock_path(data_file))
+        self._lock_depth = 0
+        self._listeners = []
+        self._records = {}
+        self._secondary = {f: {} for f in UNIQUE_FIELDS}
+        self._next_id = 1
+        self._journal = journal_store.Journal(data_file, self.journal_file)
+        self._journal_entries = 0
+        self.generation = 0
+
+    # --- listener -----------------------------------------------------------
+
+    def add_listener(self, listener):
+        """Listener memiliki method apply(record), remove(id) dan sync(records)."""
+        with self._lock:
+            self._listeners.append(listener)
+            if self._journal.signature is not None:
+                listener.sync(list(self._records.values()))
+
+    # --- baca ---------------------------------------------------------------
+
+    def refresh(self):
+        """Memuat ulang snapshot/journal hanya jika berubah sejak pembacaan terakhir."""
+        with self._lock:
+            change = self._journal.poll()
+            if change == 'checkpoint':
+                self._reload()
+            elif change == 'tail':
+                self._replay_journal_tail()
+        return self
+
+    def all(self):
+        self.refresh()
+        with self._lock:
+            return [dict(r) for r in self._records.values()]
+
+    def get(self, ont_id):
+        self.refresh()
+        with self._lock:
+            record = self._records.get(ont_id)
+            return dict(record) if record is not None else None
+
+    def find_by(self, field, value):
+        """Mencari ONT lewat indeks sekunder (id_pelanggan atau ip)."""
+        self.refresh()
+        with self._lock:
+            ids = self._secondary[field].get(str(value or '').strip(), ())
+            return [dict(self._records[i]) for i in sorted(ids)]
+
+    def __len__(self):
+        return len(self._records)
+
+    # --- tulis --------------------------------------------------------------
+
+    @contextmanager
+    def transaction(self, compact=False):
+        """Stage perubahan lalu commit sekali di akhir blok.
+
+        Default-nya commit menjadi satu baris journal; compact=True (atau transaksi
+        yang sangat besar) menulis snapshot penuh, misalnya ping_check yang
+        menyentuh semua record.
+        Jika blok melempar exception atau memanggil tx.abort(), tidak ada yang ditulis.
+        """
+        with self._locked():
+            self.refresh()
+            tx = Transaction(self)
+            yield tx
+            if not tx.aborted:
+                self._commit(tx, compact=compact)
+
+    def insert(self, record):
+        with self.transaction() as tx:
+            return tx.insert(record)
+
+    def update(self, ont_id, changes):
+        with self.transaction() as tx:
+            return tx.update(ont_id, changes)
+
+    def delete(self, ont_id):
+        with self.transaction() as tx:
+            return tx.delete(ont_id)
+
+    def compact(self, backup=True):
+        """Melipat journal ke onts.json dan mengosongkan journal."""
+        with self._locked():
+            self.refresh()
+            self._write_snapshot(backup=backup)
+
+    def compact_pending(self, backup=False):
+        """Compact hanya jika journal berisi perubahan; True jika compact dijalankan."""
+        with self._locked():
+            if not self._journal.size():
+                return False
+            self.compact(backup=backup)
+            return True
+
+    # --- internal -----------------------------------------------------------
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            if self._lock_depth == 0:
+                self._file_lock.acquire()
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    self._file_lock.release()
+
+    @_timed('reload')
+    def _reload(self):
+        snapshot = self._journal.load_checkpoint([])
+        try:
+            with open(self.meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            meta = {}
+        self._records = {}
+        self._secondary = {f: {} for f in UNIQUE_FIELDS}
+        for record in snapshot:
+            if isinstance(record, dict) and record.get('id') is not None:
+                self._put(record)
+        self._next_id = max(int(meta.get('next_id', 1)), max(self._records, default=0) + 1)
+        self._journal_entries = 0
+        self._replay_journal_tail(notify=False)
+        self.generation += 1
+        for listener in self._listeners:
+            listener.sync(list(self._records.values()))
+
+    @_timed('journal_replay')
+    def _replay_journal_tail(self, notify=True):
+        offset = self._journal.offset
+        self._journal_entries += self._journal.replay(lambda entry: self._apply_entry(entry, notify=notify))
+        if self._journal.offset != offset:
+            self.generation += 1
+
+    def _apply_entry(self, entry, notify=True):
+        ops = entry.get('ops', [])
+        if notify and len(ops) > LARGE_TRANSACTION_OPS:
+            # Perubahan besar: listener disinkronkan sekali, bukan per record
+            self._apply_entry(entry, notify=False)
+            for listener in self._listeners:
+                listener.sync(list(self._records.values()))
+            return
+        for op in ops:
+            if op.get('op') == 'put':
+                record = op['record']
+                self._put(record)
+                if notify:
+                    for listener in self._listeners:
+                        listener.apply(record)
+            elif op.get('op') == 'del':
+                self._drop(op['id'])
+                if notify:
+                    for listener in self._listeners:
+                        listener.remove(op['id'])
+        self._next_id = max(self._next_id, int(entry.get('next_id', 1)))
+
+    def _put(self, record):
+        ont_id = record['id']
+        self._unindex_secondary(ont_id)
+        record = dict(record)
+        self._records[ont_id] = record  # update di tempat agar urutan onts.json tetap
+        for field in UNIQUE_FIELDS:
+            value = _key_value(record, field)
+            if value:
+                self._secondary[field].setdefault(value, set()).add(ont_id)
+
+    def _drop(self, ont_id):
+        self._unindex_secondary(ont_id)
+        self._records.pop(ont_id, None)
+
+    def _unindex_secondary(self, ont_id):
+        old = self._records.get(ont_id)
+        if old is None:
+            return
+        for field in UNIQUE_FIELDS:
+            value = _key_value(old, field)
+            owners = self._secondary[field].get(value)
+            if owners is not None:
+                owners.discard(ont_id)
+                if not owners:
+                    del self._secondary[field][value]
+
+    @_timed('commit')
+    def _commit(self, tx, compact=False):
+        staged = tx.changes
+        if not staged and tx._next_id == self._next_id:
+            return
+        ops = []
+        for ont_id, record in staged.items():
+            if record is None:
+                ops.append({'op': 'del', 'id': ont_id})
+            else:
+                ops.append({'op': 'put', 'record': record})
+        entry = {
+            'ts': datetime.now().isoformat(timespec='seconds'),
+            'ops': ops,
+            'next_id': tx._next_id,
+        }
+        if compact or len(ops) > LARGE_TRANSACTION_OPS:
+            self._apply_entry(entry)
+            self._write_snapshot(backup=False)
+            return
+        self._journal.append([entry], fsync=True)
+        self._apply_entry(entry)
+        self._journal_entries += 1
+        self.generation += 1
+        if self._journal_entries >= self.compact_threshold:
+            self._write_snapshot(backup=True)
+
+    @_timed('snapshot_write')
+    def _write_snapshot(self, backup=True):
+        records = list(self._records.values())
+        # next_id ditulis dulu dan juga lewat file sementara: meta yang terpotong atau
+        # tertinggal dari snapshot membuat id ONT yang sudah dihapus dipakai ulang
+        journal_store.write_atomic(self.meta_file, json.dumps({'next_id': self._next_id}))
+        if backup:
+            self._backup_snapshot()
+        SNAPSHOT_BYTES.observe(journal_store.write_atomic(self.data_file, json.dumps(records, indent=2,
+                                                                                     ensure_ascii=False)))
+        # Journal dikosongkan setelah snapshot baru aman di disk
+        self._journal.truncate()
+        self._journal_entries = 0
+        self.generation += 1
+
+    def _backup_snapshot(self):
+        try:
+            if not os.path.exists(self.data_file):
+                return
+            os.makedirs(self.backup_dir, exist_ok=True)
+            timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            backup_path = os.path.join(self.backup_dir, f'onts-{timestamp}.json')
+            with open(self.data_file, 'rb') as src, open(backup_path, 'wb') as dst:
+                dst.write(src.read())
+            backups = sorted(
+                (os.path.join(self.backup_dir, n) for n in os.listdir(self.backup_dir)
+                 if n.startswith('onts-') and n.endswith('.json') and n[5:13].isdigit()),
+                key=os.path.getmtime, reverse=True,
+            )
+            for old_file in backups[KEEP_BACKUPS:]:
+                try:
+                    os.remove(old_file)
+                except OSError:
+                    pass
+        except Exception as e:
+            print(f"Warning: Failed to backup onts: {e}")
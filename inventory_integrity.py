@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Pemindai integritas inventaris ONT dalam satu lintasan.
+
+Memeriksa sekaligus:
+  - duplikat persis untuk id, id_pelanggan dan IP
+  - koordinat yang hampir sama (spatial hashing grid, radius dalam meter)
+  - nama yang bertabrakan setelah normalisasi token ('RT 05 RW 3' == 'rw 3 rt 5',
+    tetapi 'RT 5 RW 20' != 'RT 20 RW 5')
+  - IP kosong/tidak valid dan koordinat kosong/tidak valid
+
+Setiap record hanya dibandingkan dengan record di sel grid tetangga, sehingga
+waktu eksekusi mendekati linear, bukan berpasangan. Lebar sel bujur dihitung
+sekali dari lintang terjauh armada, jadi semua titik memakai grid yang sama.
+
+Penggunaan:
+    python inventory_integrity.py [--radius 20] [--output reports/integrity]
+"""
+
+import argparse
+import ipaddress
+import json
+import math
+import os
+import re
+from collections import defaultdict
+from datetime import datetime
+
+DEFAULT_RADIUS_M = 20.0
+MAX_RADIUS_M = 5000.0
+REPORTS_DIR = os.path.join('reports', 'integrity')
+KEEP_REPORTS = 30
+METERS_PER_DEG_LAT = 110540.0
+METERS_PER_DEG_LON = 111320.0
+_TOKEN_RE = re.compile(r'[a-z]+|\d+')
+
+
+def normalize_name(name):
+    """Kunci token nama: huruf kecil, angka tanpa nol di depan, unit diurutkan.
+
+    Label yang langsung diikuti angka ('rt 5', 'rw 20') menjadi satu unit agar
+    pasangan label/nomor tidak tertukar saat diurutkan.
+    """
+    tokens = _TOKEN_RE.findall((name or '').lower())
+    units = []
+    for token in tokens:
+        if token.isdigit():
+            token = str(int(token))
+            if units and units[-1].isalpha():
+                units[-1] = f"{units[-1]} {token}"
+                continue
+        units.append(token)
+    return ' '.join(sorted(units))
+
+
+def _coordinate(record):
+    """Mengembalikan (lat, lon) atau (None, alasan) jika kosong/tidak valid."""
+    lat, lon = record.get('latitude'), record.get('longitude')
+    if lat in (None, '') or lon in (None, ''):
+        return None, 'kosong'
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None, 'bukan angka'
+    if lat == 0 and lon == 0:
+        return None, 'koordinat 0,0'
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None, 'di luar rentang'
+    return (lat, lon), None
+
+
+def _distance_m(a, b):
+    dy = (a[0] - b[0]) * METERS_PER_DEG_LAT
+    dx = (a[1] - b[1]) * METERS_PER_DEG_LON * math.cos(math.radians((a[0] + b[0]) / 2))
+    return math.hypot(dx, dy)
+
+
+def _brief(record):
+    return {
+        'id': record.get('id'),
+        'id_pelanggan': record.get('id_pelanggan'),
+        'name': record.get('name'),
+        'ip': record.get('ip'),
+    }
+
+
+def scan(records, radius_m=DEFAULT_RADIUS_M):
+    """Menjalankan semua pemeriksaan dalam satu lintasan; mengembalikan laporan (dict)."""
+    by_key = {'id': defaultdict(list), 'id_pelanggan': defaultdict(list), 'ip': defaultdict(list)}
+    by_name = defaultdict(list)
+    points = []
+    near_pairs = []
+    missing_ip, invalid_ip, missing_coord, invalid_coord = [], [], [], []
+
+    total = 0
+    for record in records:
+        total += 1
+        brief = _brief(record)
+        for field, index in by_key.items():
+            value = str(record.get(field) if record.get(field) is not None else '').strip()
+            if value:
+                index[value].append(brief)
+
+        name_key = normalize_name(record.get('name'))
+        if name_key:
+            by_name[name_key].append(brief)
+
+        ip = str(record.get('ip') or '').strip()
+        if not ip:
+            missing_ip.append(brief)
+        else:
+            try:
+                ipaddress.ip_address(ip)
+            except ValueError:
+                invalid_ip.append(dict(brief, reason='format IP tidak valid'))
+
+        point, reason = _coordinate(record)
+        if point is None:
+            target = missing_coord if reason in ('kosong', 'koordinat 0,0') else invalid_coord
+            target.append(dict(brief, reason=reason))
+            continue
+        points.append((point, brief, name_key))
+
+    # Ukuran sel dalam derajat, sama untuk semua titik. Bujur diskalakan dengan
+    # lintang terjauh: di sana satu derajat bujur paling pendek, jadi sel cukup
+    # lebar untuk radius di lintang mana pun dalam armada.
+    cell_lat = radius_m / METERS_PER_DEG_LAT
+    max_lat = max((abs(p[0]) for p, _, _ in points), default=0.0)
+    cell_lon = radius_m / (METERS_PER_DEG_LON * max(math.cos(math.radians(max_lat)), 0.01))
+    grid = defaultdict(list)
+    for point, brief, name_key in points:
+        cx, cy = int(math.floor(point[1] / cell_lon)), int(math.floor(point[0] / cell_lat))
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for other_point, other, other_name in grid.get((cx + dx, cy + dy), ()):
+                    distance = _distance_m(point, other_point)
+                    if distance <= radius_m:
+                        near_pairs.append({
+                            'a': other, 'b': brief,
+                            'distance_m': round(distance, 2),
+                            'same_name': other_name == name_key,
+                        })
+        grid[(cx, cy)].append((point, brief, name_key))
+
+    duplicates = {
+        field: [{'value': value, 'records': items} for value, items in index.items() if len(items) > 1]
+        for field, index in by_key.items()
+    }
+    name_collisions = [
+        {'normalized': key, 'records': items}
+        for key, items in by_name.items()
+        if len(items) > 1
+    ]
+    near_pairs.sort(key=lambda p: p['distance_m'])
+
+    issues = {
+        'duplicate_id': len(duplicates['id']),
+        'duplicate_id_pelanggan': len(duplicates['id_pelanggan']),
+        'duplicate_ip': len(duplicates['ip']),
+        'near_duplicate_coordinates': len(near_pairs),
+        'name_collisions': len(name_collisions),
+        'missing_ip': len(missing_ip),
+        'invalid_ip': len(invalid_ip),
+        'missing_coordinates': len(missing_coord),
+        'invalid_coordinates': len(invalid_coord),
+    }
+    return {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'total_records': total,
+        'radius_m': radius_m,
+        'issue_counts': issues,
+        'clean': not any(issues.values()),
+        'duplicates': duplicates,
+        'near_duplicate_coordinates': near_pairs,
+        'name_collisions': name_collisions,
+        'missing_ip': missing_ip,
+        'invalid_ip': invalid_ip,
+        'missing_coordinates': missing_coord,
+        'invalid_coordinates': invalid_coord,
+    }
+
+
+def write_report(report, reports_dir=REPORTS_DIR, keep=KEEP_REPORTS):
+    """Menyimpan laporan JSON ke reports/integrity/ dan membersihkan laporan lama."""
+    os.makedirs(reports_dir, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(reports_dir, f'integrity-{timestamp}.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    old_reports = sorted(
+        (n for n in os.listdir(reports_dir) if n.startswith('integrity-') and n.endswith('.json')),
+        reverse=True,
+    )
+    for name in old_reports[keep:]:
+        try:
+            os.remove(os.path.join(reports_dir, name))
+        except OSError:
+            pass
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pemindaian integritas inventaris ONT.")
+    parser.add_argument('--radius', type=float, default=DEFAULT_RADIUS_M,
+                        help=f"Radius near-duplicate koordinat (meter, maks {MAX_RADIUS_M:g})")
+    parser.add_argument('--output', default=REPORTS_DIR, help="Folder laporan JSON")
+    parser.add_argument('--data', default='onts.json', help="File inventaris")
+    args = parser.parse_args(argv)
+    if not (math.isfinite(args.radius) and 0 < args.radius <= MAX_RADIUS_M):
+        parser.error(f"--radius harus di antara 0 dan {MAX_RADIUS_M:g} meter")
+
+    from inventory import InventoryRepository
+    report = scan(InventoryRepository(args.data).all(), radius_m=args.radius)
+    print(f"=== Integritas Inventaris ({report['total_records']} ONT) ===")
+    for name, count in report['issue_counts'].items():
+        print(f"   {'✅' if count == 0 else '⚠️ '} {name}: {count}")
+    print(f"Laporan disimpan ke {write_report(report, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Checkpoint + journal JSONL yang dipakai bersama beberapa worker.
+
+Dipakai inventory.py (onts.json + onts.journal.jsonl), hotspot_sessions.py
+(active.json + events.jsonl) dan hotspot_bandwidth.py (bandwidth.json +
+bandwidth.jsonl): state lengkap sesekali ditulis atomik ke file checkpoint,
+perubahan di antaranya di-append ke journal, dan setiap proses memutar ulang
+ekor journal di bawah file lock-nya sendiri sebelum membaca atau menulis.
+
+Journal mengurus bagian yang sama untuk semua store: offset baca, baris
+terakhir yang terpotong (crash saat menulis), muat ulang saat checkpoint
+berganti atau journal menyusut, dan gerbang `seq` agar baris yang sudah masuk
+checkpoint tidak diterapkan dua kali.
+
+Penggunaan (di bawah lock store):
+    journal = Journal('active.json', 'events.jsonl')
+    change = journal.poll()
+    if change == 'checkpoint':
+        state = journal.load_checkpoint({})
+        journal.replay(apply)
+    elif change == 'tail':
+        journal.replay(apply)
+    journal.append([{'seq': journal.seq + 1, ...}])
+    journal.checkpoint(state)
+"""
+
+import json
+import os
+import tempfile
+
+
+def file_signature(path):
+    try:
+        st = os.stat(path)
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def _complete_lines(path, offset):
+    """(offset_baris, panjang_baris, record) untuk setiap baris JSON lengkap mulai dari `offset`."""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b'\n'):
+            break  # baris terakhir belum lengkap (sedang ditulis / crash)
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            break
+        yield offset, len(line), record
+        offset += len(line)
+
+
+def read_jsonl(path, offset=0):
+    """(offset_baris, record) untuk setiap baris lengkap di file JSONL."""
+    for line_offset, _, record in _complete_lines(path, offset):
+        yield line_offset, record
+
+
+def _json_line(record):
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def append_lines(path, records):
+    data = ''.join(_json_line(r) for r in records)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(data)
+    return len(data.encode('utf-8'))
+
+
+def write_atomic(path, text):
+    """Menulis `text` lewat file sementara + fsync + os.replace; mengembalikan jumlah byte."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}-", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            size = f.tell()
+            try:
+                os.fsync(f.fileno())
+            except OSError:
+                pass
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return size
+
+
+class Journal:
+    """Posisi satu pasangan checkpoint + journal JSONL di satu proses."""
+
+    def __init__(self, checkpoint_file, journal_file):
+        self.checkpoint_file = checkpoint_file
+        self.journal_file = journal_file
+        self.signature = None      # signature checkpoint yang terakhir dimuat
+        self.offset = 0            # byte journal yang sudah diterapkan
+        self.seq = 0               # seq baris terakhir yang diterapkan
+        self.checkpoint_seq = 0
+
+    @property
+    def pending(self):
+        """Jumlah baris ber-seq sejak checkpoint terakhir."""
+        return self.seq - self.checkpoint_seq
+
+    def size(self):
+        try:
+            return os.path.getsize(self.journal_file)
+        except OSError:
+            return 0
+
+    def poll(self):
+        """'checkpoint' jika checkpoint berganti atau journal menyusut, 'tail' jika ada baris baru, selain itu None."""
+        size = self.size()
+        if file_signature(self.checkpoint_file) != self.signature or size < self.offset:
+            return 'checkpoint'
+        if size > self.offset:
+            return 'tail'
+        return None
+
+    def load_checkpoint(self, default):
+        """Isi checkpoint JSON (`default` jika tidak ada/rusak); journal akan dibaca dari awal."""
+        self.signature = file_signature(self.checkpoint_file)
+        try:
+            with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = default
+        self.offset = 0
+        self.seq = self.checkpoint_seq = data.get('seq', 0) if isinstance(data, dict) else 0
+        return data
+
+    def replay(self, apply):
+        """Menerapkan baris journal lengkap setelah offset; mengembalikan jumlah baris yang diterapkan.
+
+        Baris dengan `seq` yang sudah tercakup (<= seq sekarang) dilewati;
+        baris tanpa `seq` selalu diterapkan.
+        """
+        applied = 0
+        for offset, length, entry in _complete_lines(self.journal_file, self.offset):
+            seq = entry.get('seq')
+            if seq is None or seq > self.seq:
+                apply(entry)
+                applied += 1
+                if seq is not None:
+                    self.seq = seq
+            self.offset = offset + length
+        return applied
+
+    def append(self, entries, fsync=False):
+        """Append baris ke journal setelah membuang sisa baris yang tidak lengkap."""
+        data = ''.join(_json_line(e) for e in entries).encode('utf-8')
+        with open(self.journal_file, 'ab') as f:
+            if f.tell() != self.offset:
+                f.truncate(self.offset)  # buang sisa baris yang tidak lengkap
+            f.write(data)
+            f.flush()
+            if fsync:
+                try:
+                    os.fsync(f.fileno())
+                except OSError:
+                    pass
+        self.offset += len(data)
+        self.seq = max([self.seq] + [e['seq'] for e in entries if e.get('seq') is not None])
+
+    def checkpoint(self, state):
+        """Menulis state (dict) sebagai checkpoint atomik beserta seq-nya, lalu mengosongkan journal."""
+        write_atomic(self.checkpoint_file, json.dumps(dict(state, seq=self.seq), ensure_ascii=False,
+                                                      separators=(',', ':')))
+        self.truncate()
+
+    def truncate(self):
+        """Mengosongkan journal setelah checkpoint baru aman di disk."""
+        open(self.journal_file, 'w').close()
+        self.signature = file_signature(self.checkpoint_file)
+        self.offset = 0
+        self.checkpoint_seq = self.seq
+
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Load generator yang meniru polling browser dari halaman-halaman web app.
+
+Setiap klien virtual memodelkan satu tab browser: saat dibuka memuat halaman
+dan data awalnya, lalu menjalankan loop `setInterval` yang sama dengan
+template-nya (lihat PAGE_PROFILES). Seperti browser, timer tetap berjalan
+walau request sebelumnya belum selesai, dan tiap tab memakai maksimal
+6 koneksi keep-alive ke server.
+
+Klien HTTP/1.1 ditulis di atas asyncio stream (stdlib), jadi ribuan tab bisa
+disimulasikan dari satu proses tanpa dependensi tambahan.
+
+Penggunaan:
+    python loadgen.py --url http://127.0.0.1:5000 --map 20 --dashboard 5 --duration 120
+    python loadgen.py --spawn-scale 10000 --map 50 --speedup 5 --duration 60 --output hasil.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+MAX_CONNECTIONS_PER_CLIENT = 6
+REQUEST_TIMEOUT = 30
+
+# Pola request tiap halaman: `initial` saat tab dibuka, `polls` = (interval detik, [path]).
+PAGE_PROFILES = {
+    'map': {   # map.html: loadAllData() setiap 5 detik = /api/onts + /api/history
+        'initial': ['/', '/api/onts', '/api/history'],
+        'polls': [(5, ['/api/onts', '/api/history'])],
+    },
+    'dashboard': {   # dashboard.html: loadStats() 30 detik, addNewDataPoint() 20 detik
+        'initial': ['/dashboard', '/api/stats', '/api/history', '/api/history'],
+        'polls': [(30, ['/api/stats']), (20, ['/api/history'])],
+    },
+    'notifications': {   # notifications.html: refresh daftar setiap 30 detik
+        'initial': ['/notifications'],
+        'polls': [(30, ['/api/notifications'])],
+    },
+    'admin': {   # list.html: halaman pertama tabel + badge notifikasi setiap 30 detik
+        'initial': ['/admin', '/api/admin/onts?limit=100', '/api/notifications'],
+        'polls': [(30, ['/api/notifications'])],
+    },
+    'analytics': {   # analytics.html: loadAnalyticsData() setiap 30 detik
+        'initial': ['/analytics', '/api/analytics-data'],
+        'polls': [(30, ['/api/analytics-data'])],
+    },
+}
+
+
+class HttpError(Exception):
+    pass
+
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+
+class HttpClient:
+    """Klien HTTP/1.1 minimal dengan pool koneksi keep-alive (hanya GET)."""
+
+    def __init__(self, host, port, max_connections=MAX_CONNECTIONS_PER_CLIENT):
+        self.host = host
+        self.port = port
+        self._idle = []
+        self._slots = asyncio.Semaphore(max_connections)
+
+    async def get(self, path):
+        """Mengembalikan (status, jumlah byte body)."""
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+                connection = _Connection(reader, writer)
+            try:
+                status, size, keep_alive = await self._exchange(connection, path)
+            except BaseException:
+                connection.close()
+                raise
+            if keep_alive:
+                self._idle.append(connection)
+            else:
+                connection.close()
+            return status, size
+
+    async def _exchange(self, connection, path):
+        connection.writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            f"Accept: */*\r\nAccept-Encoding: gzip, deflate\r\nConnection: keep-alive\r\n"
+            f"User-Agent: monitoring-loadgen\r\n\r\n".encode('ascii'))
+        await connection.writer.drain()
+        reader = connection.reader
+        status_line = await reader.readline()
+        if not status_line:
+            raise HttpError("Koneksi ditutup server")
+        parts = status_line.decode('latin-1').split(None, 2)
+        version, status = parts[0], int(parts[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        connection_header = headers.get('connection', '').lower()
+        keep_alive = connection_header != 'close' and (version == 'HTTP/1.1' or connection_header == 'keep-alive')
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            size = 0
+            while True:
+                chunk_size = int((await reader.readline()).split(b';')[0], 16)
+                if chunk_size == 0:
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                size += len(await reader.readexactly(chunk_size))
+                await reader.readexactly(2)
+        elif 'content-length' in headers:
+            size = len(await reader.readexactly(int(headers['content-length'])))
+        else:
+            size = len(await reader.read())
+            keep_alive = False
+        return status, size, keep_alive
+
+    def close(self):
+        for connection in self._idle:
+            connection.close()
+        self._idle = []
+
+
+class Stats:
+    def __init__(self, measure_from):
+        self.measure_from = measure_from
+        self.routes = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def record(self, route, started, elapsed, status=None, size=0, error=None):
+        if started < self.measure_from:
+            return  # masih fase pemanasan
+        entry = self.routes.setdefault(route, {'latencies': [], 'errors': 0, 'bytes': 0, 'statuses': {}})
+        entry['latencies'].append(elapsed)
+        entry['bytes'] += size
+        key = str(status) if status is not None else type(error).__name__
+        entry['statuses'][key] = entry['statuses'].get(key, 0) + 1
+        if error is not None or status >= 400:
+            entry['errors'] += 1
+
+
+def _percentile(sorted_values, pct):
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+async def _fetch(client, path, stats):
+    route = 'GET ' + path.split('?')[0]
+    stats.in_flight += 1
+    stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+    started = time.monotonic()
+    try:
+        status, size = await asyncio.wait_for(client.get(path), REQUEST_TIMEOUT)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, HttpError, ValueError) as e:
+        stats.record(route, started, time.monotonic() - started, error=e)
+    else:
+        stats.record(route, started, time.monotonic() - started, status, size)
+    finally:
+        stats.in_flight -= 1
+
+
+async def _poll(client, interval, paths, stats, deadline, tasks):
+    # Fase timer acak: tab di dinding dibuka pada waktu yang berbeda-beda
+    next_tick = time.monotonic() + random.uniform(0, interval)
+    while True:
+        await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+        if time.monotonic() >= deadline:
+            return
+        for path in paths:
+            tasks.add(asyncio.create_task(_fetch(client, path, stats)))
+        next_tick += interval
+
+
+async def _browser_tab(page, host, port, stats, deadline, speedup, ramp_up, tasks):
+    profile = PAGE_PROFILES[page]
+    await asyncio.sleep(random.uniform(0, ramp_up))
+    client = HttpClient(host, port)
+    try:
+        for path in profile['initial']:
+            await _fetch(client, path, stats)
+        await asyncio.gather(*(_poll(client, interval / speedup, paths, stats, deadline, tasks)
+                               for interval, paths in profile['polls']))
+    finally:
+        client.close()
+
+
+def expected_rps(clients, speedup=1.0):
+    """Laju polling teoretis (request/detik) dari campuran klien, tanpa muatan awal."""
+    return sum(count * len(paths) * speedup / interval
+               for page, count in clients.items()
+               for interval, paths in PAGE_PROFILES[page]['polls'])
+
+
+async def run_load(host, port, clients, duration, warmup=10.0, ramp_up=None, speedup=1.0, seed=None):
+    """Menjalankan semua tab virtual; mengembalikan laporan per route."""
+    random.seed(seed)
+    if ramp_up is None:
+        ramp_up = min(warmup, 5.0)
+    started = time.monotonic()
+    stats = Stats(measure_from=started + warmup)
+    deadline = started + warmup + duration
+    tasks = set()
+    tabs = [asyncio.create_task(_browser_tab(page, host, port, stats, deadline, speedup, ramp_up, tasks))
+            for page, count in clients.items() for _ in range(count)]
+    await asyncio.gather(*tabs)
+    # Request yang masih berjalan saat waktu habis tetap ditunggu hasilnya
+    if tasks:
+        await asyncio.wait(tasks, timeout=REQUEST_TIMEOUT)
+    return build_report(stats, clients, duration, speedup)
+
+
+def build_report(stats, clients, duration, speedup):
+    routes, total, errors = [], 0, 0
+    for route, entry in sorted(stats.routes.items()):
+        times = sorted(t * 1000 for t in entry['latencies'])
+        total += len(times)
+        errors += entry['errors']
+        routes.append({
+            'route': route,
+            'requests': len(times),
+            'rps': round(len(times) / duration, 2),
+            'errors': entry['errors'],
+            'error_rate': round(entry['errors'] / len(times), 4),
+            'p50_ms': round(_percentile(times, 50), 2),
+            'p95_ms': round(_percentile(times, 95), 2),
+            'p99_ms': round(_percentile(times, 99), 2),
+            'max_ms': round(times[-1], 2),
+            'avg_bytes': round(entry['bytes'] / len(times)),
+            'statuses': entry['statuses'],
+        })
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'clients': clients,
+        'speedup': speedup,
+        'duration_s': duration,
+        'expected_rps': round(expected_rps(clients, speedup), 2),
+        'sustained_rps': round(total / duration, 2),
+        'requests': total,
+        'errors': errors,
+        'error_rate': round(errors / total, 4) if total else 0.0,
+        'max_in_flight': stats.max_in_flight,
+        'routes': routes,
+    }
+
+
+def print_report(report):
+    print(f"\n=== {report['requests']} request dalam {report['duration_s']}s: "
+          f"{report['sustained_rps']} RPS (model {report['expected_rps']} RPS), "
+          f"error {report['error_rate'] * 100:.2f}%, maks {report['max_in_flight']} paralel ===")
+    print(f"{'Route':<28} {'Req':>7} {'RPS':>8} {'Err%':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'Maks':>9}")
+    for r in report['routes']:
+        print(f"{r['route']:<28} {r['requests']:>7} {r['rps']:>8} {r['error_rate'] * 100:>6.2f}% "
+              f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} {r['max_ms']:>9}")
+
+
+# --- instance lokal ---------------------------------------------------------
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def spawn_local_app(scale, seed=1):
+    """Membuat dataset sintetis lalu menjalankan web app di port bebas; mengembalikan (proses, port, folder)."""
+    import benchmark
+    workdir = tempfile.mkdtemp(prefix=f'loadgen-{scale}-')
+    benchmark.generate_dataset(workdir, scale, seed)
+    port = _free_port()
+    log = open(os.path.join(workdir, 'server.log'), 'w')
+    proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), '_serve', '--dir', workdir,
+                             '--port', str(port)], stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Web app berhenti saat start, lihat {log.name}")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return proc, port, workdir
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("Web app tidak siap dalam 120 detik")
+
+
+def _serve(workdir, port):
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_DIR)
+    os.environ.setdefault('REQUEST_LOG_FILE', os.path.join(workdir, 'requests.jsonl'))
+    import app
+    app.app.run(host='127.0.0.1', port=port, threaded=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator polling browser untuk web app monitoring.")
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help="Base URL web app")
+    parser.add_argument('--spawn-scale', type=int,
+                        help="Jalankan web app lokal dengan dataset sintetis berukuran ini (abaikan --url)")
+    for page in PAGE_PROFILES:
+        parser.add_argument(f'--{page}', type=int, default=0, metavar='N', help=f"Jumlah tab halaman {page}")
+    parser.add_argument('--duration', type=float, default=60, help="Lama pengukuran (detik)")
+    parser.add_argument('--warmup', type=float, default=10, help="Detik awal yang tidak dihitung")
+    parser.add_argument('--speedup', type=float, default=1.0,
+                        help="Percepat semua interval polling (2 = dua kali lebih sering)")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--output', help="Simpan laporan JSON ke file ini")
+    parser.add_argument('--dir', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('mode', nargs='?', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.mode == '_serve':
+        _serve(args.dir, args.port)
+        return 0
+    if args.mode is not None:
+        parser.error(f"Argumen tidak dikenal: {args.mode}")
+
+    clients = {page: getattr(args, page) for page in PAGE_PROFILES if getattr(args, page) > 0}
+    if not clients:
+        clients = {'map': 10, 'dashboard': 3, 'notifications': 1, 'admin': 1}
+    if args.speedup <= 0:
+        parser.error("--speedup harus > 0")
+
+    proc = None
+    if args.spawn_scale:
+        proc, port, workdir = spawn_local_app(args.spawn_scale, args.seed or 1)
+        host = '127.0.0.1'
+        print(f"Web app lokal ({args.spawn_scale} ONT) di port {port}, data di {workdir}")
+    else:
+        target = urlsplit(args.url)
+        host, port = target.hostname, target.port or 80
+    print(f"Klien: {clients}; model {expected_rps(clients, args.speedup):.1f} RPS; "
+          f"pemanasan {args.warmup}s, pengukuran {args.duration}s")
+    try:
+        report = asyncio.run(run_load(host, port, clients, args.duration, args.warmup,
+                                      speedup=args.speedup, seed=args.seed))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Laporan disimpan ke {args.output}")
+    return 1 if report['requests'] == 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,8 @@ Menimpa data yang sama berdasarkan id_pelanggan
 import json
 from datetime import datetime
 
+from inventory import InventoryRepository, DuplicateKeyError
+
 def load_json_file(filename):
     """Memuat file JSON"""
     try:
@@ -92,49 +94,44 @@ def convert_csv_data(csv_data):
     
     return converted_data
 
-def merge_data(existing_data, new_data):
-    """Menggabungkan data, menimpa yang sama berdasarkan id_pelanggan"""
-    # Buat dictionary untuk data yang sudah ada berdasarkan id_pelanggan
-    existing_dict = {item['id_pelanggan']: item for item in existing_data}
-    
-    # Counter untuk ID baru
-    max_id = max([item['id'] for item in existing_data]) if existing_data else 0
-    
-    merged_data = existing_data.copy()
+def merge_data(tx, new_data):
+    """Menggabungkan data ke transaksi inventaris, menimpa yang sama berdasarkan id_pelanggan"""
     added_count = 0
     updated_count = 0
     
     for new_item in new_data:
         id_pelanggan = new_item['id_pelanggan']
+        existing_ids = tx.find_ids('id_pelanggan', id_pelanggan)
         
-        if id_pelanggan in existing_dict:
-            # Update data yang sudah ada
-            existing_item = existing_dict[id_pelanggan]
-            existing_item.update({
-                'name': new_item['name'],
-                'lokasi': new_item['lokasi'],
-                'ip': new_item['ip'],
-                'latitude': new_item['latitude'],
-                'longitude': new_item['longitude']
-            })
-            updated_count += 1
-            print(f"✓ Updated: {new_item['name']} ({id_pelanggan})")
-        else:
-            # Tambah data baru
-            max_id += 1
-            new_item['id'] = max_id
-            merged_data.append(new_item)
-            added_count += 1
-            print(f"✓ Added: {new_item['name']} ({id_pelanggan})")
+        try:
+            if existing_ids:
+                # Update data yang sudah ada
+                tx.update(existing_ids[0], {
+                    'name': new_item['name'],
+                    'lokasi': new_item['lokasi'],
+                    'ip': new_item['ip'],
+                    'latitude': new_item['latitude'],
+                    'longitude': new_item['longitude']
+                })
+                updated_count += 1
+                print(f"✓ Updated: {new_item['name']} ({id_pelanggan})")
+            else:
+                # Tambah data baru (id diberikan repository)
+                tx.insert(new_item)
+                added_count += 1
+                print(f"✓ Added: {new_item['name']} ({id_pelanggan})")
+        except DuplicateKeyError as e:
+            print(f"✗ Dilewati: {new_item['name']} ({id_pelanggan}): {e}")
     
-    return merged_data, added_count, updated_count
+    return added_count, updated_count
 
 def main():
     print("=== Merge Data ONT ===\n")
     
     # Load data yang sudah ada
     print("1. Memuat data existing dari onts.json...")
-    existing_data = load_json_file('onts.json')
+    inventory = InventoryRepository('onts.json')
+    existing_data = inventory.all()
     print(f"   Data existing: {len(existing_data)} item")
     
     # Load data dari CSV
@@ -151,25 +148,23 @@ def main():
     converted_data = convert_csv_data(csv_data)
     print(f"   Data yang valid: {len(converted_data)} item")
     
-    # Gabungkan data
-    print("\n4. Menggabungkan data...")
-    merged_data, added_count, updated_count = merge_data(existing_data, converted_data)
-    
-    print(f"\n5. Hasil penggabungan:")
-    print(f"   - Data existing: {len(existing_data)}")
-    print(f"   - Data baru ditambahkan: {added_count}")
-    print(f"   - Data diperbarui: {updated_count}")
-    print(f"   - Total data akhir: {len(merged_data)}")
-    
-    # Backup data lama
-    print("\n6. Membuat backup data lama...")
+    # Backup data lama (termasuk perubahan admin yang masih di journal)
+    print("\n4. Membuat backup data lama...")
     timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
     backup_filename = f'onts-backup-{timestamp}.json'
     save_json_file(backup_filename, existing_data)
     
-    # Simpan data yang sudah digabung
-    print("\n7. Menyimpan data yang sudah digabung...")
-    save_json_file('onts.json', merged_data)
+    # Gabungkan lalu simpan sebagai satu transaksi (snapshot penuh, journal dikosongkan)
+    print("\n5. Menggabungkan dan menyimpan data...")
+    with inventory.transaction(compact=True) as tx:
+        added_count, updated_count = merge_data(tx, converted_data)
+    print("Data berhasil disimpan ke onts.json")
+    
+    print(f"\n6. Hasil penggabungan:")
+    print(f"   - Data existing: {len(existing_data)}")
+    print(f"   - Data baru ditambahkan: {added_count}")
+    print(f"   - Data diperbarui: {updated_count}")
+    print(f"   - Total data akhir: {len(inventory)}")
     
     print(f"\n=== Selesai ===")
     print(f"Backup data lama: {backup_filename}")
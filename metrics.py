@@ -0,0 +1,279 @@
+"""
+Registry metrik ringan format Prometheus.
+
+Counter dan histogram diakumulasi per thread (setiap thread menulis ke dict
+miliknya sendiri tanpa lock); lock hanya dipakai saat thread pertama kali
+menulis dan saat scrape menjumlahkan semua shard. Jadi selama tidak ada yang
+melakukan scrape, biaya per observasi hanya beberapa operasi dict.
+
+Pemakaian:
+    REQUESTS = metrics.counter('http_requests_total', 'Jumlah request', ('method',))
+    REQUESTS.inc(method='GET')
+    with metrics.timer(LATENCY, route='/api/stats'):
+        ...
+    metrics.render()  # teks exposition untuk /metrics
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+# Shard milik thread yang sudah mati dilipat ke shard induk setiap sekian shard baru
+_FOLD_EVERY = 64
+
+
+def _label_key(names, labels):
+    if len(labels) != len(names):
+        raise ValueError(f"Label harus tepat {names}, diberikan {tuple(labels)}")
+    try:
+        return tuple([str(labels[n]) for n in names])
+    except KeyError:
+        raise ValueError(f"Label harus tepat {names}, diberikan {tuple(labels)}")
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (list(extra) if extra else [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Sharded:
+    """Dasar counter/histogram: satu dict per thread, dijumlahkan saat scrape."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []  # (thread, dict)
+        self._retired = {}
+        self._created = 0
+
+    def _shard(self):
+        """Shard thread ini; dibuat dan didaftarkan saat thread pertama kali menulis."""
+        shard = getattr(self._local, 'data', None)
+        if shard is None:
+            shard = self._local.data = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+                self._created += 1
+                if self._created % _FOLD_EVERY == 0:
+                    self._fold_dead()
+        return shard
+
+    def _fold_dead(self):
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                for key, value in list(shard.items()):
+                    self._merge(self._retired, key, value)
+        self._shards = alive
+
+    def _collect(self):
+        with self._lock:
+            self._fold_dead()
+            total = {}
+            for key, value in self._retired.items():
+                self._merge(total, key, value)
+            for _, shard in self._shards:
+                for key, value in list(shard.items()):
+                    self._merge(total, key, value)
+        return total
+
+
+class Counter(_Sharded):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels) if self.labelnames or labels else ()
+        shard = getattr(self._local, 'data', None)
+        if shard is None:
+            shard = self._shard()
+        shard[key] = shard.get(key, 0) + amount
+
+    @staticmethod
+    def _merge(total, key, value):
+        total[key] = total.get(key, 0) + value
+
+    def samples(self):
+        for key, value in sorted(self._collect().items()):
+            yield self.name, self.labelnames, key, None, value
+
+
+class Histogram(_Sharded):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels) if self.labelnames or labels else ()
+        shard = getattr(self._local, 'data', None)
+        if shard is None:
+            shard = self._shard()
+        state = shard.get(key)
+        if state is None:
+            state = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[i] += 1
+                break
+        else:
+            state[len(self.buckets)] += 1
+        state[-1] += value
+
+    @staticmethod
+    def _merge(total, key, value):
+        current = total.get(key)
+        if current is None:
+            total[key] = list(value)
+        else:
+            for i, v in enumerate(value):
+                current[i] += v
+
+    def samples(self):
+        for key, state in sorted(self._collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state):
+                cumulative += count
+                yield self.name + '_bucket', self.labelnames, key, ('le', _format_value(float(bound))), cumulative
+            yield self.name + '_sum', self.labelnames, key, None, state[-1]
+            yield self.name + '_count', self.labelnames, key, None, cumulative
+
+
+class Gauge:
+    """Nilai sesaat; `set_function` untuk gauge yang dihitung saat scrape (mis. panjang antrean)."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._function = None
+
+    def set(self, value, **labels):
+        self._values[_label_key(self.labelnames, labels) if self.labelnames else ()] = value
+
+    def set_function(self, function):
+        """`function()` mengembalikan angka, atau dict {tuple label: angka} untuk gauge berlabel."""
+        self._function = function
+
+    def samples(self):
+        values = dict(self._values)
+        if self._function is not None:
+            try:
+                result = self._function()
+            except Exception:
+                result = None
+            if isinstance(result, dict):
+                values.update(result)
+            elif result is not None:
+                values[()] = result
+        for key, value in sorted(values.items()):
+            yield self.name, self.labelnames, key, None, value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metrik {metric.name} sudah terdaftar dengan bentuk berbeda")
+                return existing  # modul yang di-import ulang memakai metrik yang sama
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labelnames, values, extra, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labelnames, values, [extra] if extra else None)} '
+                             f'{_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=()):
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def render():
+    return REGISTRY.render()
+
+
+@contextmanager
+def timer(hist, **labels):
+    """Mengukur durasi blok ke histogram (detik), juga jika blok melempar exception."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        hist.observe(time.perf_counter() - start, **labels)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrape berkala tidak perlu mengotori log
+
+
+def serve(port, host='0.0.0.0'):
+    """Menjalankan endpoint /metrics di thread background (untuk proses non-Flask seperti pinger)."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
@@ -0,0 +1,199 @@
+"""
+Arsip notifikasi bulanan terkompresi.
+
+notifications.json hanya menyimpan notifikasi "panas" (default 30 hari terakhir,
+maksimal sekian ribu entri); sisanya dipindahkan ke arsip per bulan:
+
+    archive/notifications/notifications-2026-09.jsonl.gz   (satu notifikasi per baris)
+    archive/notifications/index.json                       (ringkasan per bulan)
+
+Arsip hanya ditambah (setiap kompaksi menambah satu member gzip di akhir file),
+jadi notifikasi lama tidak pernah ditulis ulang. Index mencatat rentang waktu
+per bulan sehingga pencarian dengan rentang waktu hanya membuka file bulan
+yang relevan.
+
+Penggunaan:
+    archive = NotificationArchive('archive/notifications')
+    hot, expired = split_expired(notifications, datetime.now(), retention_days=30, hot_max=5000)
+    archive.append(expired)
+    archive.search(start=datetime(2026, 9, 1), end=datetime(2026, 9, 30, 23, 59), query='LOS')
+"""
+
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import store_lock
+
+ARCHIVE_DIR = os.path.join('archive', 'notifications')
+RETENTION_DAYS = 30
+HOT_MAX = 5000
+SEARCH_LIMIT = 500
+
+
+def parse_timestamp(value):
+    """Timestamp ISO (notifikasi, snapshot hotspot) -> datetime lokal naif (None jika tidak valid)."""
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def parse_bound(value, end=False):
+    """Batas rentang pencarian dari query string; tanggal saja untuk `end` berarti akhir hari itu."""
+    if not value:
+        return None
+    parsed = parse_timestamp(value)
+    if parsed is None:
+        raise ValueError(f"Format waktu tidak valid: {value}")
+    if end and len(value.strip()) == 10:
+        parsed += timedelta(days=1, microseconds=-1)
+    return parsed
+
+
+def matches(notification, start=None, end=None, query=None):
+    """True jika notifikasi berada dalam rentang [start, end] dan mengandung `query` (huruf kecil)."""
+    ts = parse_timestamp(notification.get('timestamp'))
+    if ts is None or (start is not None and ts < start) or (end is not None and ts > end):
+        return False
+    if query:
+        text = ' '.join(str(notification.get(k) or '') for k in ('message', 'ont_name', 'type'))
+        return query in text.lower()
+    return True
+
+
+def split_expired(notifications, now, retention_days=RETENTION_DAYS, hot_max=HOT_MAX):
+    """Memisahkan notifikasi yang tetap panas dari yang harus diarsipkan.
+
+    Diarsipkan: lebih tua dari `retention_days`, ditambah yang paling lama jika
+    jumlah sisanya masih melebihi `hot_max`. Notifikasi dengan timestamp tidak
+    valid tetap di set panas.
+    """
+    cutoff = now - timedelta(days=retention_days)
+    dated, undated = [], []
+    for notification in notifications:
+        ts = parse_timestamp(notification.get('timestamp'))
+        (dated if ts is not None else undated).append((ts, notification))
+    dated.sort(key=lambda item: item[0])
+    expired = [n for ts, n in dated if ts < cutoff]
+    hot = [(ts, n) for ts, n in dated if ts >= cutoff]
+    overflow = len(hot) + len(undated) - hot_max
+    if overflow > 0:
+        overflow = min(overflow, len(hot))
+        expired.extend(n for _, n in hot[:overflow])
+        hot = hot[overflow:]
+    hot_ids = {id(n) for _, n in hot} | {id(n) for _, n in undated}
+    # Urutan asli file dipertahankan untuk set panas
+    return [n for n in notifications if id(n) in hot_ids], expired
+
+
+class NotificationArchive:
+    def __init__(self, directory=ARCHIVE_DIR):
+        self.directory = directory
+        self.index_file = os.path.join(directory, 'index.json')
+
+    def month_file(self, month):
+        return os.path.join(self.directory, f"notifications-{month}.jsonl.gz")
+
+    def load_index(self):
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            index = {}
+        index.setdefault('months', {})
+        index.setdefault('max_id', 0)
+        return index
+
+    def max_id(self):
+        """ID notifikasi terbesar yang pernah diarsipkan (agar ID baru tidak bentrok)."""
+        return self.load_index()['max_id']
+
+    def append(self, notifications):
+        """Menambahkan notifikasi ke arsip bulanan; mengembalikan jumlah per bulan."""
+        by_month = {}
+        for notification in notifications:
+            ts = parse_timestamp(notification.get('timestamp'))
+            if ts is not None:
+                by_month.setdefault(ts.strftime('%Y-%m'), []).append((ts, notification))
+        if not by_month:
+            return {}
+        os.makedirs(self.directory, exist_ok=True)
+        with store_lock.shared_lock(self.index_file):
+            index = self.load_index()
+            for month, items in sorted(by_month.items()):
+                lines = ''.join(json.dumps(n, ensure_ascii=False, separators=(',', ':')) + '\n' for _, n in items)
+                # Mode 'ab' menambah member gzip baru; pembaca gzip membaca semua member berurutan
+                with gzip.open(self.month_file(month), 'ab') as f:
+                    f.write(lines.encode('utf-8'))
+                entry = index['months'].setdefault(month, {'file': os.path.basename(self.month_file(month)),
+                                                           'count': 0, 'first': None, 'last': None, 'max_id': 0})
+                times = [ts.isoformat() for ts, _ in items]
+                entry['count'] += len(items)
+                entry['first'] = min([t for t in (entry['first'], min(times)) if t])
+                entry['last'] = max([t for t in (entry['last'], max(times)) if t])
+                entry['max_id'] = max([entry['max_id']] + [_int_id(n) for _, n in items])
+                entry['bytes'] = os.path.getsize(self.month_file(month))
+            index['max_id'] = max([index['max_id']] + [e['max_id'] for e in index['months'].values()])
+            self._write_index(index)
+        return {month: len(items) for month, items in by_month.items()}
+
+    def search(self, start=None, end=None, query=None, limit=SEARCH_LIMIT):
+        """Notifikasi arsip dalam rentang [start, end] (terbaru dulu), opsional mengandung `query`."""
+        index = self.load_index()
+        needle = query.lower() if query else None
+        results = []
+        for month, entry in sorted(index['months'].items(), reverse=True):
+            if start is not None and entry.get('last') and parse_timestamp(entry['last']) < start:
+                continue
+            if end is not None and entry.get('first') and parse_timestamp(entry['first']) > end:
+                continue
+            for notification in self._read_month(month):
+                if matches(notification, start, end, needle):
+                    results.append((parse_timestamp(notification['timestamp']), notification))
+            if limit and len(results) >= limit:
+                break  # bulan berikutnya hanya berisi notifikasi yang lebih lama
+        results.sort(key=lambda item: item[0], reverse=True)
+        seen, unique = set(), []
+        for _, notification in results:
+            key = (notification.get('id'), notification.get('timestamp'))
+            if key in seen:
+                continue  # arsip ganda setelah kompaksi yang terputus
+            seen.add(key)
+            unique.append(dict(notification, archived=True))
+            if limit and len(unique) >= limit:
+                break
+        return unique
+
+    def _read_month(self, month):
+        path = self.month_file(month)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+        except FileNotFoundError:
+            return
+        except (EOFError, OSError) as e:
+            # Member terakhir belum lengkap (sedang ditulis / crash): baca sampai sebelum itu
+            print(f"Warning: arsip {path} terpotong: {e}")
+
+    def _write_index(self, index):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.index-', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.index_file)
+
+
+def _int_id(notification):
+    try:
+        return int(notification.get('id') or 0)
+    except (TypeError, ValueError):
+        return 0
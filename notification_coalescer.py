@@ -0,0 +1,263 @@
+"""
+Penggabungan (coalescing) dan rate limit notifikasi saat ONT flapping atau
+gangguan massal.
+
+Event notifikasi tidak langsung ditulis ke notifications.json. Event dengan
+kunci yang sama (ont_id + type; tanpa ont_id: type + pesan) dalam satu
+jendela waktu digabung menjadi satu notifikasi dengan `count`,
+`first_timestamp` dan `timestamp` (kejadian terakhir). Notifikasi baru
+(bukan gabungan) harus mendapat token dari bucket per ONT dan bucket global;
+event yang kehabisan token dijumlahkan ke satu notifikasi ringkasan
+"ditahan rate limit". Antrean ditulis sekaligus oleh thread background
+setiap `flush_interval` detik, jadi badai event hanya menghasilkan satu
+tulis file per flush.
+
+Bucket token berlaku per proses (per worker serve.py); penggabungan dengan
+notifikasi yang sudah ada di file dilakukan saat flush sehingga tetap
+konsisten antar-worker.
+
+Konfigurasi lewat environment (lihat from_env):
+    NOTIFY_WINDOW            jendela penggabungan dalam detik (default 300)
+    NOTIFY_FLUSH_INTERVAL    jeda flush antrean (default 5; 0 = langsung)
+    NOTIFY_ONT_BURST         notifikasi baru beruntun per ONT (default 3)
+    NOTIFY_ONT_PER_HOUR      isi ulang token per ONT per jam (default 12)
+    NOTIFY_GLOBAL_BURST      notifikasi baru beruntun seluruh armada (default 60)
+    NOTIFY_GLOBAL_PER_MIN    isi ulang token global per menit (default 30)
+
+Penggunaan:
+    coalescer = NotificationCoalescer(write_batch)   # write_batch(items) menulis ke file
+    coalescer.submit("ONT-12 OFF", "warning", ont_id=12, ont_name="ONT-12")
+"""
+
+import atexit
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import metrics
+
+RATE_LIMIT_TYPE = 'warning'
+MAX_TRACKED_KEYS = 20000
+
+EVENTS = metrics.counter('notification_events_total', 'Event notifikasi menurut hasil coalescing',
+                         ('result',))
+
+
+class TokenBucket:
+    def __init__(self, rate, burst, now):
+        self.rate = rate      # token per detik
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def take(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def full(self, now):
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+def coalesce_key(notification):
+    """Kunci penggabungan: (ont_id, type), atau (None, type, message) untuk notifikasi tanpa ONT."""
+    if notification.get('rate_limited'):
+        return ('rate-limit',)
+    ont_id = notification.get('ont_id')
+    if ont_id is not None:
+        return (ont_id, notification.get('type'))
+    return (None, notification.get('type'), notification.get('message'))
+
+
+def merge_into(target, item):
+    """Menggabungkan satu item antrean (atau notifikasi) ke notifikasi `target`."""
+    first = target.get('first_timestamp') or target.get('timestamp')
+    item_first = item.get('first_timestamp') or item['timestamp']
+    target['first_timestamp'] = min(first, item_first) if first else item_first
+    if item['timestamp'] >= target.get('timestamp', ''):
+        target['timestamp'] = item['timestamp']
+        target['message'] = item['message']
+        target['ont_name'] = item.get('ont_name') or target.get('ont_name')
+    target['count'] = target.get('count', 1) + item.get('count', 1)
+    target['read'] = False
+    if item.get('rate_limited'):
+        target['suppressed_onts'] = sorted(set(target.get('suppressed_onts', [])) | set(item['suppressed_onts']))
+        target['message'] = _rate_limit_message(target['count'], len(target['suppressed_onts']))
+    return target
+
+
+def _rate_limit_message(count, onts):
+    return f"{count} notifikasi ditahan karena rate limit ({onts} ONT)"
+
+
+class NotificationCoalescer:
+    def __init__(self, write_batch, window=300, flush_interval=5.0, ont_burst=3, ont_per_hour=12,
+                 global_burst=60, global_per_min=30):
+        self.write_batch = write_batch
+        self.window = window
+        self.flush_interval = flush_interval
+        self.ont_burst = ont_burst
+        self.ont_rate = ont_per_hour / 3600
+        self._global = TokenBucket(global_per_min / 60, global_burst, time.monotonic())
+        self._ont_buckets = {}
+        self._recent = {}     # kunci -> waktu monotonic event terakhir (notifikasi masih bisa digabung)
+        self._pending = {}    # kunci -> item yang menunggu flush
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    @classmethod
+    def from_env(cls, write_batch):
+        env = os.environ.get
+        return cls(write_batch, window=float(env('NOTIFY_WINDOW', 300)),
+                   flush_interval=float(env('NOTIFY_FLUSH_INTERVAL', 5)),
+                   ont_burst=int(env('NOTIFY_ONT_BURST', 3)), ont_per_hour=float(env('NOTIFY_ONT_PER_HOUR', 12)),
+                   global_burst=int(env('NOTIFY_GLOBAL_BURST', 60)),
+                   global_per_min=float(env('NOTIFY_GLOBAL_PER_MIN', 30)))
+
+    def submit(self, message, notification_type='info', ont_id=None, ont_name=None, timestamp=None):
+        """Mengantrekan satu event; mengembalikan 'new', 'coalesced' atau 'suppressed'."""
+        item = {'message': message, 'type': notification_type, 'ont_id': ont_id, 'ont_name': ont_name,
+                'timestamp': timestamp or datetime.now().isoformat()}
+        key = coalesce_key(item)
+        now = time.monotonic()
+        with self._lock:
+            if key in self._pending or now - self._recent.get(key, float('-inf')) <= self.window:
+                result = 'coalesced'
+            elif self._take_tokens(ont_id, now):
+                result = 'new'
+            else:
+                result = 'suppressed'
+                key = ('rate-limit',)
+                item = {'message': '', 'type': RATE_LIMIT_TYPE, 'ont_id': None, 'ont_name': None,
+                        'timestamp': item['timestamp'], 'rate_limited': True,
+                        'suppressed_onts': [ont_id] if ont_id is not None else []}
+            if key in self._pending:
+                merge_into(self._pending[key], item)
+            else:
+                if item.get('rate_limited'):
+                    item['message'] = _rate_limit_message(1, len(item['suppressed_onts']))
+                self._pending[key] = item
+            self._recent[key] = now
+            if len(self._recent) > MAX_TRACKED_KEYS:
+                self._evict(now)
+        EVENTS.inc(result=result)
+        if self.flush_interval <= 0:
+            self.flush()
+        elif self._thread is None:
+            self._start()
+        return result
+
+    def flush(self):
+        """Menulis semua item yang mengantre lewat `write_batch` (satu tulis file).
+
+        Jika `write_batch` gagal, item dikembalikan ke antrean (digabung dengan
+        event yang masuk selama penulisan) lalu exception diteruskan.
+        """
+        with self._flush_lock:
+            with self._lock:
+                items, self._pending = list(self._pending.values()), {}
+            if items:
+                try:
+                    self.write_batch(items, self.window)
+                except BaseException:
+                    self._requeue(items)
+                    raise
+            return len(items)
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    # --- internal -----------------------------------------------------------
+
+    def _requeue(self, items):
+        with self._lock:
+            for item in items:
+                key = coalesce_key(item)
+                newer = self._pending.get(key)
+                self._pending[key] = merge_into(item, newer) if newer is not None else item
+
+    def _take_tokens(self, ont_id, now):
+        bucket = None
+        if ont_id is not None:
+            bucket = self._ont_buckets.get(ont_id)
+            if bucket is None:
+                bucket = self._ont_buckets[ont_id] = TokenBucket(self.ont_rate, self.ont_burst, now)
+            if not bucket.take(now):
+                return False
+        if not self._global.take(now):
+            if bucket is not None:
+                bucket.tokens += 1  # kembalikan token ONT yang tidak terpakai
+            return False
+        return True
+
+    def _evict(self, now):
+        self._recent = {k: t for k, t in self._recent.items() if now - t <= self.window}
+        self._ont_buckets = {k: b for k, b in self._ont_buckets.items() if not b.full(now)}
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='notification-flush', daemon=True)
+        self._thread.start()
+        atexit.register(self._flush_quietly)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self._flush_quietly()
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Warning: gagal menulis notifikasi: {e}")
+
+
+def merge_batch(notifications, items, window, next_id):
+    """Menggabungkan item antrean ke daftar notifikasi (in-place).
+
+    Item digabung ke notifikasi terakhir dengan kunci yang sama jika kejadian
+    terakhirnya masih dalam `window` detik; selain itu ditambahkan sebagai
+    notifikasi baru dengan ID dari `next_id`. Mengembalikan (baru, digabung).
+    """
+    latest = {}
+    for notification in notifications:
+        latest[coalesce_key(notification)] = notification
+    added = merged = 0
+    for item in items:
+        key = coalesce_key(item)
+        target = latest.get(key)
+        if target is not None and _within(target.get('timestamp'), item.get('first_timestamp') or item['timestamp'], window):
+            merge_into(target, item)
+            merged += 1
+            continue
+        notification = {'id': next_id, 'message': item['message'], 'type': item['type'],
+                        'timestamp': item['timestamp'], 'ont_id': item.get('ont_id'),
+                        'ont_name': item.get('ont_name'), 'read': False}
+        if item.get('count', 1) > 1:
+            notification['count'] = item['count']
+            notification['first_timestamp'] = item['first_timestamp']
+        if item.get('rate_limited'):
+            notification['rate_limited'] = True
+            notification['suppressed_onts'] = item['suppressed_onts']
+            notification['count'] = item.get('count', 1)
+        next_id += 1
+        notifications.append(notification)
+        latest[key] = notification
+        added += 1
+    return added, merged
+
+
+def _within(previous, current, window):
+    try:
+        gap = datetime.fromisoformat(current) - datetime.fromisoformat(previous)
+    except (TypeError, ValueError):
+        return False
+    return gap <= timedelta(seconds=window)
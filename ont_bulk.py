@@ -0,0 +1,134 @@
+"""
+Operasi CRUD ONT secara bulk dan transaksional.
+
+Satu batch berisi operasi create/update/delete. Setiap update/delete boleh
+menyertakan `version` (lihat inventory.record_version) untuk optimistic
+concurrency. Semua operasi divalidasi dalam satu transaksi inventaris: jika
+satu saja gagal, tidak ada yang ditulis.
+
+Format body:
+    {"operations": [
+        {"op": "create", "data": {"id_pelanggan": "...", "name": "...", ...}},
+        {"op": "update", "id": 12, "version": "ab12cd34ef56", "data": {"lokasi": "..."}},
+        {"op": "delete", "id": 13, "version": "..."}
+    ]}
+"""
+
+from inventory import DuplicateKeyError, RecordNotFoundError, record_version
+from ont_import import validate_row
+
+OPERATIONS = ('create', 'update', 'delete')
+EDITABLE_FIELDS = ('id_pelanggan', 'name', 'lokasi', 'ip', 'latitude', 'longitude', 'Icon', 'parent')
+MAX_BULK_OPERATIONS = 5000
+
+
+class BulkRequestError(ValueError):
+    """Body request bulk tidak sesuai format."""
+
+
+class VersionConflictError(ValueError):
+    """Record sudah diubah pihak lain sejak versi yang dikirim klien."""
+
+    def __init__(self, ont_id, expected, actual):
+        super().__init__(f"Konflik versi ONT id {ont_id}: klien {expected}, server {actual}")
+        self.ont_id = ont_id
+        self.current_version = actual
+
+
+def _validated_fields(record):
+    """Validasi record hasil akhir dengan aturan yang sama seperti import."""
+    normalized, errors, _ = validate_row(record)
+    if errors:
+        raise ValueError('; '.join(errors))
+    return {f: normalized[f] for f in EDITABLE_FIELDS if f in normalized}
+
+
+def _apply_one(tx, op):
+    kind = op.get('op')
+    if kind not in OPERATIONS:
+        raise ValueError(f"op tidak dikenal: {kind!r}")
+    data = op.get('data') or {}
+    if not isinstance(data, dict):
+        raise ValueError("data harus berupa objek")
+    unknown = sorted(set(data) - set(EDITABLE_FIELDS))
+    if unknown:
+        raise ValueError(f"field tidak boleh diubah: {', '.join(unknown)}")
+
+    if kind == 'create':
+        record = tx.insert(dict(_validated_fields(data), status="OFF", rto_count=0))
+        return {'id': record['id'], 'version': record_version(record)}
+
+    try:
+        ont_id = int(op.get('id'))
+    except (TypeError, ValueError):
+        raise ValueError(f"id tidak valid: {op.get('id')!r}")
+    current = tx.get(ont_id)
+    if current is None:
+        raise RecordNotFoundError(ont_id)
+    expected = op.get('version')
+    actual = record_version(current)
+    if expected is not None and expected != actual:
+        raise VersionConflictError(ont_id, expected, actual)
+
+    if kind == 'delete':
+        tx.delete(ont_id)
+        return {'id': ont_id, 'before': current}
+    # Validasi record gabungan, tapi hanya field yang dikirim klien yang ditulis
+    validated = _validated_fields(dict(current, **data))
+    changes = {k: validated[k] for k in data if k in validated and current.get(k) != validated[k]}
+    record = tx.update(ont_id, changes) if changes else current
+    return {'id': ont_id, 'version': record_version(record), 'changed': sorted(changes)}
+
+
+def apply_bulk(payload, inventory):
+    """Menjalankan batch operasi; mengembalikan laporan dengan hasil per item.
+
+    Semua operasi di-stage dalam satu transaksi dan ditulis sebagai satu commit
+    (satu baris journal, atau snapshot jika batch sangat besar) hanya jika
+    seluruhnya berhasil.
+    """
+    operations = payload.get('operations') if isinstance(payload, dict) else payload
+    if not isinstance(operations, list) or not operations:
+        raise BulkRequestError("operations harus berupa list yang tidak kosong")
+    if len(operations) > MAX_BULK_OPERATIONS:
+        raise BulkRequestError(f"Maksimal {MAX_BULK_OPERATIONS} operasi per batch")
+
+    results = []
+    counts = {'create': 0, 'update': 0, 'delete': 0}
+    failed = 0
+    deleted = []
+    with inventory.transaction() as tx:
+        for index, op in enumerate(operations):
+            kind = op.get('op') if isinstance(op, dict) else None
+            item = {'index': index, 'op': kind}
+            try:
+                if not isinstance(op, dict):
+                    raise ValueError("operasi harus berupa objek")
+                outcome = _apply_one(tx, op)
+                if kind == 'delete':
+                    deleted.append(outcome.pop('before'))
+                item.update(outcome, ok=True)
+                counts[kind] += 1
+            except VersionConflictError as e:
+                item.update(ok=False, error=str(e), conflict=True, current_version=e.current_version)
+                failed += 1
+            except (ValueError, RecordNotFoundError, DuplicateKeyError) as e:
+                item.update(ok=False, error=str(e))
+                failed += 1
+            results.append(item)
+        if failed:
+            tx.abort()
+
+    return {
+        'applied': not failed,
+        'counts': counts,
+        'failed': failed,
+        'results': results,
+        'deleted': deleted if not failed else [],
+    }
+
+
+def summarize(report):
+    counts = report['counts']
+    return (f"Bulk ONT: {counts['create']} ditambah, {counts['update']} diperbarui, "
+            f"{counts['delete']} dihapus")
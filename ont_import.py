@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Pipeline import/merge ONT secara bulk.
+
+Input CSV atau JSON (array/JSON Lines) dibaca baris demi baris, divalidasi dalam
+satu lintasan (koordinat, IP, duplikat di dalam file) memakai indeks hash, lalu
+dibandingkan dengan inventaris untuk menghasilkan diff insert/update/delete
+berdasarkan id_pelanggan. Diff diterapkan sebagai satu transaksi inventaris,
+atau hanya dilaporkan jika dry-run.
+
+Header kolom yang dikenali: format onts.json (id_pelanggan, name, lokasi, ip,
+latitude, longitude, Icon) maupun format csvjson.json (ID, Nama, Lokasi, IP,
+Latitude, Longitude).
+
+Penggunaan:
+    python ont_import.py data.csv [--dry-run] [--replace] [--skip-invalid]
+"""
+
+import argparse
+import csv
+import io
+import ipaddress
+import json
+import sys
+
+from inventory import DuplicateKeyError
+
+MODES = ('merge', 'replace')
+MAX_REPORTED_ERRORS = 200
+
+CANONICAL_COLUMNS = ('id_pelanggan', 'name', 'lokasi', 'ip', 'latitude', 'longitude', 'Icon', 'parent')
+# Alias hanya dipakai jika kolom kanoniknya tidak ada ('id' di onts.json adalah id internal)
+COLUMN_ALIASES = {
+    'id': 'id_pelanggan', 'nama': 'name', 'location': 'lokasi',
+    'lat': 'latitude', 'lon': 'longitude', 'lng': 'longitude', 'icon': 'Icon', 'upstream': 'parent',
+}
+UPDATABLE_FIELDS = ('name', 'lokasi', 'ip', 'latitude', 'longitude', 'Icon', 'parent')
+
+
+class ImportFormatError(ValueError):
+    """Input tidak bisa dibaca sebagai CSV/JSON."""
+
+
+# --- pembacaan streaming ----------------------------------------------------
+
+def iter_csv_rows(text_stream):
+    reader = csv.DictReader(text_stream)
+    try:
+        for row in reader:
+            yield row
+    except csv.Error as e:
+        # csv.Error bukan turunan ValueError; disamakan dengan error format lain (400)
+        raise ImportFormatError(f"CSV tidak valid di sekitar baris {reader.line_num + 1}: {e}") from e
+
+
+def iter_json_rows(text_stream, chunk_size=65536):
+    """Membaca array JSON atau JSON Lines objek demi objek tanpa memuat seluruh file."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    while True:
+        # Lewati spasi, koma dan pembuka/penutup array di antara objek
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,[]':
+            pos += 1
+        if pos >= len(buffer):
+            if eof:
+                return
+            buffer = text_stream.read(chunk_size)
+            pos = 0
+            if not buffer:
+                return
+            continue
+        try:
+            obj, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise ImportFormatError(f"JSON tidak valid di sekitar: {buffer[pos:pos + 40]!r}")
+            chunk = text_stream.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        if not isinstance(obj, dict):
+            raise ImportFormatError("Setiap elemen JSON harus berupa objek ONT")
+        yield obj
+        pos = end
+        if pos > chunk_size:
+            buffer = buffer[pos:]
+            pos = 0
+
+
+def iter_rows(text_stream, fmt):
+    if fmt == 'csv':
+        return iter_csv_rows(text_stream)
+    if fmt == 'json':
+        return iter_json_rows(text_stream)
+    raise ImportFormatError(f"Format tidak dikenal: {fmt}")
+
+
+def detect_format(filename, content_type=''):
+    name = (filename or '').lower()
+    if name.endswith('.csv') or 'csv' in (content_type or ''):
+        return 'csv'
+    return 'json'
+
+
+# --- validasi ---------------------------------------------------------------
+
+def _normalize_row(raw):
+    canonical = {c.lower(): c for c in CANONICAL_COLUMNS}
+    row = {}
+    aliased = {}
+    for key, value in raw.items():
+        name = str(key or '').strip().lower()
+        value = value.strip() if isinstance(value, str) else value
+        if name in canonical:
+            row[canonical[name]] = value
+        elif name in COLUMN_ALIASES:
+            aliased.setdefault(COLUMN_ALIASES[name], value)
+    for field, value in aliased.items():
+        row.setdefault(field, value)
+    return row
+
+
+def _parse_coordinate(value, low, high):
+    """Mengembalikan (nilai, pesan_error); kosong dianggap 0 seperti skrip konversi lama."""
+    if value is None or value == '':
+        return 0, None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None, f"bukan angka: {value!r}"
+    if not (low <= number <= high):
+        return None, f"di luar rentang {low}..{high}: {number}"
+    return number, None
+
+
+def validate_row(raw):
+    """Normalisasi satu baris input; mengembalikan (record, errors, warnings)."""
+    row = _normalize_row(raw)
+    errors, warnings = [], []
+    record = {}
+    id_pelanggan = str(row.get('id_pelanggan') or '').strip()
+    name = str(row.get('name') or '').strip()
+    if not id_pelanggan:
+        errors.append("id_pelanggan kosong")
+    if not name:
+        errors.append("nama kosong")
+    record['id_pelanggan'] = id_pelanggan
+    record['name'] = name
+    record['lokasi'] = str(row.get('lokasi') or '').strip()
+
+    ip = str(row.get('ip') or '').strip()
+    if ip:
+        try:
+            ipaddress.ip_address(ip)
+        except ValueError:
+            errors.append(f"IP tidak valid: {ip!r}")
+    else:
+        warnings.append("IP kosong")
+    record['ip'] = ip
+
+    for field, low, high in (('latitude', -90, 90), ('longitude', -180, 180)):
+        value, error = _parse_coordinate(row.get(field), low, high)
+        if error:
+            errors.append(f"{field} {error}")
+        record[field] = value
+    if record.get('latitude') == 0 and record.get('longitude') == 0:
+        warnings.append("koordinat kosong (0,0)")
+
+    if row.get('Icon') not in (None, ''):
+        try:
+            record['Icon'] = int(row['Icon'])
+        except (TypeError, ValueError):
+            errors.append(f"Icon bukan angka: {row['Icon']!r}")
+    # Kolom parent hanya ditulis jika ada di input, agar import lama tidak menghapusnya
+    if 'parent' in row:
+        record['parent'] = str(row.get('parent') or '').strip()
+    return record, errors, warnings
+
+
+# --- diff & apply -----------------------------------------------------------
+
+def _stage_record(tx, record, existing_ids, report, touched_ids):
+    """Stage insert/update untuk satu baris valid; mengembalikan jumlah operasi."""
+    key = record['id_pelanggan']
+    if existing_ids:
+        ont_id = existing_ids[0]
+        current = tx.get(ont_id)
+        changes = {f: record[f] for f in UPDATABLE_FIELDS
+                   if f in record and current.get(f) != record[f]}
+        if not changes:
+            report['unchanged'] += 1
+            return 0
+        tx.update(ont_id, changes)
+        report['updated'] += 1
+        report['changes']['update'].append({'id': ont_id, 'id_pelanggan': key, 'fields': sorted(changes)})
+        return 1
+    new_ont = tx.insert(dict(record, status="OFF", rto_count=0))
+    touched_ids.add(new_ont['id'])
+    report['inserted'] += 1
+    report['changes']['insert'].append({'id': new_ont['id'], 'id_pelanggan': key})
+    return 1
+
+
+def run_import(rows, inventory, mode='merge', dry_run=False, skip_invalid=False):
+    """Validasi + diff + apply dalam satu transaksi inventaris.
+
+    mode='merge' hanya insert/update; mode='replace' juga menghapus ONT yang
+    tidak ada di input. Jika ada baris invalid dan skip_invalid=False, tidak ada
+    perubahan yang ditulis.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Mode import tidak dikenal: {mode}")
+    report = {
+        'mode': mode, 'dry_run': dry_run, 'applied': False,
+        'rows': 0, 'valid': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0,
+        'errors': [], 'error_count': 0, 'warning_count': 0,
+        'changes': {'insert': [], 'update': [], 'delete': []},
+    }
+
+    def add_error(line, message, id_pelanggan=''):
+        report['error_count'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'row': line, 'id_pelanggan': id_pelanggan, 'message': message})
+
+    seen_pelanggan = {}
+    seen_ip = {}
+    touched_ids = set()
+    deferred = []
+    ops = 0
+
+    with inventory.transaction() as tx:
+        for line, raw in enumerate(rows, start=1):
+            report['rows'] += 1
+            record, errors, warnings = validate_row(raw)
+            report['warning_count'] += len(warnings)
+            key = record['id_pelanggan']
+            if key and key in seen_pelanggan:
+                errors.append(f"id_pelanggan duplikat dengan baris {seen_pelanggan[key]}")
+            if record['ip'] and record['ip'] in seen_ip:
+                errors.append(f"IP duplikat dengan baris {seen_ip[record['ip']]}")
+            if errors:
+                for message in errors:
+                    add_error(line, message, key)
+                if key:
+                    # ONT yang barisnya invalid tidak ikut terhapus pada mode replace
+                    touched_ids.update(tx.find_ids('id_pelanggan', key))
+                continue
+            seen_pelanggan[key] = line
+            if record['ip']:
+                seen_ip[record['ip']] = line
+            report['valid'] += 1
+
+            existing_ids = tx.find_ids('id_pelanggan', key)
+            touched_ids.update(existing_ids)
+            try:
+                ops += _stage_record(tx, record, existing_ids, report, touched_ids)
+            except DuplicateKeyError as e:
+                report['valid'] -= 1
+                if mode == 'replace':
+                    # IP mungkin milik ONT yang akan dihapus; coba lagi setelah delete
+                    deferred.append((line, record, existing_ids))
+                else:
+                    add_error(line, str(e), key)
+
+        if mode == 'replace':
+            for ont_id in [i for i in tx.ids() if i not in touched_ids]:
+                old = tx.delete(ont_id)
+                report['deleted'] += 1
+                report['changes']['delete'].append({'id': ont_id, 'id_pelanggan': old.get('id_pelanggan')})
+                ops += 1
+            for line, record, existing_ids in deferred:
+                try:
+                    ops += _stage_record(tx, record, existing_ids, report, touched_ids)
+                    report['valid'] += 1
+                except DuplicateKeyError as e:
+                    add_error(line, str(e), record['id_pelanggan'])
+
+        blocked = report['error_count'] and not skip_invalid
+        if dry_run or blocked or ops == 0:
+            tx.abort()
+        else:
+            report['applied'] = True
+
+    for kind in report['changes']:
+        report['changes'][kind] = report['changes'][kind][:MAX_REPORTED_ERRORS]
+    return report
+
+
+def summarize(report):
+    """Ringkasan satu baris untuk notifikasi / output CLI."""
+    prefix = "Dry-run import ONT" if report['dry_run'] else "Import ONT"
+    text = (f"{prefix}: {report['inserted']} ditambah, {report['updated']} diperbarui, "
+            f"{report['deleted']} dihapus, {report['error_count']} error dari {report['rows']} baris")
+    if not report['dry_run'] and not report['applied']:
+        text += " (tidak diterapkan)"
+    return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import/merge ONT dari CSV atau JSON ke inventaris.")
+    parser.add_argument('path', help="File CSV/JSON, atau '-' untuk stdin")
+    parser.add_argument('--format', choices=('csv', 'json'), help="Default: berdasarkan ekstensi file")
+    parser.add_argument('--replace', action='store_true', help="Hapus ONT yang tidak ada di input")
+    parser.add_argument('--dry-run', action='store_true', help="Hanya tampilkan diff, tidak menulis apa pun")
+    parser.add_argument('--skip-invalid', action='store_true', help="Terapkan baris valid walau ada baris invalid")
+    parser.add_argument('--report', help="Simpan laporan lengkap (JSON) ke file ini")
+    args = parser.parse_args(argv)
+
+    # Memakai instance inventaris dan notifikasi yang sama dengan aplikasi web
+    from app import inventory, add_notification
+
+    fmt = args.format or detect_format(args.path)
+    if args.path == '-':
+        stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig')
+    else:
+        stream = open(args.path, 'r', encoding='utf-8-sig', newline='')
+    try:
+        report = run_import(iter_rows(stream, fmt), inventory,
+                            mode='replace' if args.replace else 'merge',
+                            dry_run=args.dry_run, skip_invalid=args.skip_invalid)
+    except ValueError as e:
+        # ImportFormatError (CSV/JSON rusak) dan UnicodeDecodeError, sama seperti route /api/onts/import
+        print(f"❌ {e}")
+        return 1
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    for err in report['errors'][:20]:
+        print(f"  ⚠️  Baris {err['row']} ({err['id_pelanggan'] or '-'}): {err['message']}")
+    if report['error_count'] > 20:
+        print(f"  ... dan {report['error_count'] - 20} error lainnya")
+    print(summarize(report))
+    if report['applied']:
+        add_notification(summarize(report), "info")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Laporan disimpan ke {args.report}")
+    return 0 if report['applied'] or args.dry_run else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Indeks terurut ONT untuk halaman admin.
+
+Setiap kolom sort (id, name, status, last_on) dipelihara sebagai list terurut
+per grup status (all/on/off), sehingga halaman berikutnya cukup dicari dengan
+bisect dari cursor (keyset pagination) dan biaya halaman ke-N sama dengan
+halaman pertama.
+"""
+
+import base64
+import json
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+from fleet_stats import is_online
+
+SORT_FIELDS = ('id', 'name', 'status', 'last_on')
+STATUS_GROUPS = ('all', 'on', 'off')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def _sort_key(ont, field):
+    ont_id = ont.get('id')
+    if field == 'id':
+        return (ont_id,)
+    if field == 'name':
+        return ((ont.get('name') or '').lower(), ont_id)
+    if field == 'status':
+        return (ont.get('status') or '', ont_id)
+    return (ont.get('last_on') or '', ont_id)
+
+
+def encode_cursor(key, sort):
+    payload = {'sort': sort, 'key': list(key)}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, sort):
+    """Mengembalikan key dari cursor untuk kolom `sort`, atau ValueError jika cursor rusak.
+
+    Cursor menyimpan kolom sort asalnya; cursor dari sort lain (mis. name dipakai
+    ulang dengan sort=id) ditolak karena bentuk key-nya tidak bisa dibandingkan.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception as e:
+        raise ValueError(f"Cursor tidak valid: {e}")
+    if not isinstance(payload, dict) or not isinstance(payload.get('key'), list):
+        raise ValueError("Cursor tidak valid")
+    if payload.get('sort') != sort:
+        raise ValueError(f"Cursor dibuat untuk sort {payload.get('sort')!r}, bukan {sort!r}")
+    key = tuple(payload['key'])
+    if not _valid_key(key, sort):
+        raise ValueError("Cursor tidak valid")
+    return key
+
+
+def _valid_key(key, sort):
+    """Bentuk dan tipe key sama dengan _sort_key(ont, sort): (id,) atau (str, id)."""
+    if len(key) != (1 if sort == 'id' else 2):
+        return False
+    ont_id = key[-1]
+    if not isinstance(ont_id, int) or isinstance(ont_id, bool):
+        return False
+    return all(isinstance(value, str) for value in key[:-1])
+
+
+class SortedOntIndex:
+    """Menyimpan salinan record ONT beserta list terurut per (kolom, grup status)."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._records = {}
+        self._views = {(f, g): [] for f in SORT_FIELDS for g in STATUS_GROUPS}
+
+    def __len__(self):
+        return len(self._records)
+
+    def count(self, group='all'):
+        return len(self._views[('id', group)])
+
+    # --- mutasi -------------------------------------------------------------
+
+    def apply(self, ont):
+        ont_id = ont.get('id')
+        if ont_id is None:
+            return
+        with self._lock:
+            old = self._records.get(ont_id)
+            if old == ont:
+                return
+            if old is not None:
+                self._unindex(old)
+            record = dict(ont)
+            self._records[ont_id] = record
+            self._index(record)
+
+    def remove(self, ont_id):
+        with self._lock:
+            old = self._records.pop(ont_id, None)
+            if old is not None:
+                self._unindex(old)
+
+    def sync(self, onts):
+        """Menyamakan indeks dengan daftar ONT lengkap; hanya record yang berubah yang diindeks ulang.
+
+        Jika sebagian besar record berubah (load awal, import besar), semua view
+        dibangun ulang dengan satu sort per view, lebih cepat daripada insort satu per satu.
+        """
+        with self._lock:
+            incoming = {o.get('id'): o for o in onts if o.get('id') is not None}
+            changed = [o for i, o in incoming.items() if self._records.get(i) != o]
+            removed = [i for i in self._records if i not in incoming]
+            if len(changed) + len(removed) > max(64, len(self._records) // 8):
+                self._rebuild(incoming.values())
+                return
+            for ont in changed:
+                self.apply(ont)
+            for ont_id in removed:
+                self.remove(ont_id)
+
+    # --- query --------------------------------------------------------------
+
+    def page(self, sort='id', order='asc', group='all', cursor=None, limit=DEFAULT_PAGE_SIZE, query=''):
+        """Satu halaman record setelah `cursor` beserta cursor halaman berikutnya.
+
+        Filter teks (`query`) dievaluasi sambil berjalan dari cursor, jadi biayanya
+        sebanding dengan jumlah baris yang dilewati, bukan ukuran inventaris.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Kolom sort tidak dikenal: {sort}")
+        if group not in STATUS_GROUPS:
+            raise ValueError(f"Filter status tidak dikenal: {group}")
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        query = (query or '').strip().lower()
+        descending = order == 'desc'
+        after = decode_cursor(cursor, sort) if cursor else None
+
+        with self._lock:
+            view = self._views[(sort, group)]
+            if after is None:
+                pos = len(view) - 1 if descending else 0
+            elif descending:
+                pos = bisect_left(view, after) - 1
+            else:
+                pos = bisect_right(view, after)
+            step = -1 if descending else 1
+            rows = []
+            last_key = None
+            while 0 <= pos < len(view) and len(rows) < limit:
+                key = view[pos]
+                record = self._records[key[-1]]
+                pos += step
+                last_key = key
+                if query and not self._matches(record, query):
+                    continue
+                rows.append(dict(record))
+            has_more = 0 <= pos < len(view)
+            return {
+                'items': rows,
+                'next_cursor': encode_cursor(last_key, sort) if has_more and last_key is not None else None,
+                'total': None if query else len(view),
+            }
+
+    # --- internal -----------------------------------------------------------
+
+    def _rebuild(self, onts):
+        self._records = {o['id']: dict(o) for o in onts}
+        for (field, group) in self._views:
+            self._views[(field, group)] = sorted(
+                _sort_key(r, field) for r in self._records.values()
+                if group in self._groups(r)
+            )
+
+    @staticmethod
+    def _groups(record):
+        return ('all', 'on' if is_online(record.get('status')) else 'off')
+
+    def _index(self, record):
+        for group in self._groups(record):
+            for field in SORT_FIELDS:
+                insort(self._views[(field, group)], _sort_key(record, field))
+
+    def _unindex(self, record):
+        for group in self._groups(record):
+            for field in SORT_FIELDS:
+                view = self._views[(field, group)]
+                key = _sort_key(record, field)
+                i = bisect_left(view, key)
+                if i < len(view) and view[i] == key:
+                    del view[i]
+
+    @staticmethod
+    def _matches(record, query):
+        for field in ('id_pelanggan', 'name', 'lokasi', 'ip', 'status'):
+            if query in str(record.get(field) or '').lower():
+                return True
+        return False
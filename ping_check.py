@@ -1,24 +1,57 @@
-import json
+import os
 import time
 import platform
 import subprocess
-import requests 
 import routeros_api
 
-MIKROTIK_IP = '111.92.166.184'
-MIKROTIK_PORT = 8728
-MIKROTIK_USER = 'monitor'
-MIKROTIK_PASS = 's0t0kudus'
+from inventory import InventoryRepository
+import topology
+import status_providers
+import uploader
+import scheduler
+import metrics
+import profiler
+import routers
 
+DATA_FILE = 'onts.json'
 FLASK_SERVER_URL = 'http://127.0.0.1:5000'
 PING_INTERVAL = 30
 MIKROTIK_INTERVAL = 300
+UPLOAD_FLUSH_INTERVAL = 5
+# Endpoint /metrics milik pinger (Prometheus), terpisah dari web app
+METRICS_PORT = int(os.environ.get('PINGER_METRICS_PORT', 9108))
+
+_uploader = uploader.SpoolUploader(FLASK_SERVER_URL)
+# Router hotspot dari routers.json (atau MIKROTIK_* di environment), di-poll paralel;
+# durasi poll per router dicatat di routers.POLL_SECONDS (routeros_poll_seconds)
+_collector = routers.RouterCollector(routers.load_routers(), api_module=routeros_api)
+
+PROBE_SECONDS = metrics.histogram('pinger_probe_seconds', 'Durasi probe ICMP per ONT', ('result',))
+CYCLE_SECONDS = metrics.histogram('pinger_cycle_seconds', 'Durasi satu siklus update status ONT')
+CYCLE_ONTS = metrics.gauge('pinger_cycle_onts', 'Jumlah ONT per hasil pada siklus terakhir', ('result',))
+metrics.gauge('uploader_spool_pending', 'Sampel yang menunggu di spool uploader').set_function(
+    lambda: len(_uploader.pending()))
+
+# Backend probe `backend(ip) -> bool`; None = ping sungguhan lewat subprocess.
+# Bisa diganti jaringan simulasi (simnet.py) untuk pengujian tanpa jaringan.
+_probe_backend = None
+
+def set_probe_backend(backend):
+    """Mengganti backend probe yang dipakai ping(); None mengembalikan ping sungguhan."""
+    global _probe_backend
+    _probe_backend = backend
 
 def ping(ip):
     """
     Ping 3x menggunakan subprocess, jika salah satu reply maka dianggap ON.
     Kompatibel Linux/Windows tanpa sudo.
     """
+    started = time.perf_counter()
+    online = (_probe_backend or _ping_attempts)(ip)
+    PROBE_SECONDS.observe(time.perf_counter() - started, result='on' if online else 'off')
+    return online
+
+def _ping_attempts(ip):
     for i in range(3):
         try:
             if platform.system().lower() == "windows":
@@ -40,190 +73,187 @@ def ping(ip):
 
 # FUNGSI LAMA (TETAP ADA)
 def get_mikrotik_hotspot_active_count():
-    """Menghubungkan ke MikroTik via API dan menghitung user aktif."""
-    try:
-        connection = routeros_api.RouterOsApiPool(
-            MIKROTIK_IP,
-            username=MIKROTIK_USER,
-            password=MIKROTIK_PASS,
-            port=MIKROTIK_PORT,
-            plaintext_login=True
-        )
-        api = connection.get_api()
-        active_users_list = api.get_resource('/ip/hotspot/active').get()
-        user_count = len(active_users_list)
-        connection.disconnect()
-        return user_count
-    except Exception as e:
-        print(f"GAGAL (get_mikrotik_hotspot_active_count): {e}")
-        return None
+    """Jumlah user aktif di semua router; None jika tidak ada router yang bisa dihubungi."""
+    users = get_mikrotik_active_users_detail()
+    return len(users) if users is not None else None
 
 # FUNGSI BARU (TAMBAHAN)
 def get_mikrotik_active_users_detail():
-    """Menghubungkan ke MikroTik dan mengambil data detail semua user aktif."""
-    try:
-        print(f"Mengambil detail user dari MikroTik di {MIKROTIK_IP}:{MIKROTIK_PORT}...")
-        connection = routeros_api.RouterOsApiPool(
-            MIKROTIK_IP,
-            username=MIKROTIK_USER,
-            password=MIKROTIK_PASS,
-            port=MIKROTIK_PORT,
-            plaintext_login=True
-        )
-        api = connection.get_api()
-        
-        # Mengambil seluruh daftar user aktif beserta detailnya
-        active_users_list = api.get_resource('/ip/hotspot/active').get()
-        connection.disconnect()
-        
-        # Membersihkan data, hanya mengambil yang penting untuk log
-        cleaned_users = []
-        for user in active_users_list:
-            cleaned_users.append({
-                'ip': user.get('address', '-'),
-                'mac': user.get('mac-address', '-'),
-                'uptime': user.get('uptime', '0s'),
-                'bytes_in': user.get('bytes-in', 0),
-                'bytes_out': user.get('bytes-out', 0)
-            })
-        print(f"BERHASIL: Ditemukan detail untuk {len(cleaned_users)} user.")
-        return cleaned_users
-
-    except Exception as e:
-        print(f"GAGAL (get_mikrotik_active_users_detail): {e}")
+    """Detail semua user aktif dari semua router (setiap user ditandai field `router`)."""
+    results = _collector.collect()
+    if all(users is None for users in results.values()):
         return None
+    return [user for users in results.values() if users for user in users]
 
-# FUNGSI LAMA (TETAP ADA)
-def update_ont_statuses():
-    """Melakukan ping ke semua ONT dan mengupdate statusnya di onts.json."""
+def probe_topology():
+    """Probe node upstream (upstreams.json) dari akar ke bawah dan simpan statusnya."""
+    nodes = topology.load_upstreams()
+    if not nodes:
+        return {}
+    statuses = topology.probe_upstreams(nodes, ping)
     try:
-        # 1) Load a snapshot to perform pings against
-        with open("onts.json", "r", encoding='utf-8') as f:
-            snapshot = json.load(f)
+        topology.save_statuses(statuses)
+    except OSError as e:
+        print(f"Warning: gagal menyimpan status upstream: {e}")
+    return statuses
 
-        print(f"Memulai ping ke {len(snapshot)} ONT...")
+def collect_provider_observations(onts):
+    """Status massal dari provider (status_providers.json), mis. tabel ONT di OLT via SNMP."""
+    providers = status_providers.load_providers()
+    if not providers:
+        return {}
+    return status_providers.collect_observations(providers, onts)
 
-        # 2) Compute status updates based on the snapshot (don't mutate file content yet)
-        updates = {}
-        for ont in snapshot:
-            ont_id = ont.get('id')
-            ip = ont.get('ip', '')
-            name = ont.get('name', ip)
-            if not ip:
-                print(f"[SKIP] ONT {name} tidak punya IP.")
-                continue
-
-            if ping(ip):
-                status = "ON"
-                rto_count = 0
-                last_on = time.strftime('%Y-%m-%dT%H:%M:%S')
-                print(f"[PING] {name} ({ip}): ON")
-            else:
-                prev_rto = ont.get('rto_count', 0)
-                rto_count = prev_rto + 1
-                if rto_count == 1:
-                    status = "OFF(Waiting Connection)"
-                elif 2 <= rto_count <= 5:
-                    status = "OFF(RTO)"
-                else:
-                    status = "OFF"
-                last_on = ont.get('last_on')
-                print(f"[PING] {name} ({ip}): {status}")
+def _next_status(ont, online):
+    """Status, rto_count dan last_on berikutnya dari satu hasil cek (ping atau provider)."""
+    if online:
+        return {'status': "ON", 'rto_count': 0, 'last_on': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    rto_count = ont.get('rto_count', 0) + 1
+    if rto_count == 1:
+        status = "OFF(Waiting Connection)"
+    elif 2 <= rto_count <= 5:
+        status = "OFF(RTO)"
+    else:
+        status = "OFF"
+    return {'status': status, 'rto_count': rto_count, 'last_on': ont.get('last_on')}
+
+def probe_statuses(onts, upstream_statuses=None, observations=None):
+    """Ping setiap ONT dan menghitung status baru; belum menulis apa pun ke inventaris.
 
+    ONT yang sudah dilaporkan provider status (`observations`) tidak di-ping.
+    ONT yang upstream-nya down tidak di-ping; statusnya menjadi "OFF(Upstream Down)"
+    dan rto_count/last_on dibiarkan, sehingga ONT di-ping lagi begitu induknya pulih.
+    """
+    updates = {}
+    skipped = {}
+    observations = observations or {}
+    for ont in onts:
+        ont_id = ont.get('id')
+        ip = ont.get('ip', '')
+        name = ont.get('name', ip)
+        observed = observations.get(ont_id)
+        if observed is not None:
+            updates[ont_id] = dict(_next_status(ont, observed['online']), rx_power=observed.get('rx_power'))
+            continue
+        if not ip:
+            print(f"[SKIP] ONT {name} tidak punya IP.")
+            continue
+
+        cause = topology.blocked_by(ont.get('parent'), upstream_statuses or {})
+        if cause:
+            skipped[cause] = skipped.get(cause, 0) + 1
             updates[ont_id] = {
-                'status': status,
-                'rto_count': rto_count,
-                'last_on': last_on
+                'status': topology.UPSTREAM_DOWN_STATUS,
+                'rto_count': ont.get('rto_count', 0),
+                'last_on': ont.get('last_on')
             }
+            continue
 
-        # 3) Re-load the latest file just before writing to avoid clobbering recent manual edits
-        try:
-            with open("onts.json", "r", encoding='utf-8') as f:
-                current = json.load(f)
-        except Exception:
-            current = []
-
-        # 4) Merge only the dynamic fields (status, rto_count, last_on) into the current data
-        for ont in current:
-            ont_id = ont.get('id')
-            if ont_id in updates:
-                ont.update({
-                    'status': updates[ont_id]['status'],
-                    'rto_count': updates[ont_id]['rto_count']
-                })
-                if updates[ont_id].get('last_on') is not None:
-                    ont['last_on'] = updates[ont_id]['last_on']
-
-        # 5) Write atomically to avoid partial writes and reduce race window
-        import os
-        temp_path = ".tmp-onts.json"
-        try:
-            with open(temp_path, 'w', encoding='utf-8') as tf:
-                json.dump(current, tf, indent=2, ensure_ascii=False)
-                tf.flush()
-                try:
-                    os.fsync(tf.fileno())
-                except Exception:
-                    pass
-            os.replace(temp_path, "onts.json")
-            print("Status ONT berhasil diperbarui di onts.json.")
-        finally:
-            try:
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-            except Exception:
-                pass
+        updates[ont_id] = _next_status(ont, ping(ip))
+        print(f"[PING] {name} ({ip}): {updates[ont_id]['status']}")
+    if observations:
+        print(f"[PROVIDER] {sum(1 for o in onts if o.get('id') in observations)} ONT memakai status provider")
+    for cause, count in skipped.items():
+        print(f"[TOPOLOGI] {count} ONT tidak di-ping: upstream {cause} down")
+    return updates
+
+def apply_status_updates(inventory, updates, compact=True):
+    """Merge hanya field dinamis (status, rto_count, last_on, rx_power) ke data terbaru.
+
+    Transaksi mengunci inventaris dan membaca ulang journal terlebih dahulu agar
+    edit manual terbaru (dan hasil worker pinger lain) tidak tertimpa.
+    """
+    with inventory.transaction(compact=compact) as tx:
+        for ont_id, update in updates.items():
+            if tx.get(ont_id) is None:
+                continue  # ONT dihapus selama ping berjalan
+            changes = {'status': update['status'], 'rto_count': update['rto_count']}
+            if update.get('last_on') is not None:
+                changes['last_on'] = update['last_on']
+            if 'rx_power' in update:
+                changes['rx_power'] = update['rx_power']
+            tx.update(ont_id, changes)
+
+def _record_cycle(updates):
+    counts = {'on': 0, 'off': 0, 'upstream_down': 0}
+    for update in updates.values():
+        if update['status'] == topology.UPSTREAM_DOWN_STATUS:
+            counts['upstream_down'] += 1
+        else:
+            counts['on' if update['status'] == "ON" else 'off'] += 1
+    for result, count in counts.items():
+        CYCLE_ONTS.set(count, result=result)
+
+# FUNGSI LAMA (TETAP ADA)
+def update_ont_statuses():
+    """Melakukan ping ke semua ONT dan mengupdate statusnya di onts.json."""
+    try:
+        # Snapshot (onts.json + journal perubahan admin) sebagai dasar ping
+        inventory = InventoryRepository(DATA_FILE)
+        snapshot = inventory.all()
+        print(f"Memulai ping ke {len(snapshot)} ONT...")
+        # Snapshot penuh ditulis ulang secara atomik setiap sweep
+        with metrics.timer(CYCLE_SECONDS), profiler.PROFILER.capture('cycle', 'ont-ping'):
+            updates = probe_statuses(snapshot, probe_topology(), collect_provider_observations(snapshot))
+            apply_status_updates(inventory, updates, compact=True)
+        _record_cycle(updates)
+        print("Status ONT berhasil diperbarui di onts.json.")
     except Exception as e:
         print(f"Error saat memperbarui status ONT: {e}")
 
+def report_mikrotik_users():
+    """Poll semua router sekaligus lalu antrekan jumlah dan detail user aktif ke web server."""
+    print(f"Mengambil detail user dari {len(_collector.routers)} router MikroTik...")
+    results = _collector.collect()
+    collected = {router_id: users for router_id, users in results.items() if users is not None}
+    failed = sorted(set(results) - set(collected))
+    if failed:
+        print(f"GAGAL: router tidak bisa dihubungi: {', '.join(failed)}")
+    if not collected:
+        return
+
+    # Semua sampel satu siklus memakai timestamp yang sama dan masuk spool sebelum
+    # dikirim, jadi tidak hilang walau web server sedang restart
+    sampled_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+    per_router = {router_id: len(users) for router_id, users in collected.items()}
+    print(f"BERHASIL: {sum(per_router.values())} user aktif ({per_router})")
+    # 1. JUMLAH user (total + per router) untuk grafik di dashboard
+    _uploader.enqueue(uploader.KIND_HISTORY, {'users': sum(per_router.values()), 'routers': per_router,
+                                              'failed_routers': failed}, sampled_at)
+    # 2. DETAIL user per router untuk sesi dan analitik
+    for router_id, users in collected.items():
+        _uploader.enqueue(uploader.KIND_ACTIVE_USERS, {'router': router_id, 'users': users}, sampled_at)
+    _uploader.flush(force=True)
+
+def run_ping_job():
+    print(f"\n--- Menjalankan Pengecekan Ping ONT ({time.ctime()}) ---")
+    update_ont_statuses()
+
+def run_mikrotik_job():
+    print(f"\n--- Menjalankan Pengecekan User MikroTik ({time.ctime()}) ---")
+    report_mikrotik_users()
+
 def main():
     print("🚀 Memulai Layanan Monitoring (Ping ONT & User MikroTik)...")
-    last_ping_check = 0
-    last_mikrotik_check = 0
-    while True:
-        try:
-            current_time = time.time()
-
-            if current_time - last_ping_check >= PING_INTERVAL:
-                print(f"\n--- Menjalankan Pengecekan Ping ONT ({time.ctime()}) ---")
-                update_ont_statuses()
-                last_ping_check = current_time
-
-            if current_time - last_mikrotik_check >= MIKROTIK_INTERVAL:
-                print(f"\n--- Menjalankan Pengecekan User MikroTik ({time.ctime()}) ---")
-                
-                # CUKUP PANGGIL FUNGSI DETAIL SATU KALI
-                users_detail = get_mikrotik_active_users_detail()
-                
-                if users_detail is not None:
-                    # Hitung jumlah user dari data detail yang sudah didapat
-                    user_count = len(users_detail)
-                    
-                    # 1. Kirim JUMLAH user untuk grafik di dashboard
-                    try:
-                        payload_count = {'users': user_count}
-                        requests.post(f"{FLASK_SERVER_URL}/api/record-history", json=payload_count, timeout=10)
-                        print(f"Berhasil mengirim jumlah user ({user_count}) ke web server.")
-                    except Exception as e:
-                        print(f"ERROR: Gagal mengirim jumlah user. Alasan: {e}")
-                    
-                    # 2. Kirim DETAIL user untuk halaman analitik
-                    try:
-                        # Data detail sudah bersih dari fungsi sebelumnya, langsung kirim
-                        requests.post(f"{FLASK_SERVER_URL}/api/log-active-users", json=users_detail, timeout=10)
-                        print(f"Berhasil mengirim detail {len(users_detail)} user ke web server.")
-                    except Exception as e:
-                        print(f"ERROR: Gagal mengirim detail user. Alasan: {e}")
-
-                last_mikrotik_check = current_time
-
-            time.sleep(1)
-        except KeyboardInterrupt:
-            print("\n\n🛑 Layanan monitoring dihentikan.")
-            break
-        except Exception as e:
-            print(f"\nTerjadi error pada loop utama: {e}")
-            time.sleep(10)
+    try:
+        metrics.serve(METRICS_PORT)
+        print(f"Metrik pinger tersedia di http://0.0.0.0:{METRICS_PORT}/metrics")
+    except OSError as e:
+        print(f"Warning: endpoint metrik pinger tidak bisa dibuka di port {METRICS_PORT}: {e}")
+    if os.environ.get('PING_BACKEND') == 'sim':
+        import simnet
+        set_probe_backend(simnet.SimulatedNetwork.from_env())
+        print("⚠️ PING_BACKEND=sim: ONT di-probe melawan jaringan simulasi, bukan ping sungguhan")
+    # Tiap job di pool sendiri: ping yang lambat tidak lagi menunda pengecekan MikroTik
+    jobs = scheduler.Scheduler('pinger', stats_file=os.path.join(scheduler.STATS_DIR, 'pinger.json'))
+    jobs.add_job('ont-ping', run_ping_job, PING_INTERVAL, pool='ping')
+    jobs.add_job('mikrotik-users', run_mikrotik_job, MIKROTIK_INTERVAL, jitter=5, pool='mikrotik')
+    # Kirim ulang sisa spool (mis. setelah web server kembali hidup), mengikuti backoff
+    jobs.add_job('upload-flush', _uploader.flush, UPLOAD_FLUSH_INTERVAL, initial_delay=UPLOAD_FLUSH_INTERVAL)
+    try:
+        jobs.run_forever()
+    except KeyboardInterrupt:
+        print("\n\n🛑 Layanan monitoring dihentikan.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
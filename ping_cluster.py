@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Pinger ter-shard untuk banyak proses dan banyak host.
+
+Setiap worker memegang lease berupa file JSON di folder lease bersama
+(`leases/` secara default; bisa berupa share jaringan untuk multi-host) dan
+memperbaruinya lewat heartbeat. Sebelum setiap sweep, worker membaca lease
+yang masih hidup, membangun consistent-hash ring dari ID worker tersebut, lalu
+hanya mem-ping ONT yang jatuh ke bagiannya. Jika worker berhenti memperbarui
+lease, lease-nya kedaluwarsa dan ONT miliknya otomatis berpindah ke worker lain
+pada sweep berikutnya; hanya ONT milik worker yang mati yang berpindah.
+
+Hasil semua worker ditulis ke inventaris yang sama (transaksi dengan file
+lock), sehingga dashboard tetap melihat satu status gabungan. Pengecekan user
+MikroTik dan probe topologi upstream hanya dijalankan oleh satu worker (leader =
+ID terkecil yang hidup); worker lain membaca upstream_status.json tulisan leader.
+
+Penggunaan:
+    python ping_cluster.py --workers 4                 # 4 proses di host ini
+    python ping_cluster.py --workers 2 --lease-dir /mnt/shared/leases --node node-b
+"""
+
+import argparse
+import bisect
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import tempfile
+import threading
+import time
+
+LEASE_DIR = 'leases'
+LEASE_TTL = 45
+HEARTBEAT_INTERVAL = 10
+VIRTUAL_NODES = 64
+# Lease yang sudah mati selama ini dihapus dari folder oleh worker mana pun
+STALE_LEASE_SECONDS = LEASE_TTL * 10
+RESTART_DELAY = 5
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.md5(str(value).encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent-hash ring dengan virtual node per worker."""
+
+    def __init__(self, members, vnodes=VIRTUAL_NODES):
+        self.members = sorted(set(members))
+        points = sorted(
+            (_hash(f"{member}#{i}"), member)
+            for member in self.members
+            for i in range(vnodes)
+        )
+        self._keys = [p[0] for p in points]
+        self._owners = [p[1] for p in points]
+
+    def owner(self, key):
+        if not self._keys:
+            return None
+        i = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._owners[i]
+
+    def shard(self, member, ids):
+        return [i for i in ids if self.owner(i) == member]
+
+
+# --- lease ------------------------------------------------------------------
+
+def _write_json_atomic(path, data):
+    folder = os.path.dirname(path) or '.'
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix='.lease-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def renew_lease(worker_id, lease_dir=LEASE_DIR, ttl=LEASE_TTL, **info):
+    """Menulis/memperbarui lease worker; `info` ikut disimpan untuk halaman status."""
+    os.makedirs(lease_dir, exist_ok=True)
+    now = time.time()
+    lease = dict(info, worker_id=worker_id, host=socket.gethostname(), pid=os.getpid(),
+                 heartbeat=now, expires=now + ttl)
+    _write_json_atomic(os.path.join(lease_dir, f'{worker_id}.json'), lease)
+    return lease
+
+
+def release_lease(worker_id, lease_dir=LEASE_DIR):
+    try:
+        os.remove(os.path.join(lease_dir, f'{worker_id}.json'))
+    except OSError:
+        pass
+
+
+def read_leases(lease_dir=LEASE_DIR, now=None):
+    """Semua lease di folder (hidup maupun kedaluwarsa), ditandai field `alive`."""
+    now = time.time() if now is None else now
+    leases = []
+    try:
+        names = os.listdir(lease_dir)
+    except FileNotFoundError:
+        return leases
+    for name in names:
+        if not name.endswith('.json') or name.startswith('.'):
+            continue
+        path = os.path.join(lease_dir, name)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                lease = json.load(f)
+        except (OSError, ValueError):
+            continue  # sedang ditulis ulang atau sudah dihapus
+        lease['alive'] = lease.get('expires', 0) > now
+        if now - lease.get('expires', 0) > STALE_LEASE_SECONDS:
+            release_lease(lease.get('worker_id', name[:-5]), lease_dir)
+            continue
+        leases.append(lease)
+    leases.sort(key=lambda l: l.get('worker_id', ''))
+    return leases
+
+
+def live_workers(lease_dir=LEASE_DIR):
+    return [l['worker_id'] for l in read_leases(lease_dir) if l['alive']]
+
+
+class _Heartbeat(threading.Thread):
+    """Memperbarui lease di background agar sweep yang lama tidak membuat lease kedaluwarsa."""
+
+    def __init__(self, worker_id, lease_dir, ttl, interval):
+        super().__init__(daemon=True)
+        self.worker_id, self.lease_dir, self.ttl, self.interval = worker_id, lease_dir, ttl, interval
+        self.info = {}
+        self._stopped = threading.Event()
+
+    def beat(self):
+        try:
+            renew_lease(self.worker_id, self.lease_dir, self.ttl, **self.info)
+        except OSError as e:
+            print(f"[{self.worker_id}] Gagal memperbarui lease: {e}")
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.beat()
+
+    def stop(self):
+        self._stopped.set()
+
+
+# --- worker -----------------------------------------------------------------
+
+def read_topology(path=None, max_age=None):
+    """Status upstream hasil probe leader, atau {} jika file belum ada/terlalu lama.
+
+    Dipakai worker non-leader. File yang lebih tua dari `max_age` detik (leader
+    baru saja mati) diabaikan: ONT di-ping langsung tanpa pemblokiran upstream
+    sampai leader berikutnya menulis status baru.
+    """
+    import topology
+    path = path or topology.UPSTREAM_STATUS_FILE
+    if max_age is not None:
+        try:
+            if time.time() - os.path.getmtime(path) > max_age:
+                return {}
+        except OSError:
+            return {}
+    return topology.load_statuses(path)
+
+
+def run_worker(worker_id, lease_dir=LEASE_DIR, ttl=LEASE_TTL, heartbeat=HEARTBEAT_INTERVAL):
+    """Loop satu worker: heartbeat, hitung shard, ping, merge hasil ke inventaris."""
+    import ping_check
+    import profiler
+    from inventory import InventoryRepository
+
+    inventory = InventoryRepository(ping_check.DATA_FILE)
+    beat = _Heartbeat(worker_id, lease_dir, ttl, heartbeat)
+    beat.beat()
+    beat.start()
+    # Beri kesempatan worker lain mendaftar sebelum shard pertama dihitung
+    time.sleep(min(heartbeat, 2))
+    last_ping_check = 0
+    last_mikrotik_check = 0
+    members = []
+    print(f"🚀 Worker pinger {worker_id} berjalan (lease di {lease_dir})")
+    try:
+        while True:
+            try:
+                now = time.time()
+                if now - last_ping_check >= ping_check.PING_INTERVAL:
+                    last_ping_check = now
+                    members = live_workers(lease_dir)
+                    if worker_id not in members:
+                        beat.beat()
+                        members = sorted(set(members) | {worker_id})
+                    ring = HashRing(members)
+                    leader = members[0] == worker_id
+                    onts = inventory.all()
+                    mine = [o for o in onts if ring.owner(o.get('id')) == worker_id]
+                    beat.info = {'shard_size': len(mine), 'members': len(members), 'last_sweep': now}
+                    print(f"\n--- [{worker_id}] Ping {len(mine)}/{len(onts)} ONT "
+                          f"({len(members)} worker hidup, {time.ctime()}) ---")
+                    with profiler.PROFILER.capture('cycle', f'shard-{worker_id}'):
+                        # Upstream di-probe sekali per sweep oleh leader, bukan oleh setiap worker
+                        if leader:
+                            upstreams = ping_check.probe_topology()
+                        else:
+                            upstreams = read_topology(max_age=ping_check.PING_INTERVAL * 3)
+                        updates = ping_check.probe_statuses(mine, upstreams,
+                                                             ping_check.collect_provider_observations(mine))
+                        # Journal biasa; snapshot penuh per worker akan saling berebut lock
+                        ping_check.apply_status_updates(inventory, updates, compact=False)
+                    beat.info['last_duration'] = round(time.time() - now, 2)
+
+                if members and members[0] == worker_id and \
+                        now - last_mikrotik_check >= ping_check.MIKROTIK_INTERVAL:
+                    last_mikrotik_check = now
+                    print(f"\n--- [{worker_id}] Pengecekan User MikroTik (leader) ---")
+                    ping_check.report_mikrotik_users()
+
+                time.sleep(1)
+            except Exception as e:
+                print(f"\n[{worker_id}] Error pada loop worker: {e}")
+                time.sleep(10)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        beat.stop()
+        release_lease(worker_id, lease_dir)
+        print(f"🛑 Worker {worker_id} berhenti, lease dilepas.")
+
+
+def supervise(count, node, lease_dir=LEASE_DIR):
+    """Menjalankan `count` proses worker dan menghidupkan ulang yang mati."""
+    def spawn(i):
+        p = multiprocessing.Process(target=run_worker, args=(f'{node}-w{i}', lease_dir), daemon=False)
+        p.start()
+        return p
+
+    procs = {i: spawn(i) for i in range(count)}
+    try:
+        while True:
+            time.sleep(RESTART_DELAY)
+            for i, p in list(procs.items()):
+                if not p.is_alive():
+                    print(f"⚠️  Worker {node}-w{i} keluar (exit {p.exitcode}), dijalankan ulang.")
+                    procs[i] = spawn(i)
+    except KeyboardInterrupt:
+        print("\n🛑 Menghentikan semua worker...")
+        for p in procs.values():
+            p.join(timeout=15)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pinger ONT ter-shard (multi-proses/multi-host).")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Jumlah proses worker di host ini")
+    parser.add_argument('--node', default=socket.gethostname(), help="Nama node, prefix ID worker")
+    parser.add_argument('--lease-dir', default=LEASE_DIR, help="Folder lease bersama")
+    args = parser.parse_args(argv)
+    if args.workers <= 1:
+        run_worker(f'{args.node}-w0', args.lease_dir)
+    else:
+        supervise(args.workers, args.node, args.lease_dir)
+
+
+if __name__ == "__main__":
+    main()
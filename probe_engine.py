@@ -0,0 +1,169 @@
+"""
+Mesin probe ICMP batch dengan pembatas laju.
+
+Satu socket ICMP mengirim echo request ke banyak IP dengan laju tetap
+(packets per second) sambil menerima balasan, jadi menyapu ribuan IP cukup
+beberapa detik alih-alih satu proses `ping` per IP. Urutan socket yang dicoba:
+  1. ICMP datagram tanpa root (Linux, jika net.ipv4.ping_group_range mengizinkan)
+  2. raw socket ICMP (root/administrator)
+  3. cadangan: `ping` paralel lewat thread pool dengan laju yang sama
+"""
+
+import itertools
+import os
+import platform
+import select
+import socket
+import struct
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+DEFAULT_PPS = 1000
+DEFAULT_TIMEOUT = 1.5
+DEFAULT_WORKERS = 64
+ICMP_ECHO_REQUEST, ICMP_ECHO_REPLY = 8, 0
+
+SWEEP_SECONDS = metrics.histogram('probe_sweep_seconds', 'Durasi satu sweep probe batch', ('method',))
+SWEEP_PROBES = metrics.counter('probe_sweep_probes_total', 'Jumlah probe yang dikirim sweep batch', ('method',))
+SWEEP_REPLIES = metrics.counter('probe_sweep_replies_total', 'Jumlah IP yang membalas pada sweep batch', ('method',))
+
+
+class RateLimiter:
+    """Token bucket sederhana; `wait()` memblokir sampai satu token tersedia."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, rate / 20))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                time.sleep((1 - self.tokens) / self.rate)
+
+
+def _checksum(data):
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack(f'!{len(data) // 2}H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _echo_packet(identifier, sequence):
+    payload = b'monitoringwebjss'
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    checksum = _checksum(header + payload)
+    return struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, checksum, identifier, sequence) + payload
+
+
+def _open_icmp_socket():
+    """Mengembalikan (socket, raw) atau (None, None) jika ICMP socket tidak tersedia."""
+    for kind, raw in ((socket.SOCK_DGRAM, False), (socket.SOCK_RAW, True)):
+        try:
+            sock = socket.socket(socket.AF_INET, kind, socket.IPPROTO_ICMP)
+        except (PermissionError, OSError):
+            continue
+        sock.setblocking(False)
+        return sock, raw
+    return None, None
+
+
+def _icmp_sweep(sock, raw, ips, pps, timeout):
+    identifier = os.getpid() & 0xFFFF
+    limiter = RateLimiter(pps)
+    alive = set()
+    targets = set(ips)
+
+    def drain(deadline):
+        while True:
+            wait = max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([sock], [], [], wait)
+            if not ready:
+                return
+            try:
+                data, (source, _) = sock.recvfrom(2048)
+            except BlockingIOError:
+                continue
+            except OSError:
+                return
+            if raw:
+                data = data[(data[0] & 0x0F) * 4:]  # lewati header IP
+            if len(data) < 8 or data[0] != ICMP_ECHO_REPLY:
+                continue
+            # Socket datagram: kernel sudah memfilter identifier; raw socket: cek sendiri
+            if raw and struct.unpack('!H', data[4:6])[0] != identifier:
+                continue
+            if source in targets:
+                alive.add(source)
+
+    for sequence, ip in zip(itertools.cycle(range(1, 0x10000)), ips):
+        limiter.wait()
+        try:
+            sock.sendto(_echo_packet(identifier, sequence), (ip, 0))
+        except OSError:
+            pass  # mis. network unreachable untuk satu alamat
+        drain(time.monotonic())
+    drain(time.monotonic() + timeout)
+    return alive
+
+
+def _ping_once(ip, timeout):
+    if platform.system().lower() == "windows":
+        command = ["ping", "-n", "1", "-w", str(int(timeout * 1000)), ip]
+    else:
+        command = ["ping", "-c", "1", "-W", str(max(1, int(round(timeout)))), ip]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, check=False)
+    except OSError:
+        return False
+    if platform.system().lower() == "windows":
+        return "TTL=" in result.stdout
+    return result.returncode == 0
+
+
+def _subprocess_sweep(ips, pps, timeout, workers):
+    limiter = RateLimiter(pps)
+    alive = set()
+
+    def probe(ip):
+        limiter.wait()
+        if _ping_once(ip, timeout):
+            alive.add(ip)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(probe, ips))
+    return alive
+
+
+def sweep(ips, pps=DEFAULT_PPS, timeout=DEFAULT_TIMEOUT, workers=DEFAULT_WORKERS):
+    """Probe semua IP sekali; mengembalikan (set IP yang membalas, metode yang dipakai)."""
+    ips = list(ips)
+    if not ips:
+        return set(), 'none'
+    started = time.perf_counter()
+    sock, raw = _open_icmp_socket()
+    if sock is None:
+        alive, method = _subprocess_sweep(ips, pps, timeout, workers), 'subprocess'
+    else:
+        try:
+            alive, method = _icmp_sweep(sock, raw, ips, pps, timeout), 'icmp-raw' if raw else 'icmp-dgram'
+        finally:
+            sock.close()
+    SWEEP_SECONDS.observe(time.perf_counter() - started, method=method)
+    SWEEP_PROBES.inc(len(ips), method=method)
+    SWEEP_REPLIES.inc(len(alive), method=method)
+    return alive, method
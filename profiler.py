@@ -0,0 +1,312 @@
+"""
+Profiling opsional untuk request yang lambat dan siklus ping.
+
+Jika aktif, setiap request (atau siklus ping) dijalankan di bawah cProfile;
+hasilnya hanya disimpan bila durasinya melewati ambang batas. Opsional juga
+snapshot tracemalloc: pertumbuhan memori dibandingkan dengan capture
+sebelumnya. Setiap capture menghasilkan dua file di reports/profiles/:
+  <nama>.pstats  data mentah (buka dengan `python -m pstats` atau snakeviz)
+  <nama>.json    ringkasan: durasi, top-N fungsi kumulatif, pertumbuhan memori
+
+Saat nonaktif, biaya per request hanya satu pengecekan flag (settings file
+dibaca ulang paling sering sekali per REFRESH_INTERVAL detik).
+
+Pengaturan awal dari environment, bisa diubah lewat /admin/profiles (disimpan
+ke reports/profiles/settings.json agar proses pinger ikut membacanya):
+    PROFILE_ENABLED      1/true untuk mengaktifkan
+    PROFILE_REQUEST_MS   ambang request lambat (default 500)
+    PROFILE_CYCLE_MS     ambang siklus ping lambat (default 10000)
+    PROFILE_TRACEMALLOC  1/true untuk snapshot memori
+    PROFILE_KEEP         jumlah capture yang disimpan (default 50)
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_DIR = os.path.join('reports', 'profiles')
+SETTINGS_FILE = 'settings.json'
+REFRESH_INTERVAL = 5.0
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 15
+# Satu route/siklus yang terus lambat tidak perlu di-capture setiap kali
+CAPTURE_COOLDOWN = 60
+TRACEMALLOC_FRAMES = 5
+
+_NAME_RE = re.compile(r'^[0-9]{8}T[0-9]{6,12}-[a-z]+-[A-Za-z0-9_.-]+$')
+
+
+def _env_flag(name):
+    return os.environ.get(name, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def default_settings():
+    return {
+        'enabled': _env_flag('PROFILE_ENABLED'),
+        'request_threshold_ms': float(os.environ.get('PROFILE_REQUEST_MS', 500)),
+        'cycle_threshold_ms': float(os.environ.get('PROFILE_CYCLE_MS', 10000)),
+        'tracemalloc': _env_flag('PROFILE_TRACEMALLOC'),
+        'keep': int(os.environ.get('PROFILE_KEEP', 50)),
+    }
+
+
+def _validate(changes):
+    """Mengembalikan dict pengaturan yang sudah dinormalisasi; ValueError jika tidak valid."""
+    schema = default_settings()
+    clean = {}
+    for key, value in changes.items():
+        if key not in schema:
+            raise ValueError(f"Pengaturan tidak dikenal: {key}")
+        if isinstance(schema[key], bool):
+            if not isinstance(value, bool):
+                raise ValueError(f"{key} harus true/false")
+            clean[key] = value
+        else:
+            try:
+                number = type(schema[key])(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{key} harus berupa angka")
+            if number < 0 or (key == 'keep' and number < 1):
+                raise ValueError(f"{key} di luar rentang")
+            clean[key] = number
+    return clean
+
+
+def _slug(text):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', text).strip('_')[:80] or 'root'
+
+
+class Profiler:
+    def __init__(self, directory=PROFILE_DIR):
+        self.directory = directory
+        self.settings = default_settings()
+        self._settings_mtime = None
+        self._next_refresh = 0.0
+        self._last_capture = {}
+        self._memory_baseline = None
+        self._lock = threading.Lock()
+
+    @property
+    def settings_path(self):
+        return os.path.join(self.directory, SETTINGS_FILE)
+
+    # --- pengaturan ---------------------------------------------------------
+
+    def refresh(self):
+        """Membaca ulang settings.json jika berubah (dibatasi sekali per REFRESH_INTERVAL)."""
+        now = time.monotonic()
+        if now < self._next_refresh:
+            return
+        self._next_refresh = now + REFRESH_INTERVAL
+        try:
+            mtime = os.path.getmtime(self.settings_path)
+        except OSError:
+            mtime = None
+        if mtime == self._settings_mtime:
+            return
+        self._settings_mtime = mtime
+        settings = default_settings()
+        if mtime is not None:
+            try:
+                with open(self.settings_path, 'r', encoding='utf-8') as f:
+                    settings.update(_validate(json.load(f)))
+            except (OSError, ValueError) as e:
+                print(f"Warning: settings profiling tidak valid, memakai default: {e}")
+        self._apply(settings)
+
+    def _apply(self, settings):
+        self.settings = settings
+        want_memory = settings['enabled'] and settings['tracemalloc']
+        if want_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._memory_baseline = None
+        elif not want_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self._memory_baseline = None
+
+    def update_settings(self, changes):
+        """Mengubah pengaturan (mis. dari /admin/profiles) dan menyimpannya untuk proses lain."""
+        settings = dict(self.settings)
+        settings.update(_validate(changes))
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.settings-', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(settings, f, indent=2)
+        os.replace(tmp, self.settings_path)
+        self._settings_mtime = os.path.getmtime(self.settings_path)
+        self._apply(settings)
+        return settings
+
+    # --- capture ------------------------------------------------------------
+
+    def start(self):
+        """Mulai profiling jika aktif; mengembalikan sesi (atau None) untuk `finish`."""
+        self.refresh()
+        if not self.settings['enabled']:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return None  # profiler lain sudah aktif di thread ini
+        return profile, time.perf_counter()
+
+    def finish(self, session, kind, label, threshold_ms):
+        """Menghentikan sesi; menyimpan capture jika lebih lambat dari ambang. Mengembalikan nama capture."""
+        if session is None:
+            return None
+        profile, started = session
+        profile.disable()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms < threshold_ms:
+            return None
+        key = (kind, label)
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_capture.get(key, -CAPTURE_COOLDOWN) < CAPTURE_COOLDOWN:
+                return None
+            self._last_capture[key] = now
+        try:
+            return self._save(profile, kind, label, elapsed_ms, threshold_ms)
+        except OSError as e:
+            print(f"Warning: gagal menyimpan profil {kind} {label}: {e}")
+            return None
+
+    @contextmanager
+    def capture(self, kind, label, threshold_ms=None):
+        """Profil satu blok (mis. siklus ping); ambang default `cycle_threshold_ms`."""
+        session = self.start()
+        try:
+            yield
+        finally:
+            if session is not None:
+                threshold = self.settings['cycle_threshold_ms'] if threshold_ms is None else threshold_ms
+                self.finish(session, kind, label, threshold)
+
+    def _save(self, profile, kind, label, elapsed_ms, threshold_ms):
+        os.makedirs(self.directory, exist_ok=True)
+        created = datetime.now()
+        name = f"{created:%Y%m%dT%H%M%S%f}-{kind}-{_slug(label)}"
+        stats = pstats.Stats(profile)
+        stats.dump_stats(os.path.join(self.directory, name + '.pstats'))
+        summary = {
+            'name': name,
+            'kind': kind,
+            'label': label,
+            'created': created.isoformat(timespec='seconds'),
+            'pid': os.getpid(),
+            'elapsed_ms': round(elapsed_ms, 2),
+            'threshold_ms': threshold_ms,
+            'total_calls': stats.total_calls,
+            'top_cumulative': _top_functions(stats, TOP_FUNCTIONS),
+        }
+        memory = self._memory_summary()
+        if memory is not None:
+            summary['memory'] = memory
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.profile-', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        os.replace(tmp, os.path.join(self.directory, name + '.json'))
+        self._enforce_retention()
+        print(f"[profiler] {kind} {label} {elapsed_ms:.0f} ms -> {name}")
+        return name
+
+    def _memory_summary(self):
+        if not tracemalloc.is_tracing():
+            return None
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            baseline, self._memory_baseline = self._memory_baseline, snapshot
+        if baseline is None:
+            top = [{'location': _frame(s.traceback), 'size_kb': round(s.size / 1024, 1), 'count': s.count}
+                   for s in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]]
+            mode = 'largest'
+        else:
+            top = [{'location': _frame(s.traceback), 'size_kb': round(s.size / 1024, 1),
+                    'growth_kb': round(s.size_diff / 1024, 1), 'count_diff': s.count_diff}
+                   for s in snapshot.compare_to(baseline, 'lineno')[:TOP_ALLOCATIONS]]
+            mode = 'growth_since_previous'
+        return {'traced_kb': round(current / 1024, 1), 'peak_kb': round(peak / 1024, 1),
+                'mode': mode, 'top': top}
+
+    def _enforce_retention(self):
+        names = self._capture_names()
+        for name in names[:max(0, len(names) - self.settings['keep'])]:
+            for ext in ('.json', '.pstats'):
+                try:
+                    os.remove(os.path.join(self.directory, name + ext))
+                except OSError:
+                    pass
+
+    # --- pembacaan ----------------------------------------------------------
+
+    def _capture_names(self):
+        try:
+            files = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(f[:-5] for f in files if f.endswith('.json') and _NAME_RE.match(f[:-5]))
+
+    def list_profiles(self, top=10):
+        """Ringkasan capture dari yang terbaru, masing-masing dengan `top` fungsi kumulatif teratas."""
+        profiles = []
+        for name in reversed(self._capture_names()):
+            summary = self.load_summary(name)
+            if summary is None:
+                continue
+            summary['top_cumulative'] = summary.get('top_cumulative', [])[:top]
+            if 'memory' in summary:
+                summary['memory']['top'] = summary['memory'].get('top', [])[:top]
+            profiles.append(summary)
+        return profiles
+
+    def load_summary(self, name):
+        if not _NAME_RE.match(name or ''):
+            return None
+        try:
+            with open(os.path.join(self.directory, name + '.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def pstats_path(self, name):
+        """Path file .pstats untuk diunduh, atau None jika nama tidak valid/tidak ada."""
+        if not _NAME_RE.match(name or ''):
+            return None
+        path = os.path.join(self.directory, name + '.pstats')
+        return path if os.path.exists(path) else None
+
+
+def _frame(traceback):
+    frame = traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def _top_functions(stats, limit):
+    stats.sort_stats(pstats.SortKey.CUMULATIVE)
+    top = []
+    for func in stats.fcn_list[:limit]:
+        primitive, calls, own, cumulative, _ = stats.stats[func]
+        top.append({
+            'function': pstats.func_std_string(func),
+            'calls': calls,
+            'primitive_calls': primitive,
+            'tottime_ms': round(own * 1000, 3),
+            'cumtime_ms': round(cumulative * 1000, 3),
+        })
+    return top
+
+
+PROFILER = Profiler()
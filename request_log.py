@@ -0,0 +1,267 @@
+"""
+Log timing per request (JSON Lines) dan agregasinya untuk /admin/perf.
+
+Setiap request menghasilkan satu baris ringkas: route, status, ukuran body,
+total waktu, serta waktu yang dihabiskan di I/O penyimpanan dan serialisasi
+JSON. Baris dimasukkan ke antrean di memori dan ditulis oleh thread
+background, jadi thread request tidak pernah menunggu disk. File dirotasi
+berdasarkan ukuran (requests.jsonl -> requests.jsonl.1 -> ...).
+
+Konfigurasi lewat environment:
+    REQUEST_LOG_FILE    path log (default requests.jsonl; kosong = nonaktif)
+    REQUEST_LOG_SAMPLE  rasio sampling 0..1 (default 1); error 5xx dan request
+                        lambat selalu dicatat
+"""
+
+import atexit
+import collections
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+import store_lock
+
+DEFAULT_LOG_FILE = 'requests.jsonl'
+MAX_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 5
+FLUSH_INTERVAL = 1.0
+MAX_QUEUE = 20000
+# Request selambat ini selalu dicatat walau tidak terpilih sampling
+ALWAYS_LOG_MS = 1000
+MAX_REPORT_LINES = 200000
+
+_phases = contextvars.ContextVar('request_phases', default=None)
+
+
+# --- pencatatan fase --------------------------------------------------------
+
+def begin():
+    """Mulai mengumpulkan waktu per fase untuk request di konteks ini."""
+    _phases.set({})
+
+
+def end():
+    """Mengembalikan {fase: detik} request ini dan berhenti mengumpulkan."""
+    phases = _phases.get()
+    _phases.set(None)
+    return {name: state[0] for name, state in (phases or {}).items()}
+
+
+@contextmanager
+def phase(name):
+    """Menambahkan durasi blok ke fase `name`; blok bersarang dengan nama sama hanya dihitung sekali."""
+    phases = _phases.get()
+    if phases is None:
+        yield
+        return
+    state = phases.setdefault(name, [0.0, 0])
+    state[1] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        state[1] -= 1
+        if state[1] == 0:
+            state[0] += time.perf_counter() - started
+
+
+def timed_phase(name):
+    """Versi decorator dari `phase`."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --- penulis log ------------------------------------------------------------
+
+class RequestLogger:
+    def __init__(self, path, sample_rate=1.0, max_bytes=MAX_BYTES, backup_count=BACKUP_COUNT,
+                 flush_interval=FLUSH_INTERVAL, max_queue=MAX_QUEUE):
+        self.path = path
+        self.sample_rate = max(0.0, min(1.0, float(sample_rate)))
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = collections.deque(maxlen=max_queue)
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        path = os.environ.get('REQUEST_LOG_FILE', DEFAULT_LOG_FILE)
+        return cls(path, sample_rate=float(os.environ.get('REQUEST_LOG_SAMPLE', 1.0)))
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def record(self, entry):
+        """Dipanggil dari thread request: hanya sampling dan append ke deque."""
+        if not self.enabled:
+            return
+        if self.sample_rate < 1.0 and entry.get('status', 0) < 500 and entry.get('ms', 0) < ALWAYS_LOG_MS \
+                and random.random() >= self.sample_rate:
+            return
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1  # deque membuang entri tertua
+        self._queue.append(entry)
+        if self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='request-log', daemon=True)
+                self._thread.start()
+                atexit.register(self._flush_quietly)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self._flush_quietly()
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except OSError as e:
+            print(f"Warning: gagal menulis request log: {e}")
+
+    def flush(self):
+        """Menulis semua entri yang mengantre ke file (dipanggil thread background)."""
+        with self._write_lock:
+            lines = []
+            while self._queue:
+                try:
+                    entry = self._queue.popleft()
+                except IndexError:
+                    break
+                lines.append(json.dumps(entry, separators=(',', ':'), ensure_ascii=False))
+            if not lines:
+                return 0
+            data = ('\n'.join(lines) + '\n').encode('utf-8')
+            # Worker lain (serve.py) menulis ke file yang sama; rotasi hanya boleh terjadi sekali
+            with store_lock.shared_lock(self.path):
+                self._rotate_if_needed(len(data))
+                with open(self.path, 'ab') as f:
+                    f.write(data)
+            return len(lines)
+
+    def _rotate_if_needed(self, incoming):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return
+        if size + incoming <= self.max_bytes:
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f'{self.path}.{i}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.path}.{i + 1}')
+        if self.backup_count > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+
+    def log_files(self):
+        """File log dari yang tertua ke terbaru."""
+        files = [f'{self.path}.{i}' for i in range(self.backup_count, 0, -1)]
+        files.append(self.path)
+        return [f for f in files if os.path.exists(f)]
+
+
+def make_entry(method, route, path, status, size, seconds, phases):
+    entry = {
+        'ts': datetime.now().isoformat(timespec='milliseconds'),
+        'method': method,
+        'route': route,
+        'path': path,
+        'status': status,
+        'bytes': size,
+        'ms': round(seconds * 1000, 2),
+    }
+    for name, value in phases.items():
+        entry[f'{name}_ms'] = round(value * 1000, 2)
+    return entry
+
+
+# --- agregasi ---------------------------------------------------------------
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def _iter_entries(files, max_lines):
+    """Baris log terbaru (maksimal `max_lines`); baris yang bukan entri timing dilewati."""
+    recent = collections.deque(maxlen=max_lines)
+    for path in files:
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    recent.append(line)
+        except OSError:
+            continue
+    for line in recent:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(entry, dict) and 'route' in entry and 'ms' in entry:
+            yield entry
+
+
+def build_report(files, top=25, max_lines=MAX_REPORT_LINES):
+    """Per route: jumlah, error, p50/p95/p99, rata-rata fase; plus request paling lambat."""
+    by_route = collections.defaultdict(list)
+    slowest = []
+    total = 0
+    first_ts = last_ts = None
+    for entry in _iter_entries(files, max_lines):
+        total += 1
+        key = (entry.get('method', ''), entry['route'])
+        by_route[key].append(entry)
+        first_ts = first_ts or entry.get('ts')
+        last_ts = entry.get('ts') or last_ts
+        slowest.append((entry['ms'], entry))
+    slowest.sort(key=lambda item: item[0], reverse=True)
+
+    routes = []
+    for (method, route), entries in by_route.items():
+        times = sorted(e['ms'] for e in entries)
+        phase_names = sorted({k for e in entries for k in e if k.endswith('_ms') and k != 'ms'})
+        routes.append({
+            'method': method,
+            'route': route,
+            'count': len(entries),
+            'errors': sum(1 for e in entries if e.get('status', 0) >= 500),
+            'p50_ms': _percentile(times, 50),
+            'p95_ms': _percentile(times, 95),
+            'p99_ms': _percentile(times, 99),
+            'max_ms': times[-1],
+            'total_ms': round(sum(times), 2),
+            'avg_bytes': round(sum(e.get('bytes') or 0 for e in entries) / len(entries)),
+            'avg_phase_ms': {p[:-3]: round(sum(e.get(p, 0) for e in entries) / len(entries), 2) for p in phase_names},
+        })
+    # Route yang menghabiskan waktu server paling banyak di atas
+    routes.sort(key=lambda r: r['total_ms'], reverse=True)
+    return {
+        'requests': total,
+        'from': first_ts,
+        'to': last_ts,
+        'routes': routes,
+        'slowest': [entry for _, entry in slowest[:top]],
+    }
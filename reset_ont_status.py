@@ -4,49 +4,44 @@ Script untuk reset status semua ONT ke ON
 Berguna untuk testing sistem ping
 """
 
-import json
-import os
+from inventory import InventoryRepository
+
+DATA_FILE = "onts.json"
 
 def reset_ont_status():
     """Reset semua status ONT ke ON"""
     try:
-        # Baca file onts.json
-        with open("onts.json", "r", encoding='utf-8') as f:
-            onts = json.load(f)
-        
-        print(f"🔄 Reset status {len(onts)} ONT...")
-        
-        # Reset semua status ke ON
-        for ont in onts:
-            ont['status'] = "ON"
-            ont['rto_count'] = 0
-            print(f"✅ {ont.get('name', 'Unknown')} ({ont.get('ip', 'N/A')}) → ON")
-        
-        # Simpan kembali ke file
-        with open("onts.json", "w", encoding='utf-8') as f:
-            json.dump(onts, f, indent=2, ensure_ascii=False)
+        # Lewat repository agar perubahan admin yang masih di journal ikut terbaca
+        inventory = InventoryRepository(DATA_FILE)
+        with inventory.transaction(compact=True) as tx:
+            onts = [tx.get(ont_id) for ont_id in tx.ids()]
+            if not onts:
+                print("❌ Tidak ada ONT di onts.json!")
+                print("💡 Pastikan file onts.json ada di direktori yang sama")
+                tx.abort()
+                return
+            
+            print(f"🔄 Reset status {len(onts)} ONT...")
+            
+            # Reset semua status ke ON
+            for ont in onts:
+                tx.update(ont['id'], {'status': "ON", 'rto_count': 0})
+                print(f"✅ {ont.get('name', 'Unknown')} ({ont.get('ip', 'N/A')}) → ON")
         
         print(f"\n🎉 Berhasil reset {len(onts)} ONT ke status ON")
         print("💾 File onts.json telah diperbarui")
         
         # Tampilkan statistik
-        online_count = len([ont for ont in onts if ont['status'] == 'ON'])
+        online_count = len([ont for ont in inventory.all() if ont['status'] == 'ON'])
         print(f"📊 Statistik: {online_count} ONLINE, 0 OFFLINE")
         
-    except FileNotFoundError:
-        print("❌ File onts.json tidak ditemukan!")
-        print("💡 Pastikan file onts.json ada di direktori yang sama")
-    except json.JSONDecodeError:
-        print("❌ File onts.json tidak valid!")
-        print("💡 Pastikan format JSON benar")
     except Exception as e:
         print(f"❌ Error: {e}")
 
 def show_current_status():
     """Tampilkan status ONT saat ini"""
     try:
-        with open("onts.json", "r", encoding='utf-8') as f:
-            onts = json.load(f)
+        onts = InventoryRepository(DATA_FILE).all()
         
         print("📋 STATUS ONT SAAT INI:")
         print("=" * 60)
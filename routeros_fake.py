@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Server RouterOS API tiruan untuk pengujian dan benchmark koleksi hotspot.
+
+Berbicara protokol API biner RouterOS (word ber-prefix panjang, sentence
+diakhiri word kosong, balasan !re/!done/!trap/!fatal dengan .tag) sehingga
+library routeros_api bisa dipakai apa adanya, cukup diarahkan ke localhost.
+
+Yang dilayani:
+  /login                          plaintext (name+password) atau challenge MD5
+  /ip/hotspot/active/print        populasi user sintetis (=.proplist=, =count-only=, query ?key=value)
+  /system/identity/print, /system/resource/print
+  /cancel, /quit
+
+Populasi berubah seiring waktu: sebagian user logout dan user baru login
+(churn), counter byte/packet terus bertambah. Latensi dan kegagalan bisa
+disuntikkan untuk menguji timeout dan retry di sisi pengumpul.
+
+Menjalankan server lalu web app/pinger yang mengarah ke sana:
+    python routeros_fake.py --port 8729 --users 3000 --churn 0.05 --latency 40 --fail-rate 0.02
+    MOCK_ROUTEROS=0 MIKROTIK_IP=127.0.0.1 MIKROTIK_PORT=8729 python run_local.py
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import socket
+import socketserver
+import threading
+import time
+
+from hotspot_sessions import format_duration
+
+DEFAULT_PORT = 8728
+DEFAULT_USERNAME = 'monitor'
+DEFAULT_PASSWORD = 's0t0kudus'
+HOTSPOT_ACTIVE = '/ip/hotspot/active'
+
+
+# --- encoding word ----------------------------------------------------------
+
+def encode_length(length):
+    if length < 0x80:
+        return bytes([length])
+    if length < 0x4000:
+        return (length | 0x8000).to_bytes(2, 'big')
+    if length < 0x200000:
+        return (length | 0xC00000).to_bytes(3, 'big')
+    if length < 0x10000000:
+        return (length | 0xE0000000).to_bytes(4, 'big')
+    return b'\xF0' + length.to_bytes(4, 'big')
+
+
+def _read_exact(stream, count):
+    data = stream.read(count)
+    if len(data) != count:
+        raise ConnectionError("Koneksi ditutup di tengah word")
+    return data
+
+
+def read_length(stream):
+    first = stream.read(1)
+    if not first:
+        raise ConnectionError("Koneksi ditutup")
+    b = first[0]
+    if b < 0x80:
+        return b
+    if b < 0xC0:
+        return ((b & 0x3F) << 8) | _read_exact(stream, 1)[0]
+    if b < 0xE0:
+        return ((b & 0x1F) << 16) | int.from_bytes(_read_exact(stream, 2), 'big')
+    if b < 0xF0:
+        return ((b & 0x0F) << 24) | int.from_bytes(_read_exact(stream, 3), 'big')
+    if b == 0xF0:
+        return int.from_bytes(_read_exact(stream, 4), 'big')
+    raise ConnectionError(f"Byte kontrol tidak dikenal: {b:#x}")
+
+
+def read_sentence(stream):
+    words = []
+    while True:
+        length = read_length(stream)
+        if length == 0:
+            return words
+        words.append(_read_exact(stream, length).decode('utf-8', errors='replace'))
+
+
+def encode_sentence(words):
+    out = bytearray()
+    for word in words:
+        data = word.encode('utf-8')
+        out += encode_length(len(data)) + data
+    out += b'\x00'
+    return bytes(out)
+
+
+def parse_command(words):
+    """Memecah sentence perintah menjadi (command, atribut, query, tag)."""
+    command, attributes, queries, tag = words[0], {}, [], None
+    for word in words[1:]:
+        if word.startswith('='):
+            key, _, value = word[1:].partition('=')
+            attributes[key] = value
+        elif word.startswith('?'):
+            queries.append(word[1:])
+        elif word.startswith('.tag='):
+            tag = word[5:]
+    return command, attributes, queries, tag
+
+
+# --- populasi hotspot -------------------------------------------------------
+
+class HotspotPopulation:
+    """User hotspot aktif sintetis dengan churn dan counter yang terus bertambah.
+
+    `churn`: fraksi populasi yang berganti per menit. `time_scale` mempercepat
+    waktu simulasi (mis. 60 = satu jam simulasi per menit nyata).
+    """
+
+    def __init__(self, size=2000, churn=0.02, seed=None, time_scale=1.0):
+        self.size = size
+        self.churn = churn
+        self.time_scale = time_scale
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._free_hosts = list(range(2, 2 + size * 4))
+        self._rng.shuffle(self._free_hosts)
+        self._users = {}
+        self._started = time.monotonic()
+        self._now = 0.0
+        self._pending_churn = 0.0
+        for _ in range(size):
+            # Sesi awal sudah berjalan 0-8 jam
+            self._login(-self._rng.uniform(0, 8 * 3600))
+
+    def _clock(self):
+        return (time.monotonic() - self._started) * self.time_scale
+
+    def _login(self, login_at):
+        host = self._free_hosts.pop()
+        user_id = self._next_id
+        self._next_id += 1
+        self._users[user_id] = {
+            'id': user_id,
+            'host': host,
+            'user': f"T-{self._rng.randrange(10 ** 6):06d}",
+            'address': f"172.16.{host >> 8 & 255}.{host & 255}",
+            'mac': '02:' + ':'.join(f"{self._rng.randrange(256):02X}" for _ in range(5)),
+            'login_at': login_at,
+            # Arah RouterOS: bytes-out = ke klien (download, rata-rata 5-200 kB/s),
+            # bytes-in = dari klien (upload, sekitar sepersepuluhnya)
+            'rate_out': self._rng.lognormvariate(10.5, 1.0),
+            'rate_in': self._rng.lognormvariate(8.2, 1.0),
+        }
+
+    def advance(self):
+        """Memajukan simulasi ke waktu sekarang; mengembalikan jumlah user yang berganti."""
+        with self._lock:
+            now = self._clock()
+            elapsed, self._now = now - self._now, now
+            self._pending_churn += self.size * self.churn * elapsed / 60
+            changes = int(self._pending_churn)
+            self._pending_churn -= changes
+            changes = min(changes, len(self._users))
+            for user_id in self._rng.sample(list(self._users), changes):
+                self._free_hosts.append(self._users.pop(user_id)['host'])
+            for _ in range(changes):
+                self._login(now - self._rng.uniform(0, max(elapsed, 1)))
+            return changes
+
+    def rows(self):
+        """Baris /ip/hotspot/active/print dalam bentuk string seperti router sungguhan."""
+        self.advance()
+        with self._lock:
+            now = self._now
+            users = list(self._users.values())
+        rows = []
+        for u in users:
+            age = max(0.0, now - u['login_at'])
+            bytes_in, bytes_out = int(u['rate_in'] * age), int(u['rate_out'] * age)
+            rows.append({
+                '.id': f"*{u['id']:X}",
+                'server': 'hotspot1',
+                'user': u['user'],
+                'domain': '',
+                'address': u['address'],
+                'mac-address': u['mac'],
+                'login-by': 'http-chap',
+                'uptime': format_duration(age),
+                'idle-time': format_duration(self._rng.uniform(0, 30)),
+                'keepalive-timeout': '2m',
+                'bytes-in': str(bytes_in),
+                'bytes-out': str(bytes_out),
+                'packets-in': str(bytes_in // 120),
+                'packets-out': str(bytes_out // 900),
+                'radius': 'false',
+            })
+        return rows
+
+
+# --- server -----------------------------------------------------------------
+
+class Faults:
+    """Gangguan yang disuntikkan: latensi per perintah, per baris, !trap acak dan koneksi putus."""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, per_row_us=0.0, fail_rate=0.0, drop_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.per_row_us = per_row_us
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def roll(self):
+        """Mengembalikan (delay detik sebelum balasan, 'fail'/'drop'/None)."""
+        with self._lock:
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            r = self._rng.random()
+        if r < self.drop_rate:
+            return delay, 'drop'
+        if r < self.drop_rate + self.fail_rate:
+            return delay, 'fail'
+        return delay, None
+
+
+class _DropConnection(Exception):
+    pass
+
+
+class _Session(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.logged_in = False
+        self.challenge = None
+
+    def handle(self):
+        server = self.server.owner
+        with server._lock:
+            server.stats['connections'] += 1
+        while True:
+            try:
+                words = read_sentence(self.rfile)
+            except (ConnectionError, OSError):
+                return
+            if not words:
+                continue
+            try:
+                self._dispatch(server, *parse_command(words))
+            except (_DropConnection, OSError):
+                return
+            if words[0] == '/quit':
+                return
+
+    def _send(self, sentences, tag):
+        out = bytearray()
+        for words in sentences:
+            if tag is not None:
+                words = words + [f".tag={tag}"]
+            out += encode_sentence(words)
+        self.wfile.write(bytes(out))
+        self.wfile.flush()
+
+    def _dispatch(self, server, command, attributes, queries, tag):
+        with server._lock:
+            server.stats['commands'] += 1
+        if command == '/login':
+            self._send(self._login(server, attributes), tag)
+            return
+        if command == '/quit':
+            self._send([['!fatal', 'session terminated on request']], None)
+            return
+        if command == '/cancel':
+            self._send([['!done']], tag)
+            return
+        if not self.logged_in:
+            self._send([['!trap', '=message=not logged in'], ['!done']], tag)
+            return
+
+        delay, fault = server.faults.roll()
+        rows = server.rows_for(command)
+        if rows is None:
+            time.sleep(delay)
+            self._send([['!trap', '=category=0', f"=message=no such command or directory ({command})"],
+                        ['!done']], tag)
+            return
+        time.sleep(delay + len(rows) * server.faults.per_row_us / 1e6)
+        if fault == 'fail':
+            with server._lock:
+                server.stats['failures'] += 1
+            self._send([['!trap', '=message=simulated failure (fake RouterOS)'], ['!done']], tag)
+            return
+        if fault == 'drop':
+            with server._lock:
+                server.stats['drops'] += 1
+            # Putus di tengah balasan, seperti router yang reboot/overload
+            self._send([_row_words(row) for row in rows[:len(rows) // 2]], tag)
+            raise _DropConnection()
+
+        rows = [row for row in rows if _matches(row, queries)]
+        if 'count-only' in attributes:
+            self._send([['!done', f"=ret={len(rows)}"]], tag)
+            return
+        proplist = [p for p in attributes.get('.proplist', '').split(',') if p]
+        if proplist:
+            rows = [{k: row[k] for k in proplist if k in row} for row in rows]
+        with server._lock:
+            server.stats['rows_sent'] += len(rows)
+        self._send([_row_words(row) for row in rows] + [['!done']], tag)
+
+    def _login(self, server, attributes):
+        name = attributes.get('name')
+        if name is None:
+            self.challenge = os.urandom(16)
+            return [['!done', f"=ret={self.challenge.hex()}"]]
+        if 'password' in attributes:
+            ok = name == server.username and attributes['password'] == server.password
+        elif 'response' in attributes and self.challenge is not None:
+            digest = hashlib.md5(b'\x00' + server.password.encode() + self.challenge).hexdigest()
+            ok = name == server.username and attributes['response'] == '00' + digest
+        else:
+            ok = False
+        if not ok:
+            with server._lock:
+                server.stats['login_failures'] += 1
+            return [['!trap', '=message=invalid user name or password (6)'], ['!done']]
+        self.logged_in = True
+        return [['!done']]
+
+
+def _row_words(row):
+    return ['!re'] + [f"={key}={value}" for key, value in row.items()]
+
+
+def _matches(row, queries):
+    """Query sederhana: ?key=value (sama dengan) dan ?key (field ada); operator stack diabaikan."""
+    for q in queries:
+        if q.startswith('#'):
+            continue
+        key, sep, value = q.partition('=')
+        if sep and row.get(key) != value:
+            return False
+        if not sep and key.lstrip('-') not in row:
+            return False
+    return True
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeRouterOsServer:
+    """Server API RouterOS tiruan. `port=0` memilih port bebas (lihat `address`)."""
+
+    def __init__(self, population=None, username=DEFAULT_USERNAME, password=DEFAULT_PASSWORD,
+                 host='127.0.0.1', port=0, faults=None, identity='FakeRouterOS'):
+        self.population = population or HotspotPopulation()
+        self.username = username
+        self.password = password
+        self.faults = faults or Faults()
+        self.identity = identity
+        self.stats = {'connections': 0, 'commands': 0, 'rows_sent': 0, 'failures': 0, 'drops': 0,
+                      'login_failures': 0}
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._server = _ThreadingServer((host, port), _Session)
+        self._server.owner = self
+        self.address = self._server.server_address
+        self._thread = None
+
+    def rows_for(self, command):
+        if command == f'{HOTSPOT_ACTIVE}/print':
+            return self.population.rows()
+        if command == '/system/identity/print':
+            return [{'name': self.identity}]
+        if command == '/system/resource/print':
+            return [{'uptime': format_duration(time.monotonic() - self._started), 'version': '7.14 (fake)',
+                     'board-name': 'fake', 'cpu-load': '1', 'free-memory': '268435456'}]
+        return None
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-routeros', daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# --- klien minimal ----------------------------------------------------------
+
+class ApiClient:
+    """Klien API RouterOS minimal (tanpa library routeros_api), untuk uji cepat dan benchmark."""
+
+    def __init__(self, host, port=DEFAULT_PORT, timeout=10.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self._stream = self.sock.makefile('rb')
+        self._tag = 0
+        self.last_done = {}
+
+    def talk(self, command, **attributes):
+        """Mengirim satu perintah; mengembalikan daftar atribut !re. !trap menjadi RuntimeError.
+
+        Atribut pada !done (mis. `ret` dari count-only) disimpan di `last_done`.
+        """
+        self._tag += 1
+        words = [command] + [f"={k}={v}" for k, v in attributes.items()] + [f".tag={self._tag}"]
+        self.sock.sendall(encode_sentence(words))
+        rows, error = [], None
+        while True:
+            reply = read_sentence(self._stream)
+            kind, attrs, _, _ = parse_command(reply)
+            if kind == '!re':
+                rows.append(attrs)
+            elif kind == '!trap':
+                error = attrs.get('message', 'trap')
+            elif kind == '!fatal':
+                raise ConnectionError(reply[1] if len(reply) > 1 else 'fatal')
+            elif kind == '!done':
+                self.last_done = attrs
+                if error:
+                    raise RuntimeError(error)
+                return rows
+
+    def login(self, username, password):
+        self.talk('/login', name=username, password=password)
+        return self
+
+    def close(self):
+        self._stream.close()
+        self.sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Server RouterOS API tiruan dengan populasi hotspot sintetis.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--username', default=DEFAULT_USERNAME)
+    parser.add_argument('--password', default=DEFAULT_PASSWORD)
+    parser.add_argument('--users', type=int, default=2000, help="Jumlah user hotspot aktif")
+    parser.add_argument('--churn', type=float, default=0.02, help="Fraksi user yang berganti per menit")
+    parser.add_argument('--time-scale', type=float, default=1.0, help="Percepatan waktu simulasi")
+    parser.add_argument('--latency', type=float, default=0.0, help="Latensi per perintah (ms)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Variasi latensi (ms)")
+    parser.add_argument('--per-row-us', type=float, default=0.0, help="Latensi tambahan per baris (mikrodetik)")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="Peluang perintah dibalas !trap")
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="Peluang koneksi diputus di tengah balasan")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    population = HotspotPopulation(args.users, args.churn, args.seed, args.time_scale)
+    faults = Faults(args.latency, args.jitter, args.per_row_us, args.fail_rate, args.drop_rate, args.seed)
+    server = FakeRouterOsServer(population, args.username, args.password, args.host, args.port, faults)
+    print(f"RouterOS API tiruan ({args.users} user hotspot) di {server.address[0]}:{server.address[1]}, "
+          f"login {args.username}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.close()
+        print(f"\nStatistik: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
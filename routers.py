@@ -0,0 +1,191 @@
+"""
+Registry router hotspot MikroTik dan kolektor user aktif paralel.
+
+Router dikonfigurasi di routers.json; jika file tidak ada, satu router dibaca
+dari environment MIKROTIK_IP/MIKROTIK_PORT/MIKROTIK_USER/MIKROTIK_PASS dengan
+id "default" (perilaku lama).
+
+Contoh routers.json:
+    [{"id": "gw-kudus", "host": "111.92.166.184", "port": 8728,
+      "username": "monitor", "password": "...", "timeout": 10},
+     {"id": "gw-jepara", "host": "10.10.0.1", "timeout": 5, "enabled": true}]
+
+RouterCollector mem-poll semua router bersamaan (satu thread per router) lewat
+koneksi API yang dipertahankan antar-siklus. Setiap router punya timeout
+sendiri; router yang lambat atau mati hanya gagal sendiri, jadi lama satu
+siklus kira-kira sama dengan timeout router terlambat, bukan jumlah semuanya.
+
+Penggunaan:
+    collector = RouterCollector(load_routers())
+    results = collector.collect()   # {router_id: [user, ...] atau None jika gagal}
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import metrics
+
+ROUTERS_FILE = 'routers.json'
+DEFAULT_ROUTER_ID = 'default'
+DEFAULT_TIMEOUT = 10.0
+MAX_WORKERS = 32
+
+POLL_SECONDS = metrics.histogram('routeros_poll_seconds', 'Durasi poll user aktif per router', ('router', 'result'))
+
+
+class Router:
+    """Satu router hotspot di registry."""
+
+    def __init__(self, id, host, port=8728, username='admin', password='', timeout=DEFAULT_TIMEOUT,
+                 plaintext_login=True, enabled=True):
+        self.id = str(id)
+        self.host = host
+        self.port = int(port)
+        self.username = username
+        self.password = password
+        self.timeout = float(timeout)
+        self.plaintext_login = plaintext_login
+        self.enabled = enabled
+
+    def public(self):
+        """Konfigurasi tanpa password (untuk API/log)."""
+        return {'id': self.id, 'host': self.host, 'port': self.port, 'username': self.username,
+                'timeout': self.timeout, 'enabled': self.enabled}
+
+
+def env_router():
+    """Router tunggal dari environment (konfigurasi lama)."""
+    return Router(DEFAULT_ROUTER_ID, os.environ.get('MIKROTIK_IP', '111.92.166.184'),
+                  port=int(os.environ.get('MIKROTIK_PORT', 8728)),
+                  username=os.environ.get('MIKROTIK_USER', 'monitor'),
+                  password=os.environ.get('MIKROTIK_PASS', 's0t0kudus'),
+                  timeout=float(os.environ.get('MIKROTIK_TIMEOUT', DEFAULT_TIMEOUT)))
+
+
+def load_routers(path=ROUTERS_FILE):
+    """Router aktif dari file registry; file tidak ada berarti satu router dari environment."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        return [env_router()]
+    except json.JSONDecodeError as e:
+        print(f"Warning: {path} tidak valid, memakai router dari environment: {e}")
+        return [env_router()]
+    routers, seen = [], set()
+    for entry in entries:
+        try:
+            router = Router(**entry)
+        except TypeError as e:
+            print(f"Warning: router {entry.get('id')!r} di {path} diabaikan: {e}")
+            continue
+        if router.id in seen:
+            print(f"Warning: id router {router.id!r} ganda di {path}, entri berikutnya diabaikan")
+            continue
+        seen.add(router.id)
+        if router.enabled:
+            routers.append(router)
+    return routers
+
+
+def clean_user(user, router_id):
+    """Baris /ip/hotspot/active -> field yang disimpan, ditandai id router."""
+    return {
+        'ip': user.get('address', '-'),
+        'mac': user.get('mac-address', '-'),
+        'uptime': user.get('uptime', '0s'),
+        'bytes_in': user.get('bytes-in', 0),
+        'bytes_out': user.get('bytes-out', 0),
+        'router': router_id,
+    }
+
+
+class RouterCollector:
+    """Poll paralel semua router dengan koneksi API yang dipakai ulang."""
+
+    def __init__(self, routers, api_module=None, max_workers=MAX_WORKERS):
+        self.routers = list(routers)
+        self._api_module = api_module
+        self._executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(self.routers))),
+                                            thread_name_prefix='router-poll')
+        self._pools = {}          # router id -> RouterOsApiPool yang sudah login
+        self._inflight = {}       # router id -> future poll terakhir (dipakai bersama selama belum selesai)
+        self._lock = threading.Lock()
+
+    def collect(self):
+        """{router_id: [user] atau None} untuk semua router; ditunggu paling lama timeout router terlama.
+
+        Pemanggil yang tumpang tindih (request web dan loop ping_check) menunggu
+        poll router yang sedang berjalan alih-alih membuka poll kedua; router
+        yang macet tetap hanya punya satu poll.
+        """
+        futures = {}
+        with self._lock:
+            for router in self.routers:
+                future = self._inflight.get(router.id)
+                if future is None or future.done():
+                    future = self._inflight[router.id] = self._executor.submit(self._poll, router)
+                futures[router.id] = future
+        deadline = max((r.timeout for r in self.routers), default=0) + 1
+        done, _ = wait(futures.values(), timeout=deadline)
+        results = {router.id: None for router in self.routers}
+        for router_id, future in futures.items():
+            if future in done and future.exception() is None:
+                results[router_id] = future.result()
+        return results
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            _disconnect(pool)
+
+    def _poll(self, router):
+        started = time.perf_counter()
+        result = 'error'
+        try:
+            rows = self._fetch(router)
+            result = 'ok'
+            return [clean_user(row, router.id) for row in rows]
+        except Exception as e:
+            print(f"GAGAL poll router {router.id} ({router.host}:{router.port}): {e}")
+            return None
+        finally:
+            POLL_SECONDS.observe(time.perf_counter() - started, router=router.id, result=result)
+
+    def _fetch(self, router):
+        pool = self._pools.get(router.id)
+        reused = pool is not None
+        if pool is None:
+            pool = self._connect(router)
+        try:
+            rows = pool.get_api().get_resource('/ip/hotspot/active').get()
+        except Exception:
+            self._pools.pop(router.id, None)
+            _disconnect(pool)
+            if not reused:
+                raise
+            # Koneksi lama mungkin sudah diputus router: coba sekali dengan koneksi baru
+            pool = self._connect(router)
+            rows = pool.get_api().get_resource('/ip/hotspot/active').get()
+        self._pools[router.id] = pool
+        return rows
+
+    def _connect(self, router):
+        api_module = self._api_module
+        if api_module is None:
+            import routeros_api as api_module
+        pool = api_module.RouterOsApiPool(router.host, username=router.username, password=router.password,
+                                          port=router.port, plaintext_login=router.plaintext_login)
+        pool.socket_timeout = router.timeout  # dipakai saat socket dibuka di get_api()
+        return pool
+
+
+def _disconnect(pool):
+    try:
+        pool.disconnect()
+    except Exception:
+        pass
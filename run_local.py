@@ -28,9 +28,12 @@ if os.environ.get('MOCK_ROUTEROS') == '1':
     sys.modules['routeros_api'] = mock
 
 # Import Flask app after mocking
-from app import app
+from app import app, start_background_jobs
 
 if __name__ == '__main__':
     print("Starting Flask app with MOCK_ROUTEROS=1 — MikroTik calls are mocked.")
+    # Job periodik hanya di proses reloader yang melayani request
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_jobs()
     # Bind to 0.0.0.0 so bisa diakses dari perangkat lain juga (tetap aman untuk dev)
     app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
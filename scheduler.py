@@ -0,0 +1,281 @@
+"""
+Penjadwal job periodik untuk ping_check dan proses Flask.
+
+Setiap job punya interval, jitter, batas eksekusi paralel dan pool eksekusi
+sendiri (thread atau proses), jadi job yang lambat tidak menunda job lain.
+Jika job masih berjalan saat jadwal berikutnya tiba dan batasnya sudah
+penuh, putaran itu dilewati (tidak ditumpuk). Durasi dan keterlambatan start
+(lag) setiap job dicatat sebagai histogram kumulatif.
+"""
+
+import heapq
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime
+
+# Batas atas bucket histogram (detik); bucket terakhir tak terhingga
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+STATS_DIR = 'job_stats'
+STATS_WRITE_INTERVAL = 1.0
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self):
+        cumulative, running = [], 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            running += count
+            cumulative.append([bound, running])
+        return {'buckets': cumulative, 'sum': round(self.sum, 6), 'count': self.count}
+
+
+class Job:
+    def __init__(self, name, func, interval, jitter=0.0, max_concurrency=1, pool='default',
+                 initial_delay=0.0, args=(), kwargs=None):
+        if interval <= 0:
+            raise ValueError("interval harus > 0")
+        self.name = name
+        self.func = func
+        self.interval = float(interval)
+        self.jitter = float(jitter)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.pool = pool
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.next_run = time.time() + initial_delay
+        self.running = 0
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_started = None
+        self.last_duration = None
+        self.last_error = None
+        self.duration = Histogram()
+        self.lag = Histogram()
+
+    def snapshot(self):
+        return {
+            'name': self.name,
+            'interval': self.interval,
+            'jitter': self.jitter,
+            'max_concurrency': self.max_concurrency,
+            'pool': self.pool,
+            'running': self.running,
+            'runs': self.runs,
+            'failures': self.failures,
+            'skipped': self.skipped,
+            'last_started': _iso(self.last_started),
+            'last_duration': None if self.last_duration is None else round(self.last_duration, 4),
+            'last_error': self.last_error,
+            'next_run': _iso(self.next_run),
+            'duration_seconds': self.duration.snapshot(),
+            'lag_seconds': self.lag.snapshot(),
+        }
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts).isoformat(timespec='seconds') if ts else None
+
+
+def _timed_call(func, args, kwargs):
+    """Dijalankan di worker; waktu start diukur di sana agar antrean pool ikut terhitung sebagai lag."""
+    started = time.time()
+    func(*args, **kwargs)
+    return started, time.time()
+
+
+class Scheduler:
+    """Menjalankan job terdaftar dari satu thread dispatcher.
+
+    `stats_file` (opsional): snapshot statistik ditulis ke file JSON ini agar
+    proses lain (mis. /api/jobs di Flask) bisa membacanya.
+    """
+
+    def __init__(self, name='default', stats_file=None):
+        self.name = name
+        self.stats_file = stats_file
+        self._jobs = {}
+        self._pools = {}
+        self._pool_specs = {'default': ('thread', 4)}
+        self._heap = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        self._stats_written = 0.0
+
+    def add_pool(self, name, workers=1, kind='thread'):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Jenis pool tidak dikenal: {kind}")
+        with self._cond:
+            self._pool_specs[name] = (kind, workers)
+
+    def add_job(self, name, func, interval, **options):
+        job = Job(name, func, interval, **options)
+        with self._cond:
+            if name in self._jobs:
+                raise ValueError(f"Job sudah terdaftar: {name}")
+            if job.pool not in self._pool_specs:
+                self._pool_specs[job.pool] = ('thread', job.max_concurrency)
+            self._jobs[name] = job
+            heapq.heappush(self._heap, (job.next_run, name))
+            self._cond.notify()
+        return job
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return self
+            self._stopping = False
+            self._thread = threading.Thread(target=self._loop, name=f'scheduler-{self.name}', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, wait=True):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None and wait:
+            self._thread.join()
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait)
+        self._pools = {}
+        self._thread = None
+
+    def run_forever(self):
+        """Untuk skrip: start lalu blokir sampai Ctrl+C."""
+        self.start()
+        try:
+            while self._thread.is_alive():
+                self._thread.join(1)
+        finally:
+            self.stop(wait=False)
+
+    def snapshot(self):
+        with self._cond:
+            jobs = [job.snapshot() for job in self._jobs.values()]
+        return {'scheduler': self.name, 'generated_at': _iso(time.time()), 'pid': os.getpid(),
+                'jobs': sorted(jobs, key=lambda j: j['name'])}
+
+    # --- internal -----------------------------------------------------------
+
+    def _pool(self, name):
+        if name not in self._pools:
+            kind, workers = self._pool_specs[name]
+            cls = ProcessPoolExecutor if kind == 'process' else ThreadPoolExecutor
+            options = {} if kind == 'process' else {'thread_name_prefix': f'job-{name}'}
+            self._pools[name] = cls(max_workers=workers, **options)
+        return self._pools[name]
+
+    def _loop(self):
+        with self._cond:
+            while not self._stopping:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, name = self._heap[0]
+                wait = due - time.time()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                heapq.heappop(self._heap)
+                job = self._jobs[name]
+                self._dispatch(job, due)
+                job.next_run = self._next_run(job, due)
+                heapq.heappush(self._heap, (job.next_run, name))
+
+    @staticmethod
+    def _next_run(job, scheduled):
+        next_run = scheduled + job.interval
+        now = time.time()
+        if next_run <= now:
+            # Tertinggal jauh (mis. mesin sempat suspend): jangan kejar putaran yang hilang
+            next_run = now + job.interval
+        return next_run + (random.uniform(0, job.jitter) if job.jitter else 0)
+
+    def _dispatch(self, job, scheduled):
+        if job.running >= job.max_concurrency:
+            job.skipped += 1
+            print(f"[scheduler] Job {job.name} masih berjalan, putaran ini dilewati.")
+            return
+        job.running += 1
+        try:
+            future = self._pool(job.pool).submit(_timed_call, job.func, job.args, job.kwargs)
+        except Exception as e:
+            job.running -= 1
+            job.failures += 1
+            job.last_error = f"Gagal submit: {e}"
+            return
+        future.add_done_callback(lambda f, job=job, scheduled=scheduled: self._finished(job, scheduled, f))
+
+    def _finished(self, job, scheduled, future):
+        with self._cond:
+            job.running -= 1
+            job.runs += 1
+            try:
+                started, ended = future.result()
+            except Exception as e:
+                job.failures += 1
+                job.last_error = f"{type(e).__name__}: {e}"
+                print(f"[scheduler] Job {job.name} gagal: {job.last_error}")
+            else:
+                job.last_started = started
+                job.last_duration = ended - started
+                job.duration.observe(job.last_duration)
+                job.lag.observe(max(0.0, started - scheduled))
+                job.last_error = None
+        self._write_stats()
+
+    def _write_stats(self, force=False):
+        if not self.stats_file:
+            return
+        now = time.monotonic()
+        if not force and now - self._stats_written < STATS_WRITE_INTERVAL:
+            return
+        self._stats_written = now
+        folder = os.path.dirname(self.stats_file) or '.'
+        try:
+            os.makedirs(folder, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=folder, prefix='.jobs-', suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, indent=2)
+            os.replace(tmp, self.stats_file)
+        except OSError as e:
+            print(f"[scheduler] Gagal menulis statistik job: {e}")
+
+
+def load_stats(stats_dir=STATS_DIR):
+    """Snapshot scheduler dari proses lain yang ditulis ke `stats_dir`."""
+    snapshots = []
+    try:
+        names = sorted(os.listdir(stats_dir))
+    except FileNotFoundError:
+        return snapshots
+    for name in names:
+        if not name.endswith('.json') or name.startswith('.'):
+            continue
+        try:
+            with open(os.path.join(stats_dir, name), 'r', encoding='utf-8') as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snapshots
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Mode produksi web app: satu master memuat app sekali (preload) lalu menjalankan
+beberapa worker proses pada socket yang sama. Setiap worker melayani request
+dengan thread yang jumlahnya dibatasi (server Werkzeug tanpa debug dan reloader).
+
+Koherensi antar-worker:
+  - inventaris: InventoryRepository memeriksa signature onts.json dan journal
+    setiap kali dibaca, jadi tulisan worker lain (atau pinger) langsung terlihat
+    (generation ikut naik, lihat /healthz)
+  - notifikasi, outage, history dan request log: setiap read-modify-write
+    memakai store_lock (lock file antar-proses)
+  - sesi hotspot: SessionStore memutar ulang journal hotspot_sessions/ di
+    bawah store_lock sebelum setiap snapshot diproses
+  - job periodik web hanya berjalan di worker 0; statistiknya ditulis ke
+    job_stats/web.json agar /api/jobs di worker lain ikut menampilkannya
+  - status discovery disimpan di file state, bukan di memori worker
+
+Sinyal ke master:
+  SIGHUP          reload graceful: kode dicek dulu, master exec ulang dengan
+                  socket yang sama, worker baru dijalankan, lalu worker lama
+                  menyelesaikan request yang sedang berjalan dan berhenti
+  SIGTERM/SIGINT  berhenti graceful
+
+Penggunaan:
+    python serve.py --workers 4 --threads 16 --port 5000 --pid-file serve.pid
+    kill -HUP $(cat serve.pid)      # muat ulang kode tanpa menolak koneksi
+"""
+
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+LISTEN_FD_ENV = 'SERVE_LISTEN_FD'
+OLD_WORKERS_ENV = 'SERVE_OLD_WORKERS'
+DEFAULT_THREADS = 16
+KEEPALIVE_TIMEOUT = 5
+GRACEFUL_TIMEOUT = 30
+# Worker yang mati secepat ini dianggap crash saat start; respawn diberi jeda
+CRASH_WINDOW = 5
+MAX_RESPAWN_DELAY = 30
+
+
+class _RequestHandler(WSGIRequestHandler):
+    # Koneksi keep-alive yang menganggur melepas thread setelah sekian detik
+    timeout = KEEPALIVE_TIMEOUT
+    access_log = False
+
+    def log_request(self, *args, **kwargs):
+        if self.access_log:
+            super().log_request(*args, **kwargs)
+
+    def handle_one_request(self):
+        super().handle_one_request()
+        if self.raw_requestline:
+            self.server.count_request()
+
+
+class WorkerServer(BaseWSGIServer):
+    """Server WSGI satu worker: maksimal `threads` koneksi dilayani paralel.
+
+    Koneksi baru hanya di-accept saat ada slot kosong; sisanya tetap di backlog
+    kernel sehingga bisa diambil worker lain yang sedang longgar.
+    """
+
+    multithread = True
+
+    def __init__(self, host, port, app, threads=DEFAULT_THREADS, fd=None, max_requests=0, access_log=False):
+        handler = type('RequestHandler', (_RequestHandler,), {'access_log': access_log})
+        super().__init__(host, port, app, handler=handler, fd=fd)
+        self.socket.setblocking(False)
+        self.max_requests = max_requests
+        self.handled = 0
+        self._slots = threading.BoundedSemaphore(threads)
+        self._threads = threads
+        self._count_lock = threading.Lock()
+        self._stopping = False
+
+    def get_request(self):
+        self._slots.acquire()
+        try:
+            return self.socket.accept()
+        except BaseException:
+            self._slots.release()  # worker lain lebih dulu mengambil koneksinya
+            raise
+
+    def process_request(self, request, client_address):
+        threading.Thread(target=self._handle, args=(request, client_address), daemon=True).start()
+
+    def _handle(self, request, client_address):
+        try:
+            request.setblocking(True)
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def count_request(self):
+        with self._count_lock:
+            self.handled += 1
+            recycle = self.max_requests and self.handled >= self.max_requests and not self._stopping
+        if recycle:
+            print(f"[serve] worker {os.getpid()} mencapai {self.max_requests} request, didaur ulang")
+            self.stop()
+
+    def stop(self):
+        """Berhenti menerima koneksi baru (aman dipanggil dari handler sinyal)."""
+        if not self._stopping:
+            self._stopping = True
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def drain(self, timeout=GRACEFUL_TIMEOUT):
+        """Menunggu request yang sedang berjalan selesai; False jika batas waktu lewat."""
+        deadline = time.monotonic() + timeout
+        taken = 0
+        while taken < self._threads:
+            if not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                return False
+            taken += 1
+        return True
+
+
+def _listen_socket(host, port, backlog):
+    inherited = os.environ.pop(LISTEN_FD_ENV, None)
+    if inherited is not None:
+        sock = socket.socket(fileno=int(inherited))
+    else:
+        family = socket.AF_INET6 if ':' in host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _preload():
+    """Memuat app dan inventaris di master; worker mewarisinya lewat fork (copy-on-write)."""
+    import app as web
+    web.inventory.refresh()
+    return web
+
+
+class Master:
+    def __init__(self, web, sock, args):
+        self.web = web
+        self.sock = sock
+        self.args = args
+        self.workers = {}         # pid -> slot
+        self.spawned_at = {}      # slot -> waktu spawn terakhir
+        self.respawn_at = {}      # slot -> waktu respawn (setelah crash)
+        self.respawn_delay = {}   # slot -> jeda respawn berikutnya
+        self._signal = None
+
+    # --- worker -------------------------------------------------------------
+
+    def spawn(self, slot):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = slot
+            self.spawned_at[slot] = time.monotonic()
+            return pid
+        code = 0
+        try:
+            self._run_worker(slot)
+        except BaseException as e:
+            print(f"[serve] worker {slot} gagal: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _run_worker(self, slot):
+        args = self.args
+        for signum in (signal.SIGHUP, signal.SIGINT):
+            signal.signal(signum, signal.SIG_IGN)  # Ctrl-C dan reload ditangani master
+        server = WorkerServer(args.host, args.port, self.web.app, threads=args.threads, fd=self.sock.fileno(),
+                              max_requests=args.max_requests, access_log=args.access_log)
+        signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+        if slot == 0 and not args.no_jobs:
+            import scheduler
+            self.web.start_background_jobs(stats_file=os.path.join(scheduler.STATS_DIR, 'web.json'))
+        server.serve_forever()
+        if not server.drain(args.graceful_timeout):
+            print(f"[serve] worker {os.getpid()}: request belum selesai setelah {args.graceful_timeout}s")
+        try:
+            # atexit tidak jalan karena worker keluar lewat os._exit
+            self.web._notifier.flush()
+        except Exception as e:
+            print(f"Warning: gagal menulis notifikasi: {e}")
+        try:
+            self.web._request_logger.flush()
+        except OSError as e:
+            print(f"Warning: gagal menulis request log: {e}")
+
+    def _reap(self):
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = self.workers.pop(pid, None)
+            if slot is None:
+                continue  # worker generasi lama (sebelum reload)
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0 and time.monotonic() - self.spawned_at.get(slot, 0) < CRASH_WINDOW:
+                delay = min(self.respawn_delay.get(slot, 0.5) * 2, MAX_RESPAWN_DELAY)
+                self.respawn_delay[slot] = delay
+                print(f"[serve] worker {slot} (pid {pid}) crash saat start (exit {code}), respawn dalam {delay}s")
+            else:
+                delay = 0
+                self.respawn_delay.pop(slot, None)
+                if code != 0:
+                    print(f"[serve] worker {slot} (pid {pid}) berhenti dengan exit {code}, respawn")
+            self.respawn_at[slot] = time.monotonic() + delay
+
+    def _stop_workers(self, pids, timeout):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + timeout + 5
+        pending = set(pids)
+        while pending and time.monotonic() < deadline:
+            for pid in list(pending):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    pending.discard(pid)
+                    self.workers.pop(pid, None)
+            time.sleep(0.1)
+        for pid in pending:
+            print(f"[serve] worker pid {pid} tidak berhenti, dipaksa (SIGKILL)")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self.workers.pop(pid, None)
+
+    # --- master -------------------------------------------------------------
+
+    def _on_signal(self, signum, frame):
+        self._signal = signum
+
+    def run(self):
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, self._on_signal)
+        old_workers = [int(p) for p in os.environ.pop(OLD_WORKERS_ENV, '').split(',') if p]
+        for slot in range(self.args.workers):
+            self.spawn(slot)
+        if old_workers:
+            # Worker baru sudah menerima koneksi; generasi lama dihentikan dengan graceful
+            self._stop_workers(old_workers, self.args.graceful_timeout)
+        print(f"[serve] master {os.getpid()}: {self.args.workers} worker x {self.args.threads} thread "
+              f"di http://{self.args.host}:{self.args.port}")
+        while True:
+            signum, self._signal = self._signal, None
+            if signum in (signal.SIGTERM, signal.SIGINT):
+                print("[serve] berhenti, menunggu request yang sedang berjalan...")
+                self._stop_workers(list(self.workers), self.args.graceful_timeout)
+                return
+            if signum == signal.SIGHUP:
+                self.reload()
+            self._reap()
+            now = time.monotonic()
+            for slot, when in list(self.respawn_at.items()):
+                if when <= now:
+                    del self.respawn_at[slot]
+                    self.spawn(slot)
+            time.sleep(0.2)
+
+    def reload(self):
+        """Exec ulang master dengan kode terbaru; worker lama tetap melayani sampai penggantinya siap."""
+        check = subprocess.run([sys.executable, '-c', 'import app'], capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+        if check.returncode != 0:
+            print(f"[serve] reload dibatalkan, app gagal dimuat:\n{check.stderr.strip()}")
+            return
+        print(f"[serve] reload: exec ulang master, {len(self.workers)} worker lama dihentikan setelah pengganti siap")
+        os.environ[LISTEN_FD_ENV] = str(self.sock.fileno())
+        os.environ[OLD_WORKERS_ENV] = ','.join(str(pid) for pid in self.workers)
+        sys.stdout.flush()
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Web app mode produksi (multi-worker, preload, reload graceful).")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Jumlah worker proses")
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS, help="Request paralel per worker")
+    parser.add_argument('--backlog', type=int, default=1024)
+    parser.add_argument('--max-requests', type=int, default=0,
+                        help="Daur ulang worker setelah sekian request (0 = tidak pernah)")
+    parser.add_argument('--graceful-timeout', type=float, default=GRACEFUL_TIMEOUT,
+                        help="Batas waktu menunggu request berjalan saat stop/reload (detik)")
+    parser.add_argument('--access-log', action='store_true', help="Cetak satu baris per request (access log)")
+    parser.add_argument('--no-jobs', action='store_true', help="Jangan jalankan job periodik web")
+    parser.add_argument('--pid-file', help="Tulis PID master ke file ini (untuk kill -HUP)")
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.threads < 1:
+        parser.error("--workers dan --threads minimal 1")
+
+    sock = _listen_socket(args.host, args.port, args.backlog)
+    args.port = sock.getsockname()[1]
+    web = _preload()
+    if args.pid_file:
+        with open(args.pid_file, 'w') as f:
+            f.write(f"{os.getpid()}\n")
+
+    if not hasattr(os, 'fork'):
+        # Windows: tanpa fork, satu proses dengan thread pool yang sama
+        print(f"[serve] fork tidak tersedia, satu proses x {args.threads} thread di port {args.port}")
+        if not args.no_jobs:
+            web.start_background_jobs()
+        server = WorkerServer(args.host, args.port, web.app, threads=args.threads, fd=sock.fileno(),
+                              access_log=args.access_log)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+    Master(web, sock, args).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Jaringan ONT simulasi untuk menguji mesin ping secara deterministik.
+
+Setiap host punya model sendiri yang diturunkan dari seed dan IP-nya (tidak
+bergantung urutan inventaris):
+  - latensi lognormal per host, loss per percobaan, timeout seperti `ping -W 1`
+  - siklus naik/turun (renewal): host biasa jarang mati, sebagian kecil host
+    "flapping" sering naik-turun
+  - skenario gangguan massal: sebagian armada (fraksi atau prefix IP) mati
+    bersamaan pada rentang waktu tertentu
+
+SimulatedNetwork dipakai lewat antarmuka yang sama dengan ping sungguhan,
+`backend(ip) -> bool` (lihat ping_check.set_probe_backend). Dengan
+VirtualClock, setiap probe memajukan jam virtual sebesar durasi probe itu.
+
+`simulate()` menjalankan ribuan siklus `ping_check.probe_statuses` pada jam
+virtual. Agar "10k ONT selama 24 jam" selesai dalam hitungan detik, ONT yang
+stabil (status ON atau OFF final dan tidak ada perubahan kondisi sejak probe
+terakhir) tidak di-probe ulang; hasil _next_status untuk mereka sudah pasti
+sama, jadi hanya dihitung sebagai probe. Kehilangan paket acak pada host
+stabil disampel per siklus sehingga false alarm tetap muncul.
+
+Penggunaan:
+    python simnet.py --onts 10000 --hours 24 --outage 6:30:0.2 --flap-ratio 0.02
+    PING_BACKEND=sim PING_SIM_SEED=7 python ping_check.py    # pinger melawan jaringan simulasi (jam nyata)
+"""
+
+import argparse
+import bisect
+import heapq
+import io
+import json
+import math
+import os
+import random
+import time
+import zlib
+from contextlib import redirect_stdout
+
+DEFAULT_INTERVAL = 30
+PROBE_TIMEOUT = 1.0
+PROBE_ATTEMPTS = 3
+# Biaya satu `ping` lewat subprocess di luar RTT (fork/exec)
+PROBE_OVERHEAD = 0.005
+STEADY_STATUSES = ('ON', 'OFF')
+
+
+class VirtualClock:
+    def __init__(self, start=0.0):
+        self._now = float(start)
+
+    def now(self):
+        return self._now
+
+    def advance(self, seconds):
+        self._now += seconds
+
+
+class WallClock:
+    """Jam nyata (detik sejak dibuat), untuk pinger yang berjalan normal melawan jaringan simulasi."""
+
+    def __init__(self):
+        self._started = time.monotonic()
+
+    def now(self):
+        return time.monotonic() - self._started
+
+    def advance(self, seconds):
+        pass  # waktu nyata berjalan sendiri
+
+
+class Outage:
+    """Gangguan massal: host terpilih mati pada [start, start + duration) detik."""
+
+    def __init__(self, start, duration, fraction=None, prefix=None):
+        if fraction is None and prefix is None:
+            fraction = 1.0
+        self.start = float(start)
+        self.end = float(start) + float(duration)
+        self.fraction = fraction
+        self.prefix = prefix
+
+    @classmethod
+    def parse(cls, spec):
+        """'JAM:MENIT:FRAKSI' atau 'JAM:MENIT:PREFIX', mis. '6:30:0.2' atau '2.5:10:10.239.1.'."""
+        start_h, duration_m, target = spec.split(':', 2)
+        try:
+            fraction, prefix = float(target), None
+        except ValueError:
+            fraction, prefix = None, target
+        return cls(float(start_h) * 3600, float(duration_m) * 60, fraction, prefix)
+
+    def covers(self, ip, seed):
+        if self.prefix is not None:
+            return ip.startswith(self.prefix)
+        return zlib.crc32(f"outage:{seed}:{self.start}:{ip}".encode()) / 0xFFFFFFFF < self.fraction
+
+    def as_dict(self):
+        return {'start_s': self.start, 'duration_s': self.end - self.start,
+                'fraction': self.fraction, 'prefix': self.prefix}
+
+
+class HostModel:
+    def __init__(self, ip, network):
+        self.ip = ip
+        rng = random.Random(f"{network.seed}:{ip}")
+        self._rng = rng
+        self.latency_median = network.latency_ms / 1000 * rng.lognormvariate(0, 0.6)
+        self.jitter = network.jitter
+        self.loss = network.loss
+        self.flapping = rng.random() < network.flap_ratio
+        if self.flapping:
+            self.mean_up, self.mean_down = network.flap_up, network.flap_down
+        else:
+            self.mean_up, self.mean_down = 86400 / max(network.failures_per_day, 1e-9), network.failure_duration
+        self.outages = [o for o in network.outages if o.covers(ip, network.seed)]
+        # Waktu pergantian kondisi naik/turun; host mulai dalam keadaan naik
+        self._changes = []
+        self._horizon = 0.0
+        timeout_fail = 0.5 * math.erfc(math.log(PROBE_TIMEOUT / self.latency_median) / (self.jitter * math.sqrt(2)))
+        self.attempt_fail = self.loss + (1 - self.loss) * timeout_fail
+        self.probe_fail = self.attempt_fail ** PROBE_ATTEMPTS
+        self.up_cost = PROBE_OVERHEAD + self.latency_median
+        self.down_cost = PROBE_ATTEMPTS * (PROBE_OVERHEAD + PROBE_TIMEOUT)
+
+    def _extend(self, t):
+        while self._horizon <= t:
+            mean = self.mean_up if len(self._changes) % 2 == 0 else self.mean_down
+            self._horizon += self._rng.expovariate(1 / mean)
+            self._changes.append(self._horizon)
+
+    def is_up(self, t):
+        self._extend(t)
+        if bisect.bisect_right(self._changes, t) % 2:
+            return False
+        return not any(o.start <= t < o.end for o in self.outages)
+
+    def next_change(self, after):
+        """Waktu berikutnya (> after) kondisi host bisa berubah."""
+        self._extend(after)
+        candidate = self._changes[bisect.bisect_right(self._changes, after)]
+        for o in self.outages:
+            for boundary in (o.start, o.end):
+                if after < boundary < candidate:
+                    candidate = boundary
+        return candidate
+
+    def attempt(self, rng):
+        """Satu percobaan echo: (berhasil, durasi)."""
+        latency = self.latency_median * rng.lognormvariate(0, self.jitter)
+        if rng.random() < self.loss or latency > PROBE_TIMEOUT:
+            return False, PROBE_OVERHEAD + PROBE_TIMEOUT
+        return True, PROBE_OVERHEAD + latency
+
+
+class SimulatedNetwork:
+    def __init__(self, seed=1, clock=None, loss=0.005, latency_ms=5.0, jitter=0.3, flap_ratio=0.01,
+                 flap_up=1800, flap_down=120, failures_per_day=0.2, failure_duration=1200, outages=()):
+        self.seed = seed
+        self.clock = clock or VirtualClock()
+        self.loss = loss
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.flap_ratio = flap_ratio
+        self.flap_up = flap_up
+        self.flap_down = flap_down
+        self.failures_per_day = failures_per_day
+        self.failure_duration = failure_duration
+        self.outages = list(outages)
+        self._hosts = {}
+        self._rng = random.Random(seed)
+        self.probes = 0
+
+    @classmethod
+    def from_env(cls):
+        """Jaringan simulasi dengan jam nyata; parameter dari PING_SIM_* (untuk PING_BACKEND=sim)."""
+        outages = [Outage.parse(s) for s in os.environ.get('PING_SIM_OUTAGES', '').split(',') if s.strip()]
+        return cls(seed=int(os.environ.get('PING_SIM_SEED', 1)), clock=WallClock(),
+                   loss=float(os.environ.get('PING_SIM_LOSS', 0.005)),
+                   flap_ratio=float(os.environ.get('PING_SIM_FLAP_RATIO', 0.01)), outages=outages)
+
+    def host(self, ip):
+        model = self._hosts.get(ip)
+        if model is None:
+            model = self._hosts[ip] = HostModel(ip, self)
+        return model
+
+    def is_up(self, ip, t=None):
+        return self.host(ip).is_up(self.clock.now() if t is None else t)
+
+    def __call__(self, ip):
+        """Antarmuka ping: sampai PROBE_ATTEMPTS percobaan, jam maju sebesar durasi probe."""
+        self.probes += 1
+        model = self.host(ip)
+        up = model.is_up(self.clock.now())
+        for _ in range(PROBE_ATTEMPTS):
+            if not up:
+                self.clock.advance(PROBE_OVERHEAD + PROBE_TIMEOUT)
+                continue
+            ok, duration = model.attempt(self._rng)
+            self.clock.advance(duration)
+            if ok:
+                return True
+        return False
+
+
+class _PlannedProbe:
+    """Backend probe untuk satu siklus simulate(): waktu probe dan loss per host sudah ditentukan."""
+
+    def __init__(self, network, times, lost):
+        self.network = network
+        self.times = times
+        self.lost = lost
+
+    def __call__(self, ip):
+        return ip not in self.lost and self.network.is_up(ip, self.times[ip])
+
+
+def _percentiles(values):
+    if not values:
+        return None
+    values = sorted(values)
+
+    def pick(pct):
+        return round(values[max(0, min(len(values) - 1, int(round(pct / 100 * len(values) + 0.5)) - 1))], 1)
+    return {'count': len(values), 'p50_s': pick(50), 'p95_s': pick(95), 'max_s': round(values[-1], 1),
+            'mean_s': round(sum(values) / len(values), 1)}
+
+
+def _next_lost_cycle(model, rng, after_cycle):
+    if model.probe_fail <= 0:
+        return None
+    u = 1.0 - rng.random()
+    gap = int(math.log(u) / math.log1p(-model.probe_fail)) + 1 if model.probe_fail < 1 else 1
+    return after_cycle + gap
+
+
+def synthetic_onts(count):
+    return [{'id': i, 'ip': f"10.{200 + (i >> 16)}.{(i >> 8) & 255}.{i & 255}", 'name': f"SIM-{i}",
+             'status': 'ON', 'rto_count': 0} for i in range(1, count + 1)]
+
+
+def simulate(network, onts, hours, interval=DEFAULT_INTERVAL, concurrency=1):
+    """Menjalankan siklus ping selama `hours` jam virtual; mengembalikan laporan throughput dan deteksi."""
+    import ping_check
+
+    horizon = hours * 3600
+    # Simulasi dimulai dari armada yang semuanya hidup dan berstatus ON
+    onts = [dict(o, status='ON', rto_count=0, parent=None) for o in onts if o.get('ip')]
+    models = [network.host(o['ip']) for o in onts]
+    loss_rng = random.Random(f"loss:{network.seed}")
+
+    # Urutan probe tetap (urutan inventaris); offset = perkiraan waktu mulai probe dalam siklus
+    offsets, total = [], 0.0
+    for model in models:
+        offsets.append(total / concurrency)
+        total += model.up_cost
+    base_duration = total / concurrency
+
+    events = [(model.next_change(0.0), i) for i, model in enumerate(models)]
+    heapq.heapify(events)
+    lost_heap = []
+    for i, model in enumerate(models):
+        cycle = _next_lost_cycle(model, loss_rng, 0)
+        if cycle is not None:
+            lost_heap.append((cycle, i))
+    heapq.heapify(lost_heap)
+
+    transitional = set()
+    down_since, up_since, detected, confirmed = {}, {}, set(), set()
+    down_extra = 0.0  # tambahan durasi siklus dari host yang sedang mati (timeout)
+    detection, confirmation, recovery = [], [], []
+    missed = false_alarms = probes = active_probes = cycles = skipped_cycles = 0
+    cycle_durations = []
+    sink = io.StringIO()
+    wall_started = time.perf_counter()
+
+    start, cycle_index = 0.0, 0
+    while start < horizon:
+        cycle_index += 1
+        # Host aktif: masih transisi, probe-nya hilang siklus ini, atau kondisinya berubah
+        active = set(transitional)
+        lost = set()
+        lost_extra = 0.0
+        while lost_heap and lost_heap[0][0] <= cycle_index:
+            _, i = heapq.heappop(lost_heap)
+            lost.add(onts[i]['ip'])
+            active.add(i)
+            lost_extra += models[i].down_cost - models[i].up_cost
+            following = _next_lost_cycle(models[i], loss_rng, cycle_index)
+            if following is not None:
+                heapq.heappush(lost_heap, (following, i))
+
+        duration = base_duration + (down_extra + lost_extra) / concurrency
+        stretch = duration / base_duration if base_duration else 1.0
+        end = start + duration
+        deferred = []
+        while events and events[0][0] <= end:
+            when, i = heapq.heappop(events)
+            if when > start + offsets[i] * stretch:
+                deferred.append((when, i))  # berubah setelah host ini di-probe; masuk siklus berikutnya
+                continue
+            # Catat kapan kondisi sebenarnya berubah, untuk latensi deteksi
+            up = models[i].is_up(when)
+            if not up and i not in down_since:
+                down_since[i] = when
+                up_since.pop(i, None)
+                down_extra += models[i].down_cost - models[i].up_cost
+            elif up and i in down_since:
+                if i in detected:
+                    up_since[i] = when
+                else:
+                    missed += 1  # mati lalu hidup lagi di antara dua probe
+                del down_since[i]
+                detected.discard(i)
+                confirmed.discard(i)
+                down_extra -= models[i].down_cost - models[i].up_cost
+            active.add(i)
+            heapq.heappush(events, (models[i].next_change(when), i))
+        for item in deferred:
+            heapq.heappush(events, item)
+
+        batch = [onts[i] for i in sorted(active)]
+        times = {onts[i]['ip']: start + offsets[i] * stretch for i in active}
+        ping_check.set_probe_backend(_PlannedProbe(network, times, lost))
+        try:
+            with redirect_stdout(sink):
+                updates = ping_check.probe_statuses(batch, {}, {})
+        finally:
+            ping_check.set_probe_backend(None)
+        sink.seek(0)
+        sink.truncate()
+
+        for i in active:
+            ont = onts[i]
+            update = updates.get(ont['id'])
+            if update is None:
+                continue
+            probe_time = times[ont['ip']]
+            was_on = ont['status'] == 'ON'
+            ont.update(status=update['status'], rto_count=update['rto_count'])
+            now_on = ont['status'] == 'ON'
+            if was_on and not now_on:
+                if i in down_since and i not in detected:
+                    detected.add(i)
+                    detection.append(probe_time - down_since[i])
+                elif i not in down_since:
+                    false_alarms += 1
+            if ont['status'] == 'OFF' and i in down_since and i not in confirmed:
+                confirmed.add(i)
+                confirmation.append(probe_time - down_since[i])
+            if not was_on and now_on and i in up_since:
+                recovery.append(probe_time - up_since.pop(i))
+            # ON (rto 0) dan OFF final tidak berubah selama kondisi host tetap
+            if ont['status'] in STEADY_STATUSES:
+                transitional.discard(i)
+            else:
+                transitional.add(i)
+        probes += len(onts)
+        active_probes += len(active)
+        cycles += 1
+        cycle_durations.append(duration)
+        # Scheduler melewati putaran yang jatuh saat siklus sebelumnya masih berjalan
+        overrun = max(0, math.ceil(duration / interval) - 1)
+        skipped_cycles += overrun
+        start += interval * (overrun + 1)
+
+    wall = time.perf_counter() - wall_started
+    return {
+        'onts': len(onts),
+        'hours': hours,
+        'interval_s': interval,
+        'concurrency': concurrency,
+        'seed': network.seed,
+        'outages': [o.as_dict() for o in network.outages],
+        'cycles': cycles,
+        'skipped_cycles': skipped_cycles,
+        'cycle_duration_s': _percentiles(cycle_durations),
+        'probes': probes,
+        'probes_evaluated': active_probes,
+        'virtual_probes_per_s': round(probes / horizon, 1),
+        'wall_seconds': round(wall, 2),
+        'simulated_probes_per_wall_s': round(probes / wall) if wall else None,
+        'detection_latency': _percentiles(detection),
+        'confirmation_latency': _percentiles(confirmation),
+        'recovery_latency': _percentiles(recovery),
+        'missed_outages': missed,
+        'false_alarms': false_alarms,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulasi jaringan ONT untuk mesin ping (jam virtual).")
+    parser.add_argument('--onts', type=int, default=10000, help="Jumlah ONT sintetis")
+    parser.add_argument('--data', help="Pakai inventaris ini (onts.json) alih-alih ONT sintetis")
+    parser.add_argument('--hours', type=float, default=24)
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help="Interval siklus ping (detik)")
+    parser.add_argument('--concurrency', type=int, default=1, help="Probe paralel dalam satu siklus")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--loss', type=float, default=0.005, help="Loss per percobaan echo")
+    parser.add_argument('--latency-ms', type=float, default=5.0, help="Median latensi armada")
+    parser.add_argument('--flap-ratio', type=float, default=0.01, help="Fraksi host yang flapping")
+    parser.add_argument('--failures-per-day', type=float, default=0.2, help="Gangguan acak per host per hari")
+    parser.add_argument('--outage', action='append', default=[],
+                        help="Gangguan massal JAM:MENIT:FRAKSI atau JAM:MENIT:PREFIX (boleh berulang)")
+    parser.add_argument('--output', help="Simpan laporan JSON ke file ini")
+    args = parser.parse_args(argv)
+
+    if args.data:
+        from inventory import InventoryRepository
+        onts = InventoryRepository(args.data).all()
+    else:
+        onts = synthetic_onts(args.onts)
+    network = SimulatedNetwork(seed=args.seed, loss=args.loss, latency_ms=args.latency_ms,
+                               flap_ratio=args.flap_ratio, failures_per_day=args.failures_per_day,
+                               outages=[Outage.parse(s) for s in args.outage])
+    report = simulate(network, onts, args.hours, args.interval, args.concurrency)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
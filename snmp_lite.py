@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Klien SNMPv2c minimal (GET/GETBULK lewat UDP) tanpa dependensi tambahan,
+beserta agent tiruan untuk pengujian lokal.
+
+Hanya bagian BER yang dibutuhkan untuk membaca tabel status ONT dari OLT yang
+diimplementasikan: INTEGER, OCTET STRING, NULL, OID, counter/gauge dan
+penanda noSuchObject/endOfMibView.
+
+Menjalankan agent tiruan berisi tabel ONT dari onts.json (preset huawei):
+    python snmp_lite.py --port 1161 --data onts.json --offline 0.1
+"""
+
+import argparse
+import bisect
+import itertools
+import random
+import socket
+import threading
+
+INTEGER, OCTET_STRING, NULL, OBJECT_ID, SEQUENCE = 0x02, 0x04, 0x05, 0x06, 0x30
+IP_ADDRESS, COUNTER32, GAUGE32, TIMETICKS, COUNTER64 = 0x40, 0x41, 0x42, 0x43, 0x46
+NO_SUCH_OBJECT, NO_SUCH_INSTANCE, END_OF_MIB_VIEW = 0x80, 0x81, 0x82
+GET, GET_NEXT, RESPONSE, GET_BULK = 0xA0, 0xA1, 0xA2, 0xA5
+_UNSIGNED = (COUNTER32, GAUGE32, TIMETICKS, COUNTER64)
+_EXCEPTIONS = (NO_SUCH_OBJECT, NO_SUCH_INSTANCE, END_OF_MIB_VIEW)
+
+DEFAULT_PORT = 161
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_RETRIES = 2
+DEFAULT_MAX_REPETITIONS = 50
+MAX_DATAGRAM = 65507
+
+
+class SnmpError(Exception):
+    """Timeout, respons rusak, atau error-status dari agent."""
+
+
+def parse_oid(oid):
+    if isinstance(oid, tuple):
+        return oid
+    return tuple(int(part) for part in str(oid).strip('.').split('.'))
+
+
+def format_oid(oid):
+    return '.'.join(str(part) for part in oid)
+
+
+# --- BER --------------------------------------------------------------------
+
+def _encode_length(length):
+    if length < 0x80:
+        return bytes([length])
+    raw = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes([0x80 | len(raw)]) + raw
+
+
+def _tlv(tag, payload):
+    return bytes([tag]) + _encode_length(len(payload)) + payload
+
+
+def _encode_int(value, tag=INTEGER):
+    if tag in _UNSIGNED:
+        raw = value.to_bytes(max(1, (value.bit_length() + 8) // 8), 'big')
+    else:
+        raw = value.to_bytes(max(1, (value.bit_length() + 8) // 8), 'big', signed=True)
+    return _tlv(tag, raw)
+
+
+def _encode_oid(oid):
+    oid = parse_oid(oid)
+    out = bytearray([oid[0] * 40 + oid[1]])
+    for part in oid[2:]:
+        chunk = [part & 0x7F]
+        part >>= 7
+        while part:
+            chunk.append(0x80 | (part & 0x7F))
+            part >>= 7
+        out.extend(reversed(chunk))
+    return _tlv(OBJECT_ID, bytes(out))
+
+
+def encode_value(tag, value):
+    if tag in (INTEGER,) + _UNSIGNED:
+        return _encode_int(int(value), tag)
+    if tag == OCTET_STRING:
+        return _tlv(tag, value.encode('utf-8') if isinstance(value, str) else bytes(value))
+    if tag == OBJECT_ID:
+        return _encode_oid(value)
+    if tag == IP_ADDRESS:
+        return _tlv(tag, socket.inet_aton(value))
+    return _tlv(tag, b'')
+
+
+def _decode(data, pos=0):
+    """Mengembalikan (tag, payload, posisi berikutnya)."""
+    tag = data[pos]
+    length = data[pos + 1]
+    pos += 2
+    if length & 0x80:
+        size = length & 0x7F
+        length = int.from_bytes(data[pos:pos + size], 'big')
+        pos += size
+    end = pos + length
+    if end > len(data):
+        raise SnmpError("Paket SNMP terpotong")
+    return tag, data[pos:end], end
+
+
+def _decode_sequence(payload):
+    items, pos = [], 0
+    while pos < len(payload):
+        tag, value, pos = _decode(payload, pos)
+        items.append((tag, value))
+    return items
+
+
+def _decode_oid(payload):
+    first = payload[0]
+    oid = [first // 40, first % 40]
+    value = 0
+    for byte in payload[1:]:
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            oid.append(value)
+            value = 0
+    return tuple(oid)
+
+
+def decode_value(tag, payload):
+    if tag == INTEGER:
+        return int.from_bytes(payload, 'big', signed=True)
+    if tag in _UNSIGNED:
+        return int.from_bytes(payload, 'big')
+    if tag == OCTET_STRING:
+        return payload.decode('utf-8', errors='replace')
+    if tag == OBJECT_ID:
+        return _decode_oid(payload)
+    if tag == IP_ADDRESS:
+        return socket.inet_ntoa(payload)
+    return None
+
+
+def encode_message(community, pdu_type, request_id, a, b, varbinds):
+    """Pesan SNMPv2c; (a, b) = (error-status, error-index) atau (non-repeaters, max-repetitions)."""
+    vb = b''.join(_tlv(SEQUENCE, _encode_oid(oid) + encode_value(tag, value)) for oid, tag, value in varbinds)
+    pdu = _tlv(pdu_type, _encode_int(request_id) + _encode_int(a) + _encode_int(b) + _tlv(SEQUENCE, vb))
+    return _tlv(SEQUENCE, _encode_int(1) + encode_value(OCTET_STRING, community) + pdu)
+
+
+def decode_message(data):
+    """Mengembalikan dict community, pdu_type, request_id, a, b, varbinds [(oid, tag, value)]."""
+    try:
+        _, message, _ = _decode(data)
+        (_, version), (_, community), (pdu_type, pdu) = _decode_sequence(message)
+        fields = _decode_sequence(pdu)
+        varbinds = []
+        for _, vb in _decode_sequence(fields[3][1]):
+            (_, oid), (tag, value) = _decode_sequence(vb)
+            varbinds.append((_decode_oid(oid), tag, decode_value(tag, value)))
+    except (IndexError, ValueError) as e:
+        raise SnmpError(f"Paket SNMP tidak valid: {e}")
+    return {
+        'community': community.decode('utf-8', errors='replace'),
+        'pdu_type': pdu_type,
+        'request_id': decode_value(INTEGER, fields[0][1]),
+        'a': decode_value(INTEGER, fields[1][1]),
+        'b': decode_value(INTEGER, fields[2][1]),
+        'varbinds': varbinds,
+    }
+
+
+# --- klien ------------------------------------------------------------------
+
+class SnmpClient:
+    """Satu socket UDP ke satu agent; request dikirim ulang jika timeout."""
+
+    _request_ids = itertools.count(random.randint(1, 1 << 20))
+
+    def __init__(self, host, community='public', port=DEFAULT_PORT,
+                 timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+        self.address = (host, port)
+        self.community = community
+        self.timeout = timeout
+        self.retries = retries
+        self.requests = 0
+
+    def _request(self, sock, pdu_type, a, b, oids):
+        request_id = next(self._request_ids) & 0x7FFFFFFF
+        packet = encode_message(self.community, pdu_type, request_id, a, b, [(oid, NULL, None) for oid in oids])
+        for _ in range(self.retries + 1):
+            sock.sendto(packet, self.address)
+            self.requests += 1
+            try:
+                # Balasan terlambat dari request sebelumnya diabaikan
+                while True:
+                    data, _ = sock.recvfrom(MAX_DATAGRAM)
+                    response = decode_message(data)
+                    if response['request_id'] == request_id:
+                        break
+            except socket.timeout:
+                continue
+            if response['a']:
+                raise SnmpError(f"Agent {self.address[0]} mengembalikan error-status {response['a']}")
+            return response['varbinds']
+        raise SnmpError(f"Timeout SNMP ke {self.address[0]}:{self.address[1]}")
+
+    def get(self, oids):
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(self.timeout)
+            varbinds = self._request(sock, GET, 0, 0, [parse_oid(o) for o in oids])
+        return {format_oid(oid): value for oid, tag, value in varbinds if tag not in _EXCEPTIONS}
+
+    def walk_columns(self, columns, max_repetitions=DEFAULT_MAX_REPETITIONS):
+        """Walk beberapa kolom tabel sekaligus dengan GETBULK.
+
+        Mengembalikan {kolom: {suffix_index: nilai}}; suffix adalah sisa OID
+        setelah prefix kolom, dipakai untuk menggabungkan baris antar kolom.
+        """
+        prefixes = {c: parse_oid(c) for c in columns}
+        results = {c: {} for c in columns}
+        cursor = dict(prefixes)
+        active = list(columns)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.settimeout(self.timeout)
+            while active:
+                varbinds = self._request(sock, GET_BULK, 0, max_repetitions, [cursor[c] for c in active])
+                finished = set()
+                for i, (oid, tag, value) in enumerate(varbinds):
+                    column = active[i % len(active)]
+                    if column in finished:
+                        continue
+                    prefix = prefixes[column]
+                    if tag in _EXCEPTIONS or oid[:len(prefix)] != prefix or oid <= cursor[column]:
+                        finished.add(column)
+                        continue
+                    results[column][format_oid(oid[len(prefix):])] = value
+                    cursor[column] = oid
+                if not varbinds:
+                    finished.update(active)
+                active = [c for c in active if c not in finished]
+        return results
+
+
+# --- agent tiruan -----------------------------------------------------------
+
+class FakeSnmpAgent:
+    """Agent SNMPv2c read-only dengan tabel OID statis, untuk pengujian tanpa OLT."""
+
+    def __init__(self, table, community='public', host='127.0.0.1', port=0):
+        self.community = community
+        self._lock = threading.Lock()
+        self.set_table(table)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.address = self.sock.getsockname()
+        self._thread = None
+
+    def set_table(self, table):
+        """`table`: {oid: (tag, nilai)}."""
+        items = sorted((parse_oid(oid), value) for oid, value in table.items())
+        with self._lock:
+            self._oids = [oid for oid, _ in items]
+            self._values = [value for _, value in items]
+
+    def _next(self, oid):
+        i = bisect.bisect_right(self._oids, oid)
+        if i >= len(self._oids):
+            return oid, END_OF_MIB_VIEW, None
+        tag, value = self._values[i]
+        return self._oids[i], tag, value
+
+    def handle(self, data):
+        request = decode_message(data)
+        if request['community'] != self.community:
+            return None
+        out = []
+        with self._lock:
+            oids = [oid for oid, _, _ in request['varbinds']]
+            if request['pdu_type'] == GET:
+                for oid in oids:
+                    i = bisect.bisect_left(self._oids, oid)
+                    if i < len(self._oids) and self._oids[i] == oid:
+                        out.append((oid,) + tuple(self._values[i]))
+                    else:
+                        out.append((oid, NO_SUCH_INSTANCE, None))
+            elif request['pdu_type'] == GET_NEXT:
+                out = [self._next(oid) for oid in oids]
+            elif request['pdu_type'] == GET_BULK:
+                non_repeaters, repetitions = max(0, request['a']), max(0, request['b'])
+                out = [self._next(oid) for oid in oids[:non_repeaters]]
+                cursors = list(oids[non_repeaters:])
+                for _ in range(repetitions):
+                    row = [self._next(oid) for oid in cursors]
+                    out.extend(row)
+                    cursors = [r[0] for r in row]
+                    if all(r[1] == END_OF_MIB_VIEW for r in row):
+                        break
+        packet = encode_message(self.community, RESPONSE, request['request_id'], 0, 0, out)
+        while len(packet) > MAX_DATAGRAM and len(out) > 1:
+            out = out[:len(out) // 2]  # agent sungguhan juga memotong respons GETBULK yang terlalu besar
+            packet = encode_message(self.community, RESPONSE, request['request_id'], 0, 0, out)
+        return packet
+
+    def serve_forever(self):
+        while True:
+            try:
+                data, client = self.sock.recvfrom(MAX_DATAGRAM)
+            except OSError:
+                return  # socket ditutup
+            try:
+                packet = self.handle(data)
+            except SnmpError:
+                continue
+            if packet:
+                self.sock.sendto(packet, client)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self.sock.close()
+
+
+def build_ont_table(onts, preset, offline_ratio=0.0, seed=None):
+    """Tabel OID tiruan untuk daftar ONT menurut preset OLT (lihat status_providers.OLT_PRESETS)."""
+    rng = random.Random(seed)
+    table = {}
+    for n, ont in enumerate(onts):
+        index = f"{4194304000 + n // 128}.{n % 128}"
+        online = rng.random() >= offline_ratio
+        table[f"{preset['description_oid']}.{index}"] = (OCTET_STRING, str(ont.get(preset.get('match_field', 'id_pelanggan'), '')))
+        table[f"{preset['status_oid']}.{index}"] = (INTEGER, preset['online_values'][0] if online else preset['offline_value'])
+        if preset.get('rx_power_oid'):
+            rx = rng.uniform(-27.0, -15.0) if online else preset.get('rx_power_missing', 2147483647)
+            raw = int(round(rx / preset.get('rx_power_scale', 1))) if online else rx
+            table[f"{preset['rx_power_oid']}.{index}"] = (INTEGER, raw)
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Agent SNMP tiruan berisi tabel status ONT.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=1161)
+    parser.add_argument('--community', default='public')
+    parser.add_argument('--data', default='onts.json', help="Inventaris sumber daftar ONT")
+    parser.add_argument('--preset', default='huawei')
+    parser.add_argument('--offline', type=float, default=0.05, help="Rasio ONT yang dilaporkan offline")
+    args = parser.parse_args(argv)
+
+    from inventory import InventoryRepository
+    from status_providers import OLT_PRESETS
+    onts = InventoryRepository(args.data).all()
+    agent = FakeSnmpAgent(build_ont_table(onts, OLT_PRESETS[args.preset], args.offline),
+                          args.community, args.host, args.port)
+    print(f"Agent SNMP tiruan ({len(onts)} ONT, preset {args.preset}) di {agent.address[0]}:{agent.address[1]}")
+    try:
+        agent.serve_forever()
+    except KeyboardInterrupt:
+        agent.close()
+
+
+if __name__ == "__main__":
+    main()
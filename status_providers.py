@@ -0,0 +1,158 @@
+"""
+Provider status ONT selain ICMP.
+
+Provider membaca status banyak ONT sekaligus dari sumber lain (misalnya tabel
+ONT di OLT lewat SNMP) dan mengembalikan observasi per id ONT:
+    {'online': bool, 'rx_power': float | None, 'source': 'snmp:olt-1'}
+
+Provider dikonfigurasi di status_providers.json dan digabung berdasarkan
+prioritas (angka besar menang). ONT yang tidak dilaporkan provider mana pun
+tetap di-ping lewat jalur ICMP di ping_check.py.
+
+Contoh status_providers.json:
+    [{"type": "snmp_olt", "name": "olt-1", "host": "10.239.1.1",
+      "community": "public", "preset": "huawei", "priority": 10}]
+"""
+
+import json
+
+from snmp_lite import SnmpClient, SnmpError, DEFAULT_PORT, DEFAULT_MAX_REPETITIONS
+
+PROVIDERS_FILE = 'status_providers.json'
+
+# OID kolom tabel ONT per vendor; indeks baris = ifIndex port PON + id ONT.
+# Field konfigurasi dengan nama yang sama menimpa nilai preset.
+OLT_PRESETS = {
+    'huawei': {
+        'description_oid': '1.3.6.1.4.1.2011.6.128.1.1.2.43.1.9',
+        'status_oid': '1.3.6.1.4.1.2011.6.128.1.1.2.46.1.15',
+        'online_values': [1],
+        'offline_value': 2,
+        'rx_power_oid': '1.3.6.1.4.1.2011.6.128.1.1.2.51.1.4',
+        'rx_power_scale': 0.01,
+        'rx_power_missing': 2147483647,
+        'match_field': 'id_pelanggan',
+    },
+}
+
+
+class StatusProvider:
+    """Antarmuka provider; subclass mengisi `collect`."""
+
+    type_name = None
+
+    def __init__(self, name, priority=0, **options):
+        self.name = name
+        self.priority = priority
+        self.options = options
+
+    def collect(self, onts):
+        """Mengembalikan {ont_id: observasi} untuk ONT yang diketahui provider."""
+        raise NotImplementedError
+
+
+class SnmpOltProvider(StatusProvider):
+    """Membaca status operasional dan Rx power semua ONT dari satu OLT.
+
+    Tiga kolom tabel (deskripsi, status, Rx power) di-walk bersama dengan GETBULK,
+    lalu baris dicocokkan ke inventaris lewat deskripsi ONT = `match_field`.
+    """
+
+    type_name = 'snmp_olt'
+
+    def __init__(self, name, host, community='public', port=DEFAULT_PORT, priority=10,
+                 preset='huawei', max_repetitions=DEFAULT_MAX_REPETITIONS, timeout=2.0, retries=2, **options):
+        super().__init__(name, priority)
+        if preset not in OLT_PRESETS:
+            raise ValueError(f"Preset OLT tidak dikenal: {preset}")
+        self.config = dict(OLT_PRESETS[preset], **options)
+        self.client = SnmpClient(host, community, port, timeout, retries)
+        self.max_repetitions = max_repetitions
+
+    def _rx_power(self, raw):
+        if raw is None or raw == self.config.get('rx_power_missing'):
+            return None
+        return round(raw * self.config.get('rx_power_scale', 1), 2)
+
+    def collect(self, onts):
+        cfg = self.config
+        columns = [cfg['description_oid'], cfg['status_oid']]
+        if cfg.get('rx_power_oid'):
+            columns.append(cfg['rx_power_oid'])
+        table = self.client.walk_columns(columns, self.max_repetitions)
+        descriptions, states = table[cfg['description_oid']], table[cfg['status_oid']]
+        rx = table.get(cfg.get('rx_power_oid'), {})
+
+        by_key = {}
+        for ont in onts:
+            key = str(ont.get(cfg['match_field']) or '').strip()
+            if key:
+                by_key.setdefault(key, ont['id'])
+        observations = {}
+        for index, description in descriptions.items():
+            ont_id = by_key.get(str(description).strip())
+            if ont_id is None or index not in states:
+                continue
+            online = states[index] in cfg['online_values']
+            observations[ont_id] = {
+                'online': online,
+                'rx_power': self._rx_power(rx.get(index)) if online else None,
+                'source': f'snmp:{self.name}',
+            }
+        return observations
+
+
+PROVIDER_TYPES = {cls.type_name: cls for cls in (SnmpOltProvider,)}
+
+
+def load_providers(path=PROVIDERS_FILE):
+    """Membuat provider dari file konfigurasi; file tidak ada berarti hanya ICMP."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        return []
+    except json.JSONDecodeError as e:
+        print(f"Warning: {path} tidak valid, provider status diabaikan: {e}")
+        return []
+    providers = []
+    for entry in entries:
+        entry = dict(entry)
+        kind = entry.pop('type', None)
+        if entry.pop('enabled', True) is False:
+            continue
+        provider_type = PROVIDER_TYPES.get(kind)
+        if provider_type is None:
+            print(f"Warning: tipe provider status tidak dikenal: {kind}")
+            continue
+        try:
+            providers.append(provider_type(**entry))
+        except (TypeError, ValueError, KeyError) as e:
+            print(f"Warning: konfigurasi provider {entry.get('name')} tidak valid: {e!r}")
+    return providers
+
+
+def collect_observations(providers, onts):
+    """Menjalankan provider dari prioritas tertinggi; ONT pertama kali dilaporkan yang dipakai.
+
+    Provider yang gagal karena alasan apa pun (jaringan, atau konfigurasi yang
+    salah seperti kolom Rx power bertipe OctetString) dilewati dan ONT-nya tetap
+    di-ping; satu provider tidak boleh menggagalkan siklus ping.
+    """
+    merged = {}
+    for provider in sorted(providers, key=lambda p: -p.priority):
+        try:
+            found = provider.collect(onts)
+        except (SnmpError, OSError) as e:
+            print(f"[PROVIDER] {provider.name} gagal, ONT-nya kembali ke ICMP: {e}")
+            continue
+        except Exception as e:
+            print(f"[PROVIDER] {provider.name} error ({type(e).__name__}: {e}), ONT-nya kembali ke ICMP")
+            continue
+        added = 0
+        for ont_id, observation in found.items():
+            if ont_id not in merged:
+                merged[ont_id] = observation
+                added += 1
+        print(f"[PROVIDER] {provider.name}: {len(found)} ONT dilaporkan, {added} dipakai")
+    return merged
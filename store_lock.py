@@ -0,0 +1,99 @@
+"""
+Lock antar-proses untuk file JSON yang dipakai bersama (inventaris, notifikasi,
+outage, log sampel, request log).
+
+Saat web app berjalan dengan beberapa worker (serve.py), setiap read-modify-write
+pada file bersama harus dilakukan di bawah lock ini agar penulisan worker lain
+tidak hilang. File lock diletakkan di sebelah file datanya: `.<nama>.lock`.
+
+Penggunaan:
+    with store_lock.shared_lock('notifications.json'):
+        data = load(...)
+        save(...)
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl  # type: ignore
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt  # type: ignore
+
+
+def lock_path(path):
+    """Path file lock untuk file data `path`."""
+    return os.path.join(os.path.dirname(path) or '.', f".{os.path.basename(path)}.lock")
+
+
+class FileLock:
+    """Lock eksklusif antar-proses berbasis file (flock / msvcrt)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = None
+
+    def acquire(self):
+        self._fh = open(self.path, 'a+')
+        if fcntl is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        else:
+            self._fh.seek(0)
+            msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+
+    def release(self):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            else:
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._fh.close()
+            self._fh = None
+
+
+class SharedLock:
+    """Lock reentrant antar-thread dan antar-proses untuk satu file data."""
+
+    def __init__(self, path):
+        self._lock = threading.RLock()
+        self._file_lock = FileLock(lock_path(path))
+        self._depth = 0
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            if self._depth == 0:
+                self._file_lock.acquire()
+        except BaseException:
+            self._lock.release()
+            raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        try:
+            if self._depth == 0:
+                self._file_lock.release()
+        finally:
+            self._lock.release()
+
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+@contextmanager
+def shared_lock(path):
+    """Mengunci file data `path` (satu SharedLock per path di setiap proses)."""
+    key = os.path.abspath(path)
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = SharedLock(path)
+    with lock:
+        yield
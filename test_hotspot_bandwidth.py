@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Script untuk menguji throughput hotspot (hotspot_bandwidth.BandwidthTracker)
+Memastikan checkpoint bandwidth.json hanya ditulis sesuai cadence dan worker
+lain mendapat kolom sebelumnya lewat journal
+"""
+
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+from hotspot_bandwidth import BandwidthTracker
+from journal_store import file_signature
+
+MACS = [f"02:00:00:00:00:{i:02X}" for i in range(1, 6)]
+
+def snapshot(minute, router='gw-a'):
+    """Snapshot 08:00 + `minute` menit; user ke-i mengunduh (i + 1) KB per menit"""
+    users = [{'mac': mac, 'uptime': f"{minute + 1}m", 'bytes_in': 100 * minute,
+              'bytes_out': 1000 * (i + 1) * (minute + 1)} for i, mac in enumerate(MACS)]
+    return [(datetime(2026, 10, 19, 8, 0) + timedelta(minutes=minute), router, users)]
+
+def test_checkpoint_cadence():
+    """bandwidth.json hanya ditulis ulang setiap checkpoint_every snapshot"""
+    print("🔍 Testing cadence checkpoint...")
+    tracker = BandwidthTracker(tempfile.mkdtemp(prefix='bandwidth-test-'), checkpoint_every=4)
+    try:
+        signatures = set()
+        for minute in range(8):
+            tracker.ingest(snapshot(minute))
+            signatures.add(file_signature(tracker.state_file))
+        writes = len(signatures - {None})
+        assert writes == 2 and os.path.getsize(tracker.journal_file) == 0
+        print(f"✅ 8 snapshot, {writes} kali checkpoint")
+    finally:
+        shutil.rmtree(tracker.directory)
+
+def test_workers_share_columns():
+    """Dua worker bergantian ingest: hasil sama dengan satu worker"""
+    print("🔍 Testing kolom sebelumnya antar-worker...")
+    directory = tempfile.mkdtemp(prefix='bandwidth-test-')
+    single = BandwidthTracker(tempfile.mkdtemp(prefix='bandwidth-test-'), checkpoint_every=4)
+    workers = [BandwidthTracker(directory, checkpoint_every=4), BandwidthTracker(directory, checkpoint_every=4)]
+    try:
+        for minute in range(10):
+            workers[minute % 2].ingest(snapshot(minute))
+            single.ingest(snapshot(minute))
+        assert workers[0].series() == single.series() and len(single.series()) == 9
+        assert workers[0].current() == workers[1].current() == single.current()
+        top = single.current()['top']
+        assert top[0]['mac'] == MACS[-1] and top[0]['bytes_out'] == 5000 * 9
+        print(f"✅ {len(single.series())} titik series dan top talker sama di kedua worker")
+
+        fresh = BandwidthTracker(directory, checkpoint_every=4)
+        assert fresh.current() == single.current()
+        print("✅ proses baru: checkpoint + journal menghasilkan jendela berjalan yang sama")
+    finally:
+        shutil.rmtree(directory)
+        shutil.rmtree(single.directory)
+
+def test_window_close():
+    """Jendela yang lewat ditulis ke top-/usage- bulanan"""
+    print("🔍 Testing penutupan jendela...")
+    tracker = BandwidthTracker(tempfile.mkdtemp(prefix='bandwidth-test-'), window=300, checkpoint_every=4)
+    try:
+        for minute in range(11):
+            tracker.ingest(snapshot(minute))
+        windows = tracker.windows()
+        assert [w['start'] for w in windows] == ['2026-10-19T08:00:00', '2026-10-19T08:05:00']
+        history = tracker.mac_history(MACS[0])
+        assert [h['bytes_out'] for h in history] == [4000, 5000]
+        print(f"✅ {len(windows)} jendela selesai, riwayat MAC: {[h['bytes_out'] for h in history]}")
+    finally:
+        shutil.rmtree(tracker.directory)
+
+def main():
+    print("🧪 HOTSPOT BANDWIDTH TESTING")
+    print("=" * 50)
+    test_checkpoint_cadence()
+    test_workers_share_columns()
+    test_window_close()
+    print("\n🎯 TESTING SELESAI!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Script untuk menguji pelacakan sesi hotspot (hotspot_sessions.SessionStore)
+Menjalankan snapshot user aktif lewat join, leave, login ulang, snapshot
+terlambat, replay journal dan checkpoint di folder sementara
+"""
+
+import os
+import shutil
+import tempfile
+
+from hotspot_sessions import SessionStore
+
+def user(mac, uptime, bytes_in, bytes_out=0, ip=None):
+    """Satu baris user aktif seperti hasil clean_user di routers.py"""
+    return {'mac': mac, 'ip': ip or f"172.16.0.{int(mac[-2:], 16)}", 'uptime': uptime,
+            'bytes_in': bytes_in, 'bytes_out': bytes_out}
+
+def snapshot(minute, users, router=None, key=None):
+    """Snapshot pada 2026-10-19 08:MM"""
+    data = {'timestamp': f"2026-10-19T08:{minute:02d}:00", 'users': users, 'key': key or f"s{minute}-{router}"}
+    if router:
+        data['router'] = router
+    return data
+
+def make_store(checkpoint_every=100):
+    return SessionStore(tempfile.mkdtemp(prefix='sessions-test-'), checkpoint_every=checkpoint_every)
+
+def test_join_leave_restart():
+    """Join membuka sesi, user hilang menutup sesi, uptime mundur = login ulang"""
+    print("🔍 Testing join/leave/login ulang...")
+    store = make_store()
+    try:
+        A, B = '02:00:00:00:00:0A', '02:00:00:00:00:0B'
+        store.apply_snapshots([snapshot(0, [user(A, '10m', 1000), user(B, '1h', 5000)])])
+        assert store.status()['active'] == 2
+        started = {s['mac']: s['start'] for s in store.sessions()}
+        assert started[A] == '2026-10-19T07:50:00' and started[B] == '2026-10-19T07:00:00'
+        print("✅ join: 2 sesi aktif, waktu mulai = snapshot - uptime")
+
+        store.apply_snapshots([snapshot(5, [user(A, '15m', 3000), user(B, '1h5m', 9000)]),
+                               snapshot(10, [user(A, '20m', 4000)])])
+        closed = [s for s in store.sessions(mac=B) if not s.get('active')]
+        assert len(closed) == 1 and closed[0]['end'] == '2026-10-19T08:05:00' and closed[0]['bytes_in'] == 9000
+        print("✅ leave: sesi B ditutup pada snapshot terakhir terlihat dengan counter terakhir")
+
+        store.apply_snapshots([snapshot(15, [user(A, '2m', 100)])])
+        sessions = store.sessions(mac=A)
+        assert len(sessions) == 2 and sessions[0]['active'] and sessions[0]['start'] == '2026-10-19T08:13:00'
+        assert sessions[1]['end'] == '2026-10-19T08:10:00' and sessions[1]['bytes_in'] == 4000
+        print("✅ login ulang: sesi lama ditutup, sesi baru dibuka")
+    finally:
+        shutil.rmtree(store.directory)
+
+def test_late_and_duplicate():
+    """Snapshot terlambat hanya dicatat jumlahnya; key yang sama dilewati"""
+    print("🔍 Testing snapshot terlambat dan duplikat...")
+    store = make_store()
+    try:
+        A = '02:00:00:00:00:0A'
+        store.apply_snapshots([snapshot(10, [user(A, '10m', 1000)])])
+        accepted, duplicates = store.apply_snapshots([snapshot(5, []), snapshot(10, [user(A, '10m', 1000)])])
+        assert (accepted, duplicates) == (1, 1)
+        assert store.status()['active'] == 1 and store.status()['last_poll'] == '2026-10-19T08:10:00'
+        assert [(t, n) for t, n, _ in store.poll_counts()] == [('2026-10-19T08:05:00', 0), ('2026-10-19T08:10:00', 1)]
+        print("✅ snapshot 08:05 setelah 08:10 tidak menutup sesi; key ganda dilewati")
+    finally:
+        shutil.rmtree(store.directory)
+
+def test_router_partition():
+    """Snapshot satu router tidak menutup sesi router lain"""
+    print("🔍 Testing partisi per router...")
+    store = make_store()
+    try:
+        store.apply_snapshots([snapshot(0, [user('02:00:00:00:00:0A', '1m', 1)], router='gw-a'),
+                               snapshot(0, [user('02:00:00:00:00:0B', '1m', 1)], router='gw-b')])
+        store.apply_snapshots([snapshot(5, [], router='gw-a')])
+        routers = store.status()['routers']
+        assert routers['gw-a']['active'] == 0 and routers['gw-b']['active'] == 1
+        print("✅ gw-a kosong tidak menutup sesi gw-b")
+    finally:
+        shutil.rmtree(store.directory)
+
+def test_replay_and_checkpoint():
+    """Worker kedua melihat state yang sama lewat journal; checkpoint mengosongkan journal"""
+    print("🔍 Testing replay journal dan checkpoint...")
+    worker_a = make_store(checkpoint_every=4)
+    worker_b = SessionStore(worker_a.directory, checkpoint_every=4)
+    try:
+        macs = [f"02:00:00:00:00:{i:02X}" for i in range(1, 6)]
+        for minute in range(3):
+            users = [user(m, f"{minute + 1}m", 1000 * (minute + 1)) for m in macs[:3 + minute]]
+            store = worker_a if minute % 2 == 0 else worker_b
+            store.apply_snapshots([snapshot(minute, users)])
+        assert os.path.getsize(worker_a.journal_file) > 0 and not os.path.exists(worker_a.checkpoint_file)
+        assert worker_a.status()['active'] == worker_b.status()['active'] == 5
+        print("✅ dua worker memutar ulang journal yang sama: 5 sesi aktif")
+
+        worker_a.apply_snapshots([snapshot(3, [user(m, '4m', 4000) for m in macs])])
+        assert os.path.exists(worker_a.checkpoint_file) and os.path.getsize(worker_a.journal_file) == 0
+        worker_b.apply_snapshots([snapshot(4, [user(m, '5m', 5000) for m in macs[1:]])])
+        print("✅ snapshot ke-4 menulis checkpoint dan mengosongkan journal")
+
+        fresh = SessionStore(worker_a.directory, checkpoint_every=4)
+        assert fresh.status()['active'] == 4 and fresh.status()['journal_entries'] == 1
+        print("✅ proses baru: checkpoint + 1 baris journal")
+    finally:
+        shutil.rmtree(worker_a.directory)
+
+def test_counters_across_workers():
+    """Baris `u` membawa counter byte ke worker lain di antara checkpoint"""
+    print("🔍 Testing counter byte antar-worker...")
+    worker_a = make_store(checkpoint_every=4)
+    worker_b = SessionStore(worker_a.directory, checkpoint_every=4)
+    try:
+        A, B = '02:00:00:00:00:0A', '02:00:00:00:00:0B'
+        # gw-a hanya diproses worker A, gw-b hanya worker B; checkpoint global (seq 4, 8)
+        # tidak jatuh bersamaan dengan baris `u` snapshot ke-4 gw-a (seq 7)
+        for minute in range(4):
+            worker_a.apply_snapshots([snapshot(minute, [user(A, f"{minute + 1}m", 1000 * (minute + 1))], router='gw-a')])
+            worker_b.apply_snapshots([snapshot(minute, [user(B, f"{minute + 1}m", 10)], router='gw-b')])
+        worker_b.apply_snapshots([snapshot(4, [], router='gw-a')])
+        closed = [s for s in worker_b.sessions(mac=A) if not s.get('active')]
+        assert closed and closed[0]['bytes_in'] == 4000, closed
+        print("✅ worker B menutup sesi gw-a dengan counter terakhir dari worker A")
+    finally:
+        shutil.rmtree(worker_a.directory)
+
+def main():
+    print("🧪 HOTSPOT SESSION TESTING")
+    print("=" * 50)
+    test_join_leave_restart()
+    test_late_and_duplicate()
+    test_router_partition()
+    test_replay_and_checkpoint()
+    test_counters_across_workers()
+    print("\n🎯 TESTING SELESAI!")
+
+if __name__ == "__main__":
+    main()
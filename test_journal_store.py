@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Script untuk menguji checkpoint + journal bersama (journal_store.Journal)
+Dipakai inventory.py, hotspot_sessions.py dan hotspot_bandwidth.py
+"""
+
+import os
+import shutil
+import tempfile
+
+from journal_store import Journal
+
+def make_journal(directory):
+    return Journal(os.path.join(directory, 'state.json'), os.path.join(directory, 'events.jsonl'))
+
+def test_torn_tail():
+    """Baris terakhir yang terpotong tidak diterapkan dan dibuang saat append berikutnya"""
+    print("🔍 Testing baris journal terpotong...")
+    directory = tempfile.mkdtemp(prefix='journal-test-')
+    try:
+        writer, reader = make_journal(directory), make_journal(directory)
+        writer.append([{'seq': 1, 'v': 'a'}])
+        with open(writer.journal_file, 'ab') as f:
+            f.write(b'{"seq": 2, "v": "ter')  # crash di tengah baris
+        seen = []
+        assert reader.poll() == 'tail' and reader.replay(seen.append) == 1 and seen == [{'seq': 1, 'v': 'a'}]
+        writer.append([{'seq': 2, 'v': 'b'}])
+        assert reader.replay(seen.append) == 1 and seen[-1]['v'] == 'b'
+        print("✅ sisa baris dibuang, baris berikutnya terbaca utuh")
+    finally:
+        shutil.rmtree(directory)
+
+def test_checkpoint_and_seq_gate():
+    """Checkpoint baru memicu muat ulang; baris dengan seq yang sudah tercakup dilewati"""
+    print("🔍 Testing checkpoint dan gerbang seq...")
+    directory = tempfile.mkdtemp(prefix='journal-test-')
+    try:
+        writer, reader = make_journal(directory), make_journal(directory)
+        writer.append([{'seq': n} for n in (1, 2, 3)])
+        writer.checkpoint({'total': 3})
+        assert writer.pending == 0 and os.path.getsize(writer.journal_file) == 0
+        assert reader.poll() == 'checkpoint'
+        assert reader.load_checkpoint({}) == {'total': 3, 'seq': 3} and reader.seq == 3
+        print("✅ checkpoint membawa seq, journal dikosongkan")
+
+        # Worker yang tertinggal menulis ulang baris lama: tidak diterapkan dua kali
+        with open(writer.journal_file, 'a', encoding='utf-8') as f:
+            f.write('{"seq":3}\n{"seq":4}\n')
+        seen = []
+        assert reader.replay(seen.append) == 1 and seen == [{'seq': 4}]
+        print("✅ seq 3 dilewati, seq 4 diterapkan")
+
+        writer.seq = 4
+        writer.checkpoint({'total': 4})
+        assert reader.poll() == 'checkpoint'
+        print("✅ journal menyusut setelah checkpoint worker lain: muat ulang")
+    finally:
+        shutil.rmtree(directory)
+
+def main():
+    print("🧪 JOURNAL STORE TESTING")
+    print("=" * 50)
+    test_torn_tail()
+    test_checkpoint_and_seq_gate()
+    print("\n🎯 TESTING SELESAI!")
+
+if __name__ == "__main__":
+    main()
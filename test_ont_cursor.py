@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Script untuk menguji keyset pagination halaman admin (ont_index)
+Memastikan cursor membawa kolom sort-nya dan cursor dari sort lain ditolak
+"""
+
+from ont_index import SortedOntIndex, encode_cursor
+
+def make_index(count=120):
+    """Indeks berisi ONT sintetis dengan nama dan status bervariasi"""
+    index = SortedOntIndex()
+    index.sync([
+        {'id': i, 'name': f"Baciro RW {i % 17}", 'status': 'ON' if i % 3 else 'OFF',
+         'last_on': f"2026-10-{1 + i % 28:02d}T08:00:00", 'ip': f"10.0.{i // 250}.{i % 250}"}
+        for i in range(1, count + 1)
+    ])
+    return index
+
+def walk(index, **kwargs):
+    """Mengikuti next_cursor sampai habis, mengembalikan semua id berurutan"""
+    ids, cursor = [], None
+    while True:
+        page = index.page(cursor=cursor, limit=25, **kwargs)
+        ids.extend(item['id'] for item in page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return ids
+
+def test_cursor_walk():
+    """Semua halaman berurutan tanpa duplikat untuk setiap sort dan arah"""
+    print("🔍 Testing jalan cursor per sort...")
+    index = make_index()
+    for sort in ('id', 'name', 'status', 'last_on'):
+        for order in ('asc', 'desc'):
+            ids = walk(index, sort=sort, order=order)
+            assert sorted(ids) == list(range(1, 121)), (sort, order)
+            print(f"✅ sort={sort} order={order}: {len(ids)} ONT")
+    ids = walk(index, sort='name', group='off')
+    assert ids and all(i % 3 == 0 for i in ids)
+    print(f"✅ filter status off: {len(ids)} ONT")
+
+def test_cursor_sort_mismatch():
+    """Cursor dari sort name yang dipakai dengan sort=id harus ValueError (400), bukan TypeError"""
+    print("🔍 Testing cursor lintas sort...")
+    index = make_index()
+    cursor = index.page(sort='name', limit=10)['next_cursor']
+    for sort in ('id', 'status'):
+        try:
+            index.page(sort=sort, cursor=cursor)
+        except ValueError as e:
+            print(f"✅ sort={sort} ditolak: {e}")
+        else:
+            raise AssertionError(f"cursor sort name diterima untuk sort={sort}")
+
+def test_cursor_malformed():
+    """Cursor rusak atau dengan tipe key yang salah ditolak dengan ValueError"""
+    print("🔍 Testing cursor rusak...")
+    index = make_index()
+    bad = [('id', 'bukan-base64!!'), ('id', encode_cursor(('abc',), 'id')),
+           ('name', encode_cursor((5, 'x'), 'name')), ('name', encode_cursor(('a', 1, 2), 'name')),
+           ('id', encode_cursor((True,), 'id'))]
+    for sort, cursor in bad:
+        try:
+            index.page(sort=sort, cursor=cursor)
+        except ValueError:
+            continue
+        raise AssertionError(f"cursor {cursor!r} diterima untuk sort={sort}")
+    print(f"✅ {len(bad)} cursor rusak ditolak")
+
+def main():
+    print("🧪 ONT CURSOR TESTING")
+    print("=" * 50)
+    test_cursor_walk()
+    test_cursor_sort_mismatch()
+    test_cursor_malformed()
+    print("\n🎯 TESTING SELESAI!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Script untuk menguji kolektor user aktif multi-router (routers.RouterCollector)
+Memastikan pemanggil yang tumpang tindih menunggu poll yang sedang berjalan
+"""
+
+import threading
+import time
+
+from routers import Router, RouterCollector
+
+class SlowApi:
+    """Pengganti modul routeros_api: setiap /ip/hotspot/active butuh `latency` detik"""
+
+    def __init__(self, latency=0.5, rows=3):
+        self.latency = latency
+        self.rows = [{'address': f"172.16.0.{i}", 'mac-address': f"02:00:00:00:00:{i:02X}"} for i in range(rows)]
+        self.fetches = 0
+
+    def RouterOsApiPool(self, host, **kwargs):
+        return self
+
+    def get_api(self):
+        return self
+
+    def get_resource(self, path):
+        return self
+
+    def get(self):
+        self.fetches += 1
+        time.sleep(self.latency)
+        return list(self.rows)
+
+    def disconnect(self):
+        pass
+
+def test_overlapping_collect():
+    """Dua collect() bersamaan: keduanya dapat user, router hanya di-poll sekali"""
+    print("🔍 Testing collect() tumpang tindih...")
+    api = SlowApi()
+    collector = RouterCollector([Router('gw-a', '127.0.0.1', timeout=2)], api_module=api)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(collector.collect())) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [len(r['gw-a'] or []) for r in results] == [3, 3], results
+    assert api.fetches == 1
+    print("✅ kedua pemanggil menerima 3 user dari satu poll")
+
+    assert len(collector.collect()['gw-a']) == 3 and api.fetches == 2
+    print("✅ collect() berikutnya membuka poll baru")
+
+def main():
+    print("🧪 ROUTER COLLECTOR TESTING")
+    print("=" * 50)
+    test_overlapping_collect()
+    print("\n🎯 TESTING SELESAI!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Script untuk menguji spool uploader ping_check (uploader.SpoolUploader)
+Memastikan sampel hanya dibuang jika server menerimanya atau menolaknya per item
+"""
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+import requests
+
+from uploader import SpoolUploader
+
+class FakeServer:
+    """Pengganti requests.Session: status HTTP bisa diatur, batch yang diterima dicatat"""
+
+    def __init__(self, status=200, max_items=None, reject_kind=None):
+        self.status = status
+        self.max_items = max_items
+        self.reject_kind = reject_kind
+        self.batches = []
+
+    def post(self, url, data=None, timeout=None):
+        if self.status is None:
+            raise requests.ConnectionError("server mati")
+        items = json.loads(gzip.decompress(data))['items']
+        response = requests.Response()
+        if self.max_items is not None and len(items) > self.max_items:
+            response.status_code = 413
+            response._content = b'{"success": false, "message": "Batch terlalu besar"}'
+            return response
+        response.status_code = self.status
+        if not response.ok:
+            response._content = b'{}'
+            return response
+        rejected = [{'key': i['key'], 'message': 'kind tidak dikenal'} for i in items if i['kind'] == self.reject_kind]
+        self.batches.append([i['key'] for i in items])
+        response._content = json.dumps({'success': True, 'accepted': len(items) - len(rejected),
+                                        'duplicates': 0, 'rejected': rejected}).encode('utf-8')
+        return response
+
+def make_uploader(server, count=10, max_batch=200):
+    """Uploader dengan spool sementara berisi `count` sampel history"""
+    spool_dir = tempfile.mkdtemp(prefix='spool-test-')
+    uploader = SpoolUploader('http://localhost:5000', spool_dir=spool_dir, max_batch=max_batch)
+    uploader.session = server
+    keys = [uploader.enqueue('history', {'users': i}) for i in range(count)]
+    return uploader, keys
+
+def test_retry_keeps_spool():
+    """404 (server belum di-upgrade), 503 dan koneksi gagal: spool tetap utuh dan backoff aktif"""
+    print("🔍 Testing retry tanpa kehilangan sampel...")
+    for status in (404, 405, 503, None):
+        server = FakeServer(status=status)
+        uploader, _ = make_uploader(server)
+        try:
+            assert uploader.flush() == 0
+            assert len(uploader.pending()) == 10, status
+            assert uploader._backoff > 0 and uploader.flush() == 0  # masih dalam backoff
+            server.status = 200
+            assert uploader.flush(force=True) == 10 and not uploader.pending()
+            print(f"✅ status {status}: sampel tersimpan lalu terkirim setelah pulih")
+        finally:
+            shutil.rmtree(uploader.spool_dir)
+
+def test_split_on_413():
+    """413 memecah batch; sampel yang sendirian masih 413 disisihkan, tidak dihapus"""
+    print("🔍 Testing pemecahan batch 413...")
+    server = FakeServer(max_items=3)
+    uploader, keys = make_uploader(server, count=10)
+    try:
+        assert uploader.flush() == 10 and not uploader.pending()
+        assert all(len(batch) <= 3 for batch in server.batches)
+        assert sorted(k for batch in server.batches for k in batch) == sorted(keys)
+        print(f"✅ 10 sampel terkirim dalam {len(server.batches)} batch")
+    finally:
+        shutil.rmtree(uploader.spool_dir)
+
+    server = FakeServer(max_items=0)
+    uploader, _ = make_uploader(server, count=2)
+    try:
+        assert uploader.flush() == 0 and not uploader.pending()
+        quarantined = [n for n in os.listdir(uploader.spool_dir) if n.endswith('.rejected')]
+        assert len(quarantined) == 2
+        print(f"✅ sampel yang selalu 413 disisihkan: {len(quarantined)} file .rejected")
+    finally:
+        shutil.rmtree(uploader.spool_dir)
+
+def test_drop_rejected_items():
+    """Item yang disebut server di `rejected` dibuang, sisanya terkirim"""
+    print("🔍 Testing item yang ditolak server...")
+    server = FakeServer(reject_kind='rusak')
+    uploader, _ = make_uploader(server, count=4)
+    uploader.enqueue('rusak', {})
+    try:
+        assert uploader.flush() == 5 and not uploader.pending()
+        print("✅ item ditolak dibuang, batch selesai")
+    finally:
+        shutil.rmtree(uploader.spool_dir)
+
+def main():
+    print("🧪 SPOOL UPLOADER TESTING")
+    print("=" * 50)
+    test_retry_keeps_spool()
+    test_split_on_413()
+    test_drop_rejected_items()
+    print("\n🎯 TESTING SELESAI!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Topologi upstream (gateway, switch distribusi, port OLT) untuk probing bertingkat.
+
+Node upstream didefinisikan di upstreams.json:
+    [{"id": "gw-1", "name": "Gateway Utama", "ip": "10.239.0.1"},
+     {"id": "olt1-pon3", "name": "OLT 1 PON 3", "ip": "10.239.1.3", "parent": "gw-1"}]
+
+ONT boleh punya field opsional `parent` berisi id node upstream. Node di-probe
+dari akar ke bawah; node/ONT yang induknya down tidak di-ping sama sekali dan
+ditandai unreachable dengan root cause node paling atas yang down.
+"""
+
+import json
+import os
+import tempfile
+import time
+
+UPSTREAMS_FILE = 'upstreams.json'
+UPSTREAM_STATUS_FILE = 'upstream_status.json'
+UPSTREAM_DOWN_STATUS = "OFF(Upstream Down)"
+
+UP, DOWN, UNREACHABLE, UNKNOWN = 'UP', 'DOWN', 'UNREACHABLE', 'UNKNOWN'
+
+
+def load_upstreams(path=UPSTREAMS_FILE):
+    """Mengembalikan dict id -> node; file tidak ada berarti tanpa topologi."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            nodes = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError as e:
+        print(f"Warning: {path} tidak valid, topologi diabaikan: {e}")
+        return {}
+    return {str(n['id']): n for n in nodes if n.get('id') not in (None, '')}
+
+
+def probe_order(nodes):
+    """Urutan id node dengan induk selalu sebelum anaknya.
+
+    Node dengan induk yang tidak dikenal atau yang berada dalam siklus
+    diperlakukan sebagai akar agar tetap di-probe.
+    """
+    order, state = [], {}
+
+    def visit(node_id, path):
+        if state.get(node_id) == 'done':
+            return
+        if node_id in path:
+            print(f"Warning: siklus topologi di {' -> '.join(path + [node_id])}")
+            return
+        parent = str(nodes[node_id].get('parent') or '')
+        if parent in nodes:
+            visit(parent, path + [node_id])
+        if state.get(node_id) != 'done':
+            state[node_id] = 'done'
+            order.append(node_id)
+
+    for node_id in nodes:
+        visit(node_id, [])
+    return order
+
+
+def probe_upstreams(nodes, ping_fn):
+    """Probe semua node upstream dari akar; mengembalikan dict id -> status."""
+    statuses = {}
+    checked_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+    for node_id in probe_order(nodes):
+        node = nodes[node_id]
+        cause = blocked_by(node.get('parent'), statuses)
+        if cause:
+            statuses[node_id] = {'status': UNREACHABLE, 'root_cause': cause, 'checked_at': checked_at}
+            print(f"[TOPOLOGI] {node.get('name', node_id)}: unreachable (root cause {cause})")
+            continue
+        ip = str(node.get('ip') or '').strip()
+        if not ip:
+            status = UNKNOWN
+        else:
+            status = UP if ping_fn(ip) else DOWN
+        statuses[node_id] = {
+            'status': status,
+            'root_cause': node_id if status == DOWN else None,
+            'checked_at': checked_at,
+        }
+        print(f"[TOPOLOGI] {node.get('name', node_id)} ({ip or '-'}): {status}")
+    return statuses
+
+
+def blocked_by(parent_id, statuses):
+    """Root cause jika induk sedang down/unreachable, selain itu None."""
+    if parent_id in (None, ''):
+        return None
+    parent = statuses.get(str(parent_id))
+    if parent is None or parent['status'] in (UP, UNKNOWN):
+        return None
+    return parent['root_cause']
+
+
+def save_statuses(statuses, path=UPSTREAM_STATUS_FILE):
+    folder = os.path.dirname(path) or '.'
+    fd, tmp = tempfile.mkstemp(dir=folder, prefix='.upstream-', suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(statuses, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_statuses(path=UPSTREAM_STATUS_FILE):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
@@ -0,0 +1,161 @@
+"""
+Uploader data monitoring dari ping_check ke web app.
+
+Setiap sampel ditulis dulu ke spool di disk (satu file JSON per sampel, dengan
+idempotency key), baru kemudian dikirim per batch ke /api/ingest dalam satu
+request gzip lewat requests.Session (koneksi keep-alive). File spool hanya
+dihapus setelah server mengonfirmasi, jadi sampel tidak hilang saat Flask
+restart; kirim ulang aman karena server membuang key yang sudah pernah diterima.
+
+Respons selain 2xx tidak pernah menghapus batch: server yang belum di-upgrade
+saat deploy (404/405) atau sedang bermasalah cukup ditunggu dengan backoff, dan
+batch yang terlalu besar (413) dipecah dua. Satu sampel yang sendirian pun masih
+413 dipindah ke `<nama>.rejected` di spool untuk diperiksa manual. Yang dibuang
+hanya sampel yang disebut server di `rejected`.
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import requests
+
+SPOOL_DIR = 'spool'
+MAX_BATCH = 200
+REQUEST_TIMEOUT = 10
+BACKOFF_INITIAL = 2
+BACKOFF_MAX = 300
+# Spool dibatasi agar disk tidak penuh jika web app mati berhari-hari
+MAX_SPOOL_FILES = 20000
+
+KIND_HISTORY = 'history'
+KIND_ACTIVE_USERS = 'active_users'
+
+
+class SpoolUploader:
+    def __init__(self, base_url, spool_dir=SPOOL_DIR, max_batch=MAX_BATCH, timeout=REQUEST_TIMEOUT):
+        self.base_url = base_url.rstrip('/')
+        self.spool_dir = spool_dir
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({'Content-Type': 'application/json', 'Content-Encoding': 'gzip'})
+        self._backoff = 0
+        self._next_attempt = 0.0
+        self._flush_lock = threading.Lock()
+        os.makedirs(spool_dir, exist_ok=True)
+
+    def enqueue(self, kind, payload, timestamp=None):
+        """Menyimpan satu sampel ke spool; mengembalikan idempotency key-nya."""
+        timestamp = timestamp or datetime.now().isoformat()
+        key = uuid.uuid4().hex
+        item = {'key': key, 'kind': kind, 'timestamp': timestamp, 'payload': payload}
+        # Nama file diawali waktu agar urutan kirim = urutan sampel
+        name = f"{time.time_ns():020d}-{key}.json"
+        fd, tmp = tempfile.mkstemp(dir=self.spool_dir, prefix='.spool-', suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(item, f)
+            f.flush()
+            try:
+                os.fsync(f.fileno())
+            except OSError:
+                pass
+        os.replace(tmp, os.path.join(self.spool_dir, name))
+        self._trim()
+        return key
+
+    def pending(self):
+        return sorted(n for n in os.listdir(self.spool_dir) if n.endswith('.json') and not n.startswith('.'))
+
+    def _trim(self):
+        names = self.pending()
+        for name in names[:max(0, len(names) - MAX_SPOOL_FILES)]:
+            print(f"Warning: spool penuh, sampel tertua dibuang: {name}")
+            self._remove(name)
+
+    def _remove(self, name):
+        try:
+            os.remove(os.path.join(self.spool_dir, name))
+        except OSError:
+            pass
+
+    def _load(self, names):
+        items, loaded = [], []
+        for name in names:
+            try:
+                with open(os.path.join(self.spool_dir, name), 'r', encoding='utf-8') as f:
+                    items.append(json.load(f))
+                loaded.append(name)
+            except (OSError, ValueError) as e:
+                print(f"Warning: file spool rusak dibuang ({name}): {e}")
+                self._remove(name)
+        return items, loaded
+
+    def flush(self, force=False):
+        """Mengirim isi spool per batch. Mengembalikan jumlah sampel yang terkirim.
+
+        Jika server gagal dihubungi, pengiriman berikutnya ditunda dengan backoff
+        eksponensial (kecuali `force`), dan sampel tetap di spool.
+        """
+        if not force and time.monotonic() < self._next_attempt:
+            return 0
+        # Job flush berkala dan job MikroTik bisa memanggil ini bersamaan
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self):
+        sent = 0
+        batch_size = self.max_batch
+        while True:
+            names = self.pending()[:batch_size]
+            if not names:
+                break
+            items, names = self._load(names)
+            if not items:
+                continue
+            body = gzip.compress(json.dumps({'items': items}).encode('utf-8'))
+            try:
+                response = self.session.post(f"{self.base_url}/api/ingest", data=body, timeout=self.timeout)
+                if response.status_code == 413:
+                    if len(items) > 1:
+                        batch_size = max(1, len(items) // 2)
+                        print(f"Warning: batch {len(items)} sampel terlalu besar, dipecah menjadi {batch_size}.")
+                        continue
+                    if self._quarantine(names[0]):
+                        continue
+                    break
+                if not response.ok:
+                    # 404/405 (server belum di-upgrade), 408/429, 5xx, dll.: simpan dan coba lagi nanti
+                    raise requests.HTTPError(f"HTTP {response.status_code}")
+                result = response.json()
+            except (requests.RequestException, ValueError) as e:
+                self._backoff = min(BACKOFF_MAX, self._backoff * 2 or BACKOFF_INITIAL)
+                self._next_attempt = time.monotonic() + self._backoff
+                print(f"ERROR: Gagal mengirim {len(items)} sampel, dicoba lagi dalam {self._backoff}s. Alasan: {e}")
+                break
+            for rejected in result.get('rejected', []):
+                print(f"Warning: sampel {rejected.get('key')} ditolak server dan dibuang: {rejected.get('message')}")
+            for name in names:
+                self._remove(name)
+            sent += len(items)
+            self._backoff = 0
+            self._next_attempt = 0.0
+        if sent:
+            print(f"Berhasil mengirim {sent} sampel ke web server.")
+        return sent
+
+    def _quarantine(self, name):
+        """Sampel yang sendirian pun ditolak 413: disisihkan dari antrean, tidak dihapus."""
+        path = os.path.join(self.spool_dir, name)
+        try:
+            os.replace(path, f"{path}.rejected")
+        except OSError as e:
+            print(f"Warning: gagal menyisihkan sampel {name}: {e}")
+            return False
+        print(f"ERROR: Sampel {name} terlalu besar untuk server, disimpan sebagai {name}.rejected.")
+        return True